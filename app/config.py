@@ -10,12 +10,61 @@ class Settings(BaseSettings):
     ADMIN_API_KEY: str = "your-admin-api-key-here"
     
     MODEL_PATH: str = "ml/models/credit_model.joblib"
+    # "sklearn" (reference) or "native" (flat-array tree engine, falls back to sklearn)
+    INFERENCE_ENGINE: str = "sklearn"
+    # Poll model artifacts and hot reload on change; 0 disables the watcher
+    MODEL_WATCH_INTERVAL_SECONDS: float = 0
+    # Serve from the memory-mapped native export so multiple workers share the model's pages
+    MODEL_MMAP: bool = False
+    NATIVE_MODEL_DIR: str = "ml/models/native"
     RULES_CONFIG_PATH: str = "config/rules.json"
+    # Poll the rules file so every worker picks up changes; 0 disables the watcher
+    RULES_WATCH_INTERVAL_SECONDS: float = 1.0
+    # Per-rule evaluation time and hit rate, served by GET /api/v1/rules/profile
+    RULES_PROFILING: bool = True
+    # Evaluate auto_reject rules cheapest-likeliest first and stop at the first hit. The decision is the
+    # same, but a rejection then lists one reason instead of every auto_reject rule that matched
+    RULES_ADAPTIVE_ORDER: bool = False
     
     LOG_LEVEL: str = "INFO"
     MAX_BATCH_SIZE: int = 100
+    # NDJSON streaming: items scored per internal chunk, and the longest accepted line
+    STREAM_CHUNK_SIZE: int = 256
+    STREAM_MAX_LINE_BYTES: int = 64 * 1024
     REQUEST_TIMEOUT: int = 30
     
+    # Micro-batching of concurrent single checks
+    INFERENCE_BATCH_MAX_SIZE: int = 32
+    INFERENCE_BATCH_WAIT_MS: float = 2.0
+    INFERENCE_WORKERS: int = 1
+    
+    # Staged decisions: check auto_reject rules on the engineered features first and only run the model
+    # when the decision still depends on it. Rejections decided this way have scored=false and credit_score 0
+    STAGED_DECISIONS: bool = False
+    # Still score those rejections in the background, for the credit_shadow_score metric
+    SHADOW_SCORING: bool = False
+    
+    # Decision cache for repeated identical check requests
+    DECISION_CACHE_ENABLED: bool = True
+    DECISION_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    DECISION_CACHE_TTL_SECONDS: int = 24 * 3600
+    
+    # Per-worker store of client profiles for loan-only checks (PUT /clients/{id}, POST /clients/{id}/check)
+    CLIENT_STORE_ENABLED: bool = True
+    CLIENT_STORE_MAX_BYTES: int = 64 * 1024 * 1024
+    CLIENT_STORE_TTL_SECONDS: int = 3600
+    
+    # Amounts per tenure in the first batch of the loan offer search, before bisection
+    OFFER_GRID_POINTS: int = 16
+    
+    # Decision audit log: queued on the request path, group-committed to SQLite by a background thread
+    AUDIT_ENABLED: bool = True
+    AUDIT_DIR: str = "data/audit"
+    AUDIT_QUEUE_SIZE: int = 100000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_SEGMENT_MAX_BYTES: int = 256 * 1024 * 1024
+    AUDIT_SEGMENTS_KEPT: int = 8
+    
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 settings = Settings()
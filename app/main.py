@@ -1,16 +1,77 @@
+# Imported first so the "imports" startup phase covers everything below
+from app.utils.startup import startup
 from fastapi import FastAPI, Depends, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from app.routers import credit
-from app.schemas.credit import HealthResponse, RulesConfig
+from app.schemas.credit import HealthResponse, RulesConfig, ModelReloadResponse
 from app.config import settings
 from app.services.model_service import model_service
-import json
+from app.services.rule_engine import RuleValidationError
+from app.services.tree_engine import META_FILE
+from app.utils.file_watcher import FileWatcher
+from app.utils.metrics import registry, MetricsMiddleware
+from contextlib import asynccontextmanager
+from typing import List, Optional
 import os
 
+def model_artifact_paths():
+    model_dir = os.path.dirname(settings.MODEL_PATH)
+    # The native export is replaced as a whole directory, so its meta.json marks a new model
+    model_file = os.path.join(settings.NATIVE_MODEL_DIR, META_FILE) if settings.MODEL_MMAP else settings.MODEL_PATH
+    return [model_file] + [
+        os.path.join(model_dir, name)
+        for name in ('model_metrics.json', 'feature_importance.json', 'model_metadata.json')
+    ]
+
+async def start_services() -> List[FileWatcher]:
+    """Loads and warms up the model, marks the service ready and starts the file watchers."""
+    startup.mark("imports")
+    credit.audit_log.start()
+    with startup.phase("model_load"):
+        model_service.load_model()
+    for name, seconds in model_service.load_timings.items():
+        startup.phases[f"model_{name}"] = round(seconds * 1000, 1)
+
+    if model_service.model_loaded:
+        # The first real request should not pay for cold code paths in pandas, pydantic or the rules
+        with startup.phase("request_warm_up"):
+            await credit.warm_up()
+        startup.mark_ready()
+        print(f"Ready in {startup.phases['total']:.0f} ms: {startup.phases}")
+
+    watchers = []
+    if settings.MODEL_WATCH_INTERVAL_SECONDS > 0:
+        watchers.append(FileWatcher(model_artifact_paths(), model_service.reload_model,
+                                    interval=settings.MODEL_WATCH_INTERVAL_SECONDS, name="model-watcher"))
+    if settings.RULES_WATCH_INTERVAL_SECONDS > 0:
+        # Rule updates written by any worker (or by hand) reach every worker within a couple of polls
+        watchers.append(FileWatcher([settings.RULES_CONFIG_PATH], credit.rule_engine.reload,
+                                    interval=settings.RULES_WATCH_INTERVAL_SECONDS, name="rules-watcher"))
+    for watcher in watchers:
+        watcher.start()
+    return watchers
+
+def stop_services(watchers: List[FileWatcher]):
+    for watcher in watchers:
+        watcher.stop()
+    # Let in-flight inference finish before the process exits
+    credit.inference_scheduler.shutdown()
+    # Decisions already returned to clients must reach the audit log
+    credit.audit_log.stop()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    watchers = await start_services()
+    yield
+    stop_services(watchers)
+
 app = FastAPI(
     title=settings.APP_NAME,
     version="1.0.0",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -22,38 +83,104 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and in-flight metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(credit.router)
 
 @app.get("/api/v1/health", response_model=HealthResponse)
 async def health_check():
     return HealthResponse(
-        status="healthy",
-        is_model_loaded=model_service.model_loaded
+        status="healthy" if startup.ready else "starting",
+        is_model_loaded=model_service.model_loaded,
+        model_version=model_service.version,
+        ready=startup.ready,
+        startup_timings_ms=startup.phases
     )
 
+@app.get("/api/v1/health/ready", response_model=HealthResponse)
+async def readiness_check():
+    """Readiness probe: 503 until the model is loaded and warmed up."""
+    health = await health_check()
+    if not startup.ready:
+        return JSONResponse(status_code=503, content=health.model_dump(mode="json"))
+    return health
+
+@app.post("/api/v1/model/reload", response_model=ModelReloadResponse)
+async def reload_model(x_admin_api_key: str = Header(...)):
+    if x_admin_api_key != settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid Admin API Key")
+    
+    # Load and warm up in a worker thread; requests keep using the current model until the swap
+    previous_version = model_service.version
+    try:
+        artifacts = await run_in_threadpool(model_service.reload_model)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed, keeping version {previous_version}: {e}")
+    
+    return ModelReloadResponse(
+        message="Model reloaded successfully",
+        version=artifacts.version,
+        previous_version=previous_version,
+        training_date=artifacts.training_date
+    )
+
+@app.get("/api/v1/cache/stats")
+async def get_cache_stats(x_admin_api_key: str = Header(...)):
+    if x_admin_api_key != settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid Admin API Key")
+    return credit.decision_cache.stats()
+
+@app.get("/api/v1/audit/stats")
+async def get_audit_stats(x_admin_api_key: str = Header(...)):
+    if x_admin_api_key != settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid Admin API Key")
+    return credit.audit_log.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/api/v1/rules")
-async def get_rules(x_api_key: str = Header(...)):
+async def get_rules(x_api_key: str = Header(...), if_none_match: Optional[str] = Header(None)):
     if x_api_key != settings.API_KEY:
         raise HTTPException(status_code=403, detail="Invalid API Key")
     
-    if os.path.exists(settings.RULES_CONFIG_PATH):
-        with open(settings.RULES_CONFIG_PATH, 'r') as f:
-            return json.load(f)
-    return {"error": "Rules config not found"}
+    # Served from memory; clients that already hold this version get a 304 without a body
+    ruleset = credit.rule_engine.active
+    headers = {"ETag": ruleset.etag, "Cache-Control": "no-cache"}
+    if if_none_match is not None and ruleset.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=ruleset.body, media_type="application/json", headers=headers)
+
+@app.get("/api/v1/rules/profile")
+async def get_rules_profile(x_admin_api_key: str = Header(...)):
+    """Per-rule evaluation count, hit rate and CPU time in this worker, most expensive first."""
+    if x_admin_api_key != settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid Admin API Key")
+    return credit.rule_engine.profile()
 
 @app.put("/api/v1/rules")
-async def update_rules(config: RulesConfig, x_admin_api_key: str = Header(...)):
+async def update_rules(config: RulesConfig, x_admin_api_key: str = Header(...), if_match: Optional[str] = Header(None)):
     if x_admin_api_key != settings.ADMIN_API_KEY:
         raise HTTPException(status_code=403, detail="Invalid Admin API Key")
     
-    with open(settings.RULES_CONFIG_PATH, 'w') as f:
-        json.dump(config.dict(), f, indent=2)
+    # Optional optimistic concurrency: only overwrite the version the client last read
+    if if_match is not None and if_match.strip() not in ("*", credit.rule_engine.active.etag):
+        raise HTTPException(status_code=412, detail="Rules have changed since they were read")
     
-    # Reload the rule engine in memory
-    credit.rule_engine.reload()
+    # Invalid rules are rejected before they reach disk or the running engine. The file is replaced
+    # atomically; this worker switches now and the others pick it up through their rules watcher.
+    try:
+        ruleset = await run_in_threadpool(credit.rule_engine.save, config.model_dump())
+    except RuleValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {"message": "Rules updated successfully"}
+    return JSONResponse(
+        content={"message": "Rules updated successfully", "version": ruleset.version},
+        headers={"ETag": ruleset.etag}
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,111 +1,480 @@
-from fastapi import APIRouter, HTTPException, Header, Depends
-from typing import List, Optional
-from app.schemas.credit import CreditCheckRequest, CreditCheckResponse, CreditFactor, Decision, Confidence, RiskLevel, ModelInfo
-from app.services.model_service import model_service
-from app.services.rule_engine import RuleEngine
+from fastapi import APIRouter, HTTPException, Header, Depends, Request, Path, Body
+from fastapi.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Set, Tuple, Union
+from app.schemas.credit import (
+    CreditCheckRequest, CreditCheckResponse, ModelInfo, AuditRecord, ClientProfile, LoanRequest, StoredClientProfile,
+    LoanOfferRequest, LoanOfferResponse,
+    BatchCreditCheckRequest, BatchCreditCheckResponse, BatchItemResult
+)
+from app.services.model_service import model_service, WARMUP_RECORD
+from app.services.rule_engine import RuleEngine, RuleSet
+from app.services.decision_service import DecisionService, build_input_data
+from app.services.inference_scheduler import InferenceScheduler
+from app.services.decision_cache import DecisionCache, request_fingerprint, payload_fingerprint
+from app.services.audit_log import AuditLog
+from app.services.client_store import ClientProfileStore, StoredProfile
+from app.services.loan_optimizer import LoanOfferOptimizer, DEFAULT_TENURES
 from app.config import settings
+from app.utils.metrics import registry, STAGE_LATENCY, SHADOW_SCORES
+from app.utils.preprocessing import derive_features_record
+from app.utils.ndjson import NDJSONStreamingResponse, iter_lines
+from app.utils.codecs import (
+    MediaType, request_media_type, response_media_type, decode_model, decode_body, model_response,
+    encoded_response, request_body_docs
+)
+from app.utils.columnar import (
+    COLUMNAR_REQUEST_SCHEMA, ColumnarValidationError, validate_columns, nest, encode_results
+)
+from functools import partial
+import asyncio
+import time
 import uuid
 
 router = APIRouter(prefix="/api/v1/credit", tags=["credit"])
-rule_engine = RuleEngine(settings.RULES_CONFIG_PATH)
+rule_engine = RuleEngine(
+    settings.RULES_CONFIG_PATH,
+    profiling=settings.RULES_PROFILING,
+    adaptive_order=settings.RULES_ADAPTIVE_ORDER
+)
+decision_service = DecisionService(model_service, rule_engine)
+inference_scheduler = InferenceScheduler(
+    model_service.predict_batch,
+    max_batch_size=settings.INFERENCE_BATCH_MAX_SIZE,
+    max_wait_ms=settings.INFERENCE_BATCH_WAIT_MS,
+    max_workers=settings.INFERENCE_WORKERS,
+    # A lone request takes the scalar derive_features_record path instead of a one-row DataFrame
+    predict_one=model_service.predict
+)
+# Staged decisions engineer features up front, so their scoring skips feature engineering
+scoring_scheduler = InferenceScheduler(
+    model_service.predict_engineered,
+    max_batch_size=settings.INFERENCE_BATCH_MAX_SIZE,
+    max_wait_ms=settings.INFERENCE_BATCH_WAIT_MS,
+    executor=inference_scheduler.executor,
+    predict_one=model_service.predict_features
+)
+decision_cache = DecisionCache(
+    max_bytes=settings.DECISION_CACHE_MAX_BYTES,
+    ttl_seconds=settings.DECISION_CACHE_TTL_SECONDS,
+    enabled=settings.DECISION_CACHE_ENABLED
+)
+# Cached decisions are only valid for the rules and model that produced them
+rule_engine.add_reload_listener(decision_cache.invalidate)
+model_service.add_reload_listener(decision_cache.invalidate)
+registry.register_collector(decision_cache.collect_metrics)
+audit_log = AuditLog(
+    settings.AUDIT_DIR,
+    enabled=settings.AUDIT_ENABLED,
+    max_queue=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    max_segment_bytes=settings.AUDIT_SEGMENT_MAX_BYTES,
+    segments_kept=settings.AUDIT_SEGMENTS_KEPT
+)
+registry.register_collector(audit_log.collect_metrics)
+client_store = ClientProfileStore(
+    max_bytes=settings.CLIENT_STORE_MAX_BYTES,
+    ttl_seconds=settings.CLIENT_STORE_TTL_SECONDS,
+    enabled=settings.CLIENT_STORE_ENABLED
+)
+registry.register_collector(client_store.collect_metrics)
+loan_optimizer = LoanOfferOptimizer(model_service, decision_service, grid_points=settings.OFFER_GRID_POINTS)
+
+VALIDATION_STAGE = STAGE_LATENCY.labels("validation")
+
+def observe_validation(http_request: Request):
+    """Time from receiving the request until the handler runs (body parsing, validation, auth)."""
+    received_at = getattr(http_request.state, "received_at", None)
+    if received_at is not None:
+        VALIDATION_STAGE.observe(time.perf_counter() - received_at)
 
 def verify_api_key(x_api_key: str = Header(...)):
     if x_api_key != settings.API_KEY:
         raise HTTPException(status_code=403, detail="Invalid API Key")
     return x_api_key
 
-def get_risk_level(score: float) -> RiskLevel:
-    if score >= 0.8: return RiskLevel.low
-    if score >= 0.6: return RiskLevel.medium
-    if score >= 0.4: return RiskLevel.high
-    return RiskLevel.very_high
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+def decide_and_audit(input_data: Dict[str, Any], prediction: Dict[str, Any], audit: bool = True,
+                     prescreened: bool = False, ruleset: Optional[RuleSet] = None) -> CreditCheckResponse:
+    # The audit record names the rule version the decision actually used
+    ruleset = ruleset or rule_engine.active
+    features = prediction["engineered_features"]
+    response = decision_service.decide(prediction["score"], features, prediction["contributions"], prescreened,
+                                       ruleset)
+    # Only queued here; the audit writer thread does the disk I/O
+    if audit:
+        audit_log.record(response, input_data, features, prediction["model_version"], ruleset.version)
+    return response
+
+def prescreen_and_audit(input_data: Dict[str, Any], features: Dict[str, Any], audit: bool = True,
+                        ruleset: Optional[RuleSet] = None) -> Optional[CreditCheckResponse]:
+    """Staged decisions: the rejection when an auto_reject rule fires, otherwise None."""
+    ruleset = ruleset or rule_engine.active
+    response = decision_service.prescreen(features, ruleset)
+    if response is not None and audit:
+        audit_log.record(response, input_data, features, None, ruleset.version)
+    return response
+
+# Background scoring of prescreened rejections; referenced here until they finish
+shadow_tasks: Set[asyncio.Future] = set()
+
+def shadow_score(scoring: Awaitable[Any]):
+    """Scores hard rejections after the response is sent, so the model's view of them stays monitored."""
+    task = asyncio.ensure_future(scoring)
+    shadow_tasks.add(task)
+    task.add_done_callback(_record_shadow_scores)
+
+def _record_shadow_scores(task: asyncio.Future):
+    shadow_tasks.discard(task)
+    if task.cancelled() or task.exception() is not None:
+        return
+    predictions = task.result()
+    for prediction in predictions if isinstance(predictions, list) else [predictions]:
+        SHADOW_SCORES.observe(prediction["score"])
+
+async def score_request(request: CreditCheckRequest, audit: bool = True) -> CreditCheckResponse:
+    # 1. Prepare input data for prediction
+    return await score_input(build_input_data(request), audit=audit)
+
+async def score_input(input_data: Dict[str, Any], client_features: Optional[Dict[str, Any]] = None,
+                      audit: bool = True) -> CreditCheckResponse:
+    """Scores one flat record; client_features are the stored client-only features, if any."""
+    if settings.STAGED_DECISIONS or client_features is not None:
+        # 2. Engineer features here, reusing stored client features, and check the hard rejects first if staged
+        features = derive_features_record(input_data, client_features)
+        # Prescreen and decide use one rule snapshot even if the rules reload while the model scores
+        ruleset = rule_engine.active
+        if settings.STAGED_DECISIONS:
+            rejection = prescreen_and_audit(input_data, features, audit, ruleset)
+            if rejection is not None:
+                if settings.SHADOW_SCORING:
+                    shadow_score(scoring_scheduler.predict(features))
+                return rejection
+        prediction = await scoring_scheduler.predict(features)
+        return decide_and_audit(input_data, prediction, audit, prescreened=settings.STAGED_DECISIONS, ruleset=ruleset)
+
+    # 2. Predict with ML model and get engineered features (micro-batched, off the event loop)
+    prediction = await inference_scheduler.predict(input_data)
+
+    # 3. Apply rules, build the response and queue it for the audit log
+    return decide_and_audit(input_data, prediction, audit)
+
+async def warm_up():
+    """Sends one application through validation, scoring, rules and serialization before real traffic."""
+    # Client and loan models ignore each other's fields, so the flat record validates as both
+    request = CreditCheckRequest.model_validate({"client": WARMUP_RECORD, "loan": WARMUP_RECORD})
+    request_fingerprint(request)
+    response = await score_request(request, audit=False)
+    response.model_dump_json()
 
-@router.post("/check", response_model=CreditCheckResponse)
-async def check_credit(request: CreditCheckRequest, api_key: str = Depends(verify_api_key)):
+@router.post("/check", response_model=CreditCheckResponse, openapi_extra=request_body_docs(CreditCheckRequest))
+async def check_credit(http_request: Request, api_key: str = Depends(verify_api_key)):
+    # The body is decoded by the negotiated codec rather than by FastAPI (JSON goes straight to pydantic-core)
+    media_type = request_media_type(http_request.headers.get("content-type"))
+    if media_type.columnar:
+        raise HTTPException(status_code=415, detail="Columnar bodies are only accepted by /check/batch")
+    reply = response_media_type(http_request.headers.get("accept"), media_type)
+    request = decode_model(media_type, CreditCheckRequest, await http_request.body())
+    observe_validation(http_request)
     try:
-        # 1. Prepare input data for prediction
-        input_data = request.client.model_dump()
-        input_data.update(request.loan.model_dump())
-        
-        # 2. Add client_id if missing (for processing)
-        if 'client_id' not in input_data:
-            input_data['client_id'] = str(uuid.uuid4())
-            
-        # 3. Predict with ML model and get engineered features
-        prediction = model_service.predict(input_data)
-        ml_score = prediction["score"]
-        features = prediction["engineered_features"]
-
-        # 4. Run rule engine
-        rule_results = rule_engine.check_rules(features)
-        thresholds = rule_engine.get_thresholds()
-        
-        # 5. Determine decision
-        decision = Decision.manual_review
-        recommendations = rule_results["recommendations"]
-        flags = rule_results["flags"]
-        rules_applied = [r["name"] for r in rule_results["auto_reject"] + rule_results["auto_approve"]]
-        
-        if rule_results["auto_reject"]:
-            decision = Decision.rejected
-        elif rule_results["auto_approve"]:
-            decision = Decision.approved
+        # Identical requests (retries, resubmissions) are served from cache or share one computation
+        response = await decision_cache.get_or_compute(request_fingerprint(request), lambda: score_request(request))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return model_response(MediaType(reply.codec), response)
+
+async def score_uncached(records: List[Dict[str, Any]], keys: List[str]) -> List[CreditCheckResponse]:
+    """Scores records the cache missed in one vectorized pass and caches the decisions."""
+    generation = decision_cache.generation
+    if settings.STAGED_DECISIONS:
+        responses = await score_staged(records)
+    else:
+        predictions = await inference_scheduler.predict_many(records)
+        responses = [decide_and_audit(input_data, prediction) for input_data, prediction in zip(records, predictions)]
+    for key, response in zip(keys, responses):
+        decision_cache.put(key, response, generation)
+    return responses
+
+async def score_staged(records: List[Dict[str, Any]]) -> List[CreditCheckResponse]:
+    """Batch form of the staged pipeline: only records without a hard reject reach the model."""
+    features = [derive_features_record(input_data) for input_data in records]
+    ruleset = rule_engine.active
+    responses = [prescreen_and_audit(input_data, row, ruleset=ruleset) for input_data, row in zip(records, features)]
+    remaining = [i for i, response in enumerate(responses) if response is None]
+    if settings.SHADOW_SCORING and len(remaining) < len(records):
+        shadow_score(scoring_scheduler.predict_many([row for row, r in zip(features, responses) if r is not None]))
+
+    if not remaining:
+        return responses
+    predictions = await scoring_scheduler.predict_many([features[i] for i in remaining])
+    for i, prediction in zip(remaining, predictions):
+        responses[i] = decide_and_audit(records[i], prediction, prescreened=True, ruleset=ruleset)
+    return responses
+
+def check_batch_size(size: int):
+    if size > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {size} exceeds maximum of {settings.MAX_BATCH_SIZE}"
+        )
+
+def validate_rows(batch: BatchCreditCheckRequest) -> Tuple[List[Optional[str]], List[Optional[Dict[str, Any]]],
+                                                         List[Optional[str]]]:
+    """Cache keys, input records and errors of a row-wise batch; each item is validated on its own."""
+    keys, records, errors = [], [], []
+    for item in batch.requests:
+        try:
+            request = CreditCheckRequest.model_validate(item)
+        except ValidationError as e:
+            keys.append(None)
+            records.append(None)
+            errors.append(format_validation_error(e))
+            continue
+        keys.append(request_fingerprint(request))
+        records.append(build_input_data(request))
+        errors.append(None)
+    return keys, records, errors
+
+def validate_columnar(payload: Any) -> Tuple[List[Optional[str]], List[Optional[Dict[str, Any]]],
+                                             List[Optional[str]]]:
+    """Same as validate_rows for a struct-of-arrays body, without a pydantic model per application."""
+    columns = payload.get("columns") if isinstance(payload, dict) else None
+    if isinstance(columns, dict):
+        check_batch_size(max((len(v) for v in columns.values() if isinstance(v, list)), default=0))
+    try:
+        records, errors = validate_columns(columns)
+    except ColumnarValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not records:
+        raise HTTPException(status_code=422, detail="Columnar body has no rows")
+    keys = []
+    for record in records:
+        if record is None:
+            keys.append(None)
+            continue
+        # Same fingerprint as the row-wise form, so both share cached decisions
+        keys.append(payload_fingerprint(nest(record)))
+        record["client_id"] = str(uuid.uuid4())
+    return keys, records, errors
+
+async def score_batch(keys: List[Optional[str]],
+                      records: List[Optional[Dict[str, Any]]]) -> List[Optional[CreditCheckResponse]]:
+    """Serves cached decisions and scores the remaining valid items (key not None) in one vectorized pass."""
+    responses: List[Optional[CreditCheckResponse]] = [None] * len(keys)
+    pending = []
+    for index, key in enumerate(keys):
+        if key is None:
+            continue
+        cached = decision_cache.get(key)
+        if cached is not None:
+            responses[index] = cached
         else:
-            # Use ML threshold
-            min_score = thresholds.get("min_credit_score", 0.5)
-            if ml_score >= min_score:
-                decision = Decision.approved
+            pending.append(index)
+
+    if pending:
+        try:
+            scored = await score_uncached([records[i] for i in pending], [keys[i] for i in pending])
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        for index, response in zip(pending, scored):
+            responses[index] = response
+    return responses
+
+@router.post("/check/batch", response_model=BatchCreditCheckResponse,
+             openapi_extra=request_body_docs(BatchCreditCheckRequest, COLUMNAR_REQUEST_SCHEMA))
+async def check_credit_batch(http_request: Request, api_key: str = Depends(verify_api_key)):
+    """
+    Scores a batch of applications. Besides JSON rows ({"requests": [...]}) it accepts msgpack and a
+    columnar body ({"columns": {field: [values]}}); the response format follows Accept, or the request.
+    """
+    media_type = request_media_type(http_request.headers.get("content-type"))
+    reply = response_media_type(http_request.headers.get("accept"), media_type)
+    body = await http_request.body()
+
+    # 1. Validate each item on its own so one bad application doesn't fail the batch
+    if media_type.columnar:
+        keys, records, errors = validate_columnar(decode_body(media_type, body))
+    else:
+        batch = decode_model(media_type, BatchCreditCheckRequest, body)
+        check_batch_size(len(batch.requests))
+        keys, records, errors = validate_rows(batch)
+    observe_validation(http_request)
+
+    # 2. Score all uncached items in a single vectorized pass
+    responses = await score_batch(keys, records)
+
+    if reply.columnar:
+        return encoded_response(reply, encode_results(responses, errors))
+    succeeded = sum(response is not None for response in responses)
+    return model_response(reply, BatchCreditCheckResponse(
+        total=len(responses),
+        succeeded=succeeded,
+        failed=len(responses) - succeeded,
+        results=[
+            BatchItemResult(index=index, response=response, error=error)
+            for index, (response, error) in enumerate(zip(responses, errors))
+        ]
+    ))
+
+async def score_stream_chunk(chunk: List[Tuple[int, Union[CreditCheckRequest, str]]]) -> bytes:
+    """Scores one chunk of streamed items and renders their NDJSON result lines."""
+    results = {}
+    pending = []
+    for index, item in chunk:
+        if isinstance(item, str):
+            results[index] = BatchItemResult(index=index, error=item)
+            continue
+        key = request_fingerprint(item)
+        cached = decision_cache.get(key)
+        if cached is not None:
+            results[index] = BatchItemResult(index=index, response=cached)
+        else:
+            pending.append((index, key, build_input_data(item)))
+
+    if pending:
+        try:
+            responses = await score_uncached([input_data for _, _, input_data in pending],
+                                             [key for _, key, _ in pending])
+            for (index, _, _), response in zip(pending, responses):
+                results[index] = BatchItemResult(index=index, response=response)
+        except Exception as e:
+            # The status line is already sent, so failures are reported per item
+            for index, _, _ in pending:
+                results[index] = BatchItemResult(index=index, error=f"Scoring failed: {e}")
+
+    return b"".join(results[index].model_dump_json().encode() + b"\n" for index, _ in chunk)
+
+async def stream_results(http_request: Request) -> AsyncIterator[bytes]:
+    chunk: List[Tuple[int, Union[CreditCheckRequest, str]]] = []
+    index = 0
+    try:
+        async for line in iter_lines(http_request.stream(), settings.STREAM_MAX_LINE_BYTES):
+            if line is None:
+                chunk.append((index, f"Line exceeds {settings.STREAM_MAX_LINE_BYTES} bytes"))
+            elif not line.strip():
+                continue
             else:
-                decision = Decision.rejected
-                
-        # Confidence
-        confidence = Confidence.medium
-        if ml_score >= thresholds.get("high_confidence_threshold", 0.8) or ml_score <= thresholds.get("low_confidence_threshold", 0.3):
-            confidence = Confidence.high
-            
-        # Risk Level
-        risk_level = get_risk_level(ml_score)
-        
-        # 6. Format response
-        # Create some factors for explainability (demo)
-        factors = []
-        top_importance = model_service.get_top_factors(3)
-        for imp in top_importance:
-            factor_name = imp["factor"]
-            # Simple logic for impact direction (demo)
-            impact = "positive"
-            if "ratio" in factor_name or "debt" in factor_name:
-                impact = "negative" if features.get(factor_name, 0) > 0.5 else "positive"
-            
-            factors.append(CreditFactor(
-                factor=factor_name,
-                impact=impact,
-                description=f"Based on historical data for {factor_name}"
-            ))
-            
-        response = CreditCheckResponse(
-            decision=decision,
-            credit_score=round(ml_score * 100, 2),
-            confidence=confidence,
-            risk_level=risk_level,
-            monthly_payment_estimate=round(features.get("estimated_monthly_payment", 0), 2),
-            debt_to_income_ratio=round(features.get("debt_to_income_ratio", 0), 4),
-            factors=factors,
-            recommendations=recommendations + flags,
-            rules_applied=rules_applied
-        )
-        
-        return response
-        
+                try:
+                    chunk.append((index, CreditCheckRequest.model_validate_json(line)))
+                except ValidationError as e:
+                    chunk.append((index, format_validation_error(e)))
+            index += 1
+            if len(chunk) >= settings.STREAM_CHUNK_SIZE:
+                yield await score_stream_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield await score_stream_chunk(chunk)
+    except ClientDisconnect:
+        return
+
+@router.post("/check/stream", response_class=NDJSONStreamingResponse)
+async def check_credit_stream(http_request: Request, api_key: str = Depends(verify_api_key)):
+    """
+    Scores newline-delimited CreditCheckRequest objects from a streamed body. Items are scored
+    in chunks of STREAM_CHUNK_SIZE and one BatchItemResult line per item is streamed back, in
+    input order, as each chunk completes, so memory does not grow with the body size.
+    """
+    return NDJSONStreamingResponse(stream_results(http_request))
+
+@router.get("/check/{request_id}", response_model=AuditRecord)
+async def get_decision(request_id: str, api_key: str = Depends(verify_api_key)):
+    """Returns an audited decision with the inputs, engineered features and versions that produced it."""
+    if not audit_log.enabled:
+        raise HTTPException(status_code=404, detail="Audit log is disabled")
+    record = await run_in_threadpool(audit_log.get, request_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"No decision with request_id {request_id}")
+    return record
+
+def stored_profile(client_id: str) -> StoredProfile:
+    stored = client_store.get(client_id) if client_store.enabled else None
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"No stored profile for client {client_id}; PUT it first")
+    return stored
+
+@router.put("/clients/{client_id}", response_model=StoredClientProfile)
+async def store_client(client_id: str = Path(..., max_length=128), profile: ClientProfile = Body(...),
+                       api_key: str = Depends(verify_api_key)):
+    """Stores a validated client profile so later checks for this client can send only the loan."""
+    if not client_store.enabled:
+        raise HTTPException(status_code=404, detail="Client profile store is disabled")
+    stored = client_store.put(client_id, profile)
+    return StoredClientProfile(
+        client_id=client_id,
+        ttl_seconds=client_store.cache.ttl_seconds,
+        client_features=stored.client_features
+    )
+
+@router.delete("/clients/{client_id}", status_code=204)
+async def delete_client(client_id: str, api_key: str = Depends(verify_api_key)):
+    if not client_store.delete(client_id):
+        raise HTTPException(status_code=404, detail=f"No stored profile for client {client_id}")
+
+@router.post("/clients/{client_id}/check", response_model=CreditCheckResponse,
+             openapi_extra=request_body_docs(LoanRequest))
+async def check_client_loan(client_id: str, http_request: Request, api_key: str = Depends(verify_api_key)):
+    """Same as /check with the client profile taken from the store; the body is only the LoanRequest."""
+    media_type = request_media_type(http_request.headers.get("content-type"))
+    if media_type.columnar:
+        raise HTTPException(status_code=415, detail="Columnar bodies are only accepted by /check/batch")
+    reply = response_media_type(http_request.headers.get("accept"), media_type)
+    loan = decode_model(media_type, LoanRequest, await http_request.body())
+    stored = stored_profile(client_id)
+    observe_validation(http_request)
+
+    # Same record as a full request for this client and loan. The key includes the client id: a hit returns
+    # the first caller's request_id, whose audit record must name this client
+    input_data = dict(stored.record, **loan.model_dump(), client_id=client_id)
+    key = payload_fingerprint({"client_id": client_id, "client": stored.payload, "loan": loan.model_dump(mode="json")})
+    try:
+        response = await decision_cache.get_or_compute(key, lambda: score_input(input_data, stored.client_features))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return model_response(MediaType(reply.codec), response)
+
+@router.post("/offers", response_model=LoanOfferResponse)
+async def find_loan_offers(offer_request: LoanOfferRequest, http_request: Request,
+                           api_key: str = Depends(verify_api_key)):
+    """
+    Largest approvable amount for each tenure, found in one call: a batched amount x tenure grid
+    refined by bisection, scored with the same model, features and rules as /check.
+    """
+    observe_validation(http_request)
+    if (offer_request.client is None) == (offer_request.client_id is None):
+        raise HTTPException(status_code=422, detail="Send exactly one of client or client_id")
+    if offer_request.client is not None:
+        client = offer_request.client.model_dump()
+    else:
+        client = stored_profile(offer_request.client_id).record
+    if offer_request.min_amount > offer_request.max_amount:
+        raise HTTPException(status_code=422, detail="min_amount exceeds max_amount")
+
+    loan = offer_request.model_dump(include={"loan_purpose", "has_guarantor", "has_collateral"})
+    loop = asyncio.get_running_loop()
+    try:
+        # CPU-bound search; runs in the inference pool so it counts against INFERENCE_WORKERS
+        result = await loop.run_in_executor(inference_scheduler.executor, partial(
+            loan_optimizer.optimize, client, loan, offer_request.tenures or DEFAULT_TENURES,
+            offer_request.min_amount, offer_request.max_amount, offer_request.amount_step
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return LoanOfferResponse(model_version=model_service.version, rules_version=rule_engine.version, **result)
 
 @router.get("/factors", response_model=ModelInfo)
 async def get_factors(api_key: str = Depends(verify_api_key)):
     info = model_service.get_info()
     return ModelInfo(
-        version="1.0.0",
-        training_date=None, # Should track this eventually
+        version=info["version"],
+        training_date=info["training_date"],
         metrics=info["metrics"],
         top_factors=info["top_factors"]
     )
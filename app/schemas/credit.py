@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 from datetime import datetime
@@ -99,6 +99,8 @@ class CreditFactor(BaseModel):
     factor: str
     impact: str # positive, negative, neutral
     description: str
+    # Change in credit score (0-100 points) attributed to this feature for this applicant
+    contribution: Optional[float] = None
 
 class CreditCheckResponse(BaseModel):
     request_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -113,24 +115,107 @@ class CreditCheckResponse(BaseModel):
     recommendations: List[str] = []
     rules_applied: List[str] = []
     valid_for_hours: int = 24
+    # False when an auto_reject rule decided before the model ran; credit_score is then 0
+    scored: bool = True
+
+class StoredClientProfile(BaseModel):
+    client_id: str
+    ttl_seconds: float
+    # Client-only derived features, reused by every loan-only check for this client
+    client_features: Dict[str, Any]
+
+class LoanOfferRequest(BaseModel):
+    # The client profile, or the id of one stored with PUT /clients/{client_id}
+    client: Optional[ClientProfile] = None
+    client_id: Optional[str] = Field(None, max_length=128)
+    loan_purpose: LoanPurpose
+    has_guarantor: bool
+    has_collateral: bool
+    # Tenures to consider; defaults to 3, 6, 9, 12, 18, 24, 36, 48 and 60 months
+    tenures: Optional[List[int]] = Field(None, min_length=1, max_length=58)
+    min_amount: float = Field(500, ge=500, le=500000)
+    max_amount: float = Field(500000, ge=500, le=500000)
+    # Offered amounts are multiples of this, and the search stops at this resolution
+    amount_step: float = Field(100, ge=1)
+
+    @field_validator('tenures')
+    def validate_tenures(cls, v):
+        if v is not None and any(t < 3 or t > 60 for t in v):
+            raise ValueError('tenures must be between 3 and 60 months')
+        return sorted(set(v)) if v is not None else v
+
+class LoanOffer(BaseModel):
+    loan_tenure_months: int
+    # Largest approvable amount at this tenure; None when even min_amount is not approvable
+    max_amount: Optional[float] = None
+    monthly_payment: Optional[float] = None
+    credit_score: Optional[float] = None
+
+class LoanOfferResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    best: Optional[LoanOffer] = None
+    offers: List[LoanOffer]
+    # Grid points and bisection steps scored
+    evaluations: int
+    model_version: Optional[str] = None
+    rules_version: Optional[str] = None
+
+class AuditRecord(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    request_id: str
+    created_at: datetime
+    model_version: Optional[str] = None
+    rules_version: Optional[str] = None
+    inputs: Dict[str, Any]
+    engineered_features: Dict[str, Any]
+    response: CreditCheckResponse
+
+class BatchCreditCheckRequest(BaseModel):
+    # Items are validated one by one so each invalid item gets its own error
+    requests: List[Dict[str, Any]] = Field(..., min_length=1)
+
+class BatchItemResult(BaseModel):
+    index: int
+    response: Optional[CreditCheckResponse] = None
+    error: Optional[str] = None
+
+class BatchCreditCheckResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
 
 class HealthResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
     status: str
     is_model_loaded: bool
     version: str = "1.0.0"
+    model_version: Optional[str] = None
+    # Ready once the model is loaded and a warm-up request has run
+    ready: bool = False
+    startup_timings_ms: Dict[str, float] = {}
 
 class RulesConfig(BaseModel):
     version: str
     rules: Dict[str, List[Dict[str, Any]]]
     thresholds: Dict[str, float]
 
+class ModelReloadResponse(BaseModel):
+    message: str
+    version: str
+    previous_version: Optional[str] = None
+    training_date: Optional[str] = None
+
 class ModelFactor(BaseModel):
     factor: str
     importance: float
 
 class ModelInfo(BaseModel):
     name: str = "Random Forest Classifier"
-    version: str
+    version: Optional[str]
     training_date: Optional[str]
     metrics: Dict[str, float]
     top_factors: List[ModelFactor]
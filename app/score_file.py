@@ -0,0 +1,239 @@
+"""
+Offline bulk scoring of a loan book.
+
+    python -m app.score_file data/portfolio.csv decisions.csv --workers 4
+
+Reads CSV or Parquet in bounded chunks, runs every row through the same request
+validation, feature engineering, model and rule engine as POST /api/v1/credit/check,
+and streams the decisions to a CSV or JSON Lines file.
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from app.config import settings
+from app.schemas.credit import CreditCheckRequest
+
+DEFAULT_CHUNK_SIZE = 10000
+
+CSV_COLUMNS = [
+    'index', 'client_id', 'decision', 'credit_score', 'confidence', 'risk_level',
+    'monthly_payment_estimate', 'debt_to_income_ratio', 'rules_applied', 'recommendations', 'error'
+]
+
+# Set per process by _init_worker
+_decision_service = None
+
+def _init_worker(model_path: str, rules_path: str):
+    global _decision_service
+    from app.services.model_service import model_service
+    from app.services.rule_engine import RuleEngine
+    from app.services.decision_service import DecisionService
+
+    if not model_service.model_loaded or model_service.active.path != model_path:
+        model_service.reload_model(model_path)
+    # Same engine options as the API's rule engine in app/routers/credit.py
+    rule_engine = RuleEngine(rules_path, profiling=settings.RULES_PROFILING,
+                             adaptive_order=settings.RULES_ADAPTIVE_ORDER)
+    _decision_service = DecisionService(model_service, rule_engine)
+
+def _clean(value: Any) -> Any:
+    # Empty cells arrive as NaN; treat them as missing so validation reports them
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+def _parse_row(row: Dict[str, Any]) -> CreditCheckRequest:
+    # Client and loan models ignore each other's fields, so the flat row validates as both
+    return CreditCheckRequest.model_validate({"client": row, "loan": row})
+
+def _format_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors())
+
+def score_records(rows: List[Dict[str, Any]], start_index: int = 0) -> List[Dict[str, Any]]:
+    """
+    Scores a chunk of flat input rows. Each result carries the row index, the row's client_id
+    (if any) and either the CreditCheckResponse or a validation error.
+    """
+    from app.services.decision_service import build_input_data
+
+    results = []
+    valid = []
+    for offset, raw in enumerate(rows):
+        row = {k: _clean(v) for k, v in raw.items()}
+        result = {"index": start_index + offset, "client_id": row.get('client_id'), "response": None, "error": None}
+        results.append(result)
+        try:
+            valid.append((result, build_input_data(_parse_row(row))))
+        except ValidationError as e:
+            result["error"] = _format_error(e)
+
+    if settings.STAGED_DECISIONS:
+        _score_staged(valid)
+        return results
+
+    predictions = _decision_service.model_service.predict_batch([input_data for _, input_data in valid])
+    for (result, _), prediction in zip(valid, predictions):
+        result["response"] = _decision_service.decide(
+            prediction["score"], prediction["engineered_features"], prediction["contributions"]
+        )
+    return results
+
+def _score_staged(valid: List[Tuple[Dict[str, Any], Dict[str, Any]]]):
+    # Same stages as the API's staged path: hard rejects never reach the model
+    from app.utils.preprocessing import derive_features_record
+
+    ruleset = _decision_service.rule_engine.active
+    pending = []
+    for result, input_data in valid:
+        features = derive_features_record(input_data)
+        result["response"] = _decision_service.prescreen(features, ruleset)
+        if result["response"] is None:
+            pending.append((result, features))
+
+    predictions = _decision_service.model_service.predict_engineered([features for _, features in pending])
+    for (result, _), prediction in zip(pending, predictions):
+        result["response"] = _decision_service.decide(
+            prediction["score"], prediction["engineered_features"], prediction["contributions"], prescreened=True,
+            ruleset=ruleset
+        )
+
+def format_csv(results: List[Dict[str, Any]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for result in results:
+        response = result["response"]
+        if response is None:
+            writer.writerow([result["index"], result["client_id"]] + [''] * 8 + [result["error"]])
+            continue
+        writer.writerow([
+            result["index"], result["client_id"], response.decision.value, response.credit_score,
+            response.confidence.value, response.risk_level.value, response.monthly_payment_estimate,
+            response.debt_to_income_ratio, '|'.join(response.rules_applied), '|'.join(response.recommendations), ''
+        ])
+    return buffer.getvalue()
+
+def format_jsonl(results: List[Dict[str, Any]]) -> str:
+    lines = []
+    for result in results:
+        response = result["response"]
+        lines.append(json.dumps({
+            "index": result["index"],
+            "client_id": result["client_id"],
+            "response": response.model_dump(mode="json") if response is not None else None,
+            "error": result["error"]
+        }))
+    return "".join(line + "\n" for line in lines)
+
+def _score_chunk(rows: List[Dict[str, Any]], start_index: int, output_format: str) -> Tuple[str, Dict[str, int]]:
+    # Scoring and formatting both happen in the worker; the parent only writes
+    results = score_records(rows, start_index)
+    counts: Dict[str, int] = {}
+    for result in results:
+        key = result["response"].decision.value if result["response"] is not None else "error"
+        counts[key] = counts.get(key, 0) + 1
+    text = format_jsonl(results) if output_format == "jsonl" else format_csv(results)
+    return text, counts
+
+def read_chunks(input_path: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yields the input file as lists of row dicts, chunk_size rows at a time."""
+    if input_path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet input requires pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+        return
+
+    import pandas as pd
+    # round_trip parsing gives the exact floats a JSON client would have sent
+    for chunk in pd.read_csv(input_path, chunksize=chunk_size, float_precision='round_trip'):
+        yield chunk.to_dict(orient='records')
+
+def _ordered_map(fn, jobs: Iterator[tuple], workers: int, initargs: tuple) -> Iterator:
+    """
+    Applies fn to each job in order, optionally across processes. At most 2 * workers
+    chunks are in flight, so memory stays bounded regardless of the input size.
+    """
+    if workers <= 1:
+        _init_worker(*initargs)
+        for job in jobs:
+            yield fn(*job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+        window = []
+        for job in jobs:
+            window.append(executor.submit(fn, *job))
+            if len(window) >= 2 * workers:
+                yield window.pop(0).result()
+        for future in window:
+            yield future.result()
+
+def score_file(input_path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1,
+               model_path: Optional[str] = None, rules_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Scores every row of input_path and writes one decision per row to output_path
+    (.jsonl for full responses, otherwise CSV). Returns row counts and throughput.
+    """
+    model_path = model_path or settings.MODEL_PATH
+    rules_path = rules_path or settings.RULES_CONFIG_PATH
+    if not os.path.exists(model_path):
+        raise SystemExit(f"Model file not found at {model_path}")
+    output_format = "jsonl" if output_path.endswith(('.jsonl', '.ndjson')) else "csv"
+
+    def jobs():
+        start_index = 0
+        for rows in read_chunks(input_path, chunk_size):
+            yield rows, start_index, output_format
+            start_index += len(rows)
+
+    start = time.perf_counter()
+    counts: Dict[str, int] = {}
+    rows = 0
+    with open(output_path, 'w', newline='') as out:
+        if output_format == "csv":
+            out.write(','.join(CSV_COLUMNS) + '\n')
+        for text, chunk_counts in _ordered_map(_score_chunk, jobs(), workers, (model_path, rules_path)):
+            out.write(text)
+            for key, value in chunk_counts.items():
+                counts[key] = counts.get(key, 0) + value
+                rows += value
+            elapsed = time.perf_counter() - start
+            print(f"Scored {rows} rows ({rows / elapsed:,.0f} rows/sec)", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "rows": rows,
+        "errors": counts.pop("error", 0),
+        "decisions": counts,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else 0.0
+    }
+    print(f"Wrote {rows} decisions to {output_path} in {elapsed:.2f}s ({summary['rows_per_second']:,.0f} rows/sec)")
+    print(f"Decisions: {summary['decisions']}, invalid rows: {summary['errors']}")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of credit applications offline")
+    parser.add_argument("input", help="Input .csv or .parquet file with one application per row")
+    parser.add_argument("output", help="Output file (.jsonl for full responses, otherwise CSV)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows read and scored per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Processes scoring chunks in parallel")
+    parser.add_argument("--model", default=None, help="Model artifact path (default: MODEL_PATH)")
+    parser.add_argument("--rules", default=None, help="Rules config path (default: RULES_CONFIG_PATH)")
+    args = parser.parse_args()
+
+    score_file(args.input, args.output, chunk_size=args.chunk_size, workers=args.workers,
+               model_path=args.model, rules_path=args.rules)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import glob
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from app.schemas.credit import CreditCheckResponse
+
+SEGMENT_PATTERN = re.compile(r"decisions-(\d{6})\.db$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    request_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    decision TEXT NOT NULL,
+    model_version TEXT,
+    rules_version TEXT,
+    inputs TEXT NOT NULL,
+    engineered_features TEXT NOT NULL,
+    response TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+# (response, inputs, engineered features, model version, rules version)
+Entry = Tuple[CreditCheckResponse, Dict[str, Any], Dict[str, Any], Optional[str], Optional[str]]
+
+_STOP = object()
+
+def _json_default(value: Any) -> Any:
+    # Engineered features can hold numpy scalars
+    return value.item() if hasattr(value, "item") else str(value)
+
+def _to_row(entry: Entry) -> tuple:
+    response, inputs, features, model_version, rules_version = entry
+    return (
+        response.request_id, response.timestamp.isoformat(), response.decision.value, model_version, rules_version,
+        json.dumps(inputs, default=_json_default), json.dumps(features, default=_json_default),
+        response.model_dump_json()
+    )
+
+def _to_record(row: tuple) -> Dict[str, Any]:
+    request_id, created_at, _, model_version, rules_version, inputs, features, response = row
+    return {
+        "request_id": request_id,
+        "created_at": created_at,
+        "model_version": model_version,
+        "rules_version": rules_version,
+        "inputs": json.loads(inputs),
+        "engineered_features": json.loads(features),
+        "response": json.loads(response)
+    }
+
+class AuditLog:
+    """
+    Persists every decision with its inputs, engineered features, model and rules version.
+
+    record() only appends to an in-memory queue; a background thread drains it and writes
+    everything that accumulated in one transaction (group commit) to SQLite in WAL mode.
+    Files are rotated into numbered segments once they reach max_segment_bytes, and only
+    the newest `segments_kept` are retained. Workers of one deployment can share a directory.
+    """
+    def __init__(self, directory: str, enabled: bool = True, max_queue: int = 100000, batch_size: int = 500,
+                 max_segment_bytes: int = 256 * 1024 * 1024, segments_kept: int = 8):
+        self.directory = directory
+        self.enabled = enabled
+        self.batch_size = max(1, batch_size)
+        self.max_segment_bytes = max_segment_bytes
+        self.segments_kept = max(1, segments_kept)
+        self.written = 0
+        self.dropped = 0
+        self.commits = 0
+        self.errors = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        # Queued but not yet committed, so lookups can see a decision immediately
+        self._pending: Dict[str, Entry] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._segment = 0
+
+    def record(self, response: CreditCheckResponse, inputs: Dict[str, Any], features: Dict[str, Any],
+               model_version: Optional[str], rules_version: Optional[str]):
+        """Queues a decision for the writer. Never touches the disk and never blocks."""
+        # Without a running writer nothing would ever drain the queue or the pending map
+        if not self.enabled or self._thread is None:
+            return
+        entry = (response, inputs, features, model_version, rules_version)
+        with self._lock:
+            self._pending[response.request_id] = entry
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(response.request_id, None)
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                print(f"Audit queue full, {self.dropped} decisions dropped so far")
+
+    def start(self):
+        if self.enabled and self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Writes everything still queued, then stops the writer."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            # Decisions recorded from here on are not queued behind the stop marker
+            self._queue.put(_STOP)
+            thread.join()
+
+    def segments(self) -> List[Tuple[int, str]]:
+        """(number, path) of every segment on disk, oldest first."""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, "decisions-*.db")):
+            match = SEGMENT_PATTERN.search(path)
+            if match:
+                found.append((int(match.group(1)), path))
+        return sorted(found)
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Looks a decision up by request_id, newest segment first. Runs on the caller's thread."""
+        with self._lock:
+            entry = self._pending.get(request_id)
+        if entry is not None:
+            return _to_record(_to_row(entry))
+
+        for _, path in reversed(self.segments()):
+            try:
+                conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=5)
+                try:
+                    row = conn.execute("SELECT * FROM decisions WHERE request_id = ?", (request_id,)).fetchone()
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                continue  # segment pruned or not initialised yet
+            if row is not None:
+                return _to_record(row)
+        return None
+
+    def collect_metrics(self):
+        """Metric families for the /metrics registry."""
+        families = [
+            ("audit_records_written_total", "counter", "Decisions committed to the audit log", self.written),
+            ("audit_records_dropped_total", "counter", "Decisions dropped because the audit queue was full",
+             self.dropped),
+            ("audit_commits_total", "counter", "Audit log transactions", self.commits),
+            ("audit_write_errors_total", "counter", "Audit log transactions that failed", self.errors),
+            ("audit_queue_depth", "gauge", "Decisions waiting to be written", self._queue.qsize()),
+        ]
+        return [(name, kind, doc, [(name, {}, value)]) for name, kind, doc, value in families]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "written": self.written,
+            "dropped": self.dropped,
+            "commits": self.commits,
+            "errors": self.errors,
+            "queue_depth": self._queue.qsize(),
+            "segment": self._segment
+        }
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"decisions-{number:06d}.db")
+
+    def _connect(self, number: int) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._segment_path(number), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL with synchronous=NORMAL syncs at checkpoints, not on every commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(SCHEMA)
+        self._segment = number
+        return conn
+
+    def _rotate(self, conn: sqlite3.Connection) -> sqlite3.Connection:
+        """Moves to the newest segment, starting a new one once the current segment is full."""
+        segments = self.segments()
+        latest = segments[-1][0] if segments else self._segment
+        if latest > self._segment:
+            # Another worker already rotated
+            target = latest
+        elif os.path.getsize(self._segment_path(self._segment)) >= self.max_segment_bytes:
+            target = latest + 1
+        else:
+            return conn
+
+        conn.close()
+        conn = self._connect(target)
+        for number, path in segments:
+            if number <= target - self.segments_kept:
+                for suffix in ("", "-wal", "-shm"):
+                    try:
+                        os.remove(path + suffix)
+                    except FileNotFoundError:
+                        pass
+        print(f"Audit log rotated to {self._segment_path(target)}")
+        return conn
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Entry]):
+        try:
+            rows = [_to_row(entry) for entry in batch]
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR IGNORE INTO decisions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+            self.written += len(batch)
+            self.commits += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Audit log write of {len(batch)} decisions failed: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+        finally:
+            with self._lock:
+                for entry in batch:
+                    self._pending.pop(entry[0].request_id, None)
+
+    def _run(self):
+        segments = self.segments()
+        conn = self._connect(segments[-1][0] if segments else 1)
+        stopping = False
+        while not stopping:
+            # 1. Block for the first decision, then take whatever else queued up meanwhile
+            batch = []
+            item = self._queue.get()
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            # 2. One transaction for the whole batch
+            if batch:
+                self._write(conn, batch)
+                try:
+                    conn = self._rotate(conn)
+                except Exception as e:
+                    print(f"Audit log rotation failed: {e}")
+        conn.close()
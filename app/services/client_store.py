@@ -0,0 +1,60 @@
+import json
+from typing import Any, Dict, Optional
+from app.schemas.credit import ClientProfile
+from app.utils.preprocessing import derive_client_features
+from app.utils.ttl_cache import TTLCache
+
+# Rough per-entry bookkeeping cost (three dicts, key, OrderedDict node) on top of the payload
+ENTRY_OVERHEAD_BYTES = 2048
+
+class StoredProfile:
+    """A validated client profile with its client-only derived features, computed once at store time."""
+    __slots__ = ("client_id", "record", "payload", "client_features")
+
+    def __init__(self, client_id: str, profile: ClientProfile):
+        self.client_id = client_id
+        # Same shapes as build_input_data and request_fingerprint use for a full request
+        self.record = profile.model_dump()
+        self.payload = profile.model_dump(mode="json")
+        self.client_features = derive_client_features(self.record)
+
+class ClientProfileStore:
+    """
+    Bounded, expiring store of client profiles keyed by a caller-supplied client id, so repeat
+    checks for the same client only send the loan. Each worker keeps its own store.
+    """
+    def __init__(self, max_bytes: int, ttl_seconds: float, enabled: bool = True):
+        self.enabled = enabled
+        self.cache = TTLCache(max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+
+    def put(self, client_id: str, profile: ClientProfile) -> StoredProfile:
+        stored = StoredProfile(client_id, profile)
+        size = len(json.dumps(stored.payload)) * 2 + len(client_id) + ENTRY_OVERHEAD_BYTES
+        self.cache.set(client_id, stored, size)
+        return stored
+
+    def get(self, client_id: str) -> Optional[StoredProfile]:
+        return self.cache.get(client_id)
+
+    def delete(self, client_id: str) -> bool:
+        return self.cache.pop(client_id) is not None
+
+    def collect_metrics(self):
+        """Metric families for the /metrics registry."""
+        stats = self.cache.stats()
+        families = [
+            ("client_store_hits_total", "counter", "Loan-only checks that found their client profile", stats["hits"]),
+            ("client_store_misses_total", "counter", "Loan-only checks whose client profile was missing or expired",
+             stats["misses"]),
+            ("client_store_evictions_total", "counter", "Client profiles evicted over the memory budget",
+             stats["evictions"]),
+            ("client_store_profiles", "gauge", "Client profiles stored", stats["entries"]),
+            ("client_store_bytes", "gauge", "Approximate client profile store memory use", stats["bytes"]),
+        ]
+        return [(name, kind, doc, [(name, {}, value)]) for name, kind, doc, value in families]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.cache.stats()
+        stats["enabled"] = self.enabled
+        stats["ttl_seconds"] = self.cache.ttl_seconds
+        return stats
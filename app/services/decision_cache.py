@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.schemas.credit import CreditCheckRequest, CreditCheckResponse
+from app.utils.ttl_cache import TTLCache
+
+# Rough per-entry bookkeeping cost (key, tuple, OrderedDict node) on top of the payload
+ENTRY_OVERHEAD_BYTES = 512
+
+def request_fingerprint(request: CreditCheckRequest) -> str:
+    """
+    Canonical hash of the client and loan payload. Field order, whitespace and
+    int/float spelling in the original JSON do not change the fingerprint.
+    """
+    return payload_fingerprint(request.model_dump(mode="json"))
+
+def payload_fingerprint(payload: Dict[str, Any]) -> str:
+    """Fingerprint of an already validated {"client": ..., "loan": ...} payload, e.g. from a columnar body."""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class DecisionCache:
+    """
+    Caches credit decisions by request fingerprint and coalesces concurrent identical
+    requests into one computation. invalidate() drops everything; it is registered as a
+    reload listener on the rule engine and the model service, so it runs on other threads;
+    the generation and in-flight map are guarded by a lock that is never held across an await.
+    """
+    def __init__(self, max_bytes: int, ttl_seconds: float, enabled: bool = True):
+        self.enabled = enabled
+        self.cache = TTLCache(max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+        self.coalesced = 0
+        self.invalidations = 0
+        self.generation = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CreditCheckResponse]:
+        if not self.enabled:
+            return None
+        return self.cache.get(key)
+
+    def put(self, key: str, response: CreditCheckResponse, generation: Optional[int] = None):
+        # Results computed before an invalidation must not repopulate the cache
+        if not self.enabled:
+            return
+        size = len(response.model_dump_json()) + len(key) + ENTRY_OVERHEAD_BYTES
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.cache.set(key, response, size)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[CreditCheckResponse]]) -> CreditCheckResponse:
+        if not self.enabled:
+            return await compute()
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+                generation = self.generation
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        try:
+            response = await compute()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+        self.put(key, response, generation)
+        future.set_result(response)
+        return response
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self.cache.clear()
+            self._inflight.clear()
+
+    def collect_metrics(self):
+        """Metric families for the /metrics registry."""
+        stats = self.cache.stats()
+        families = [
+            ("decision_cache_hits_total", "counter", "Decision cache hits", stats["hits"]),
+            ("decision_cache_misses_total", "counter", "Decision cache misses", stats["misses"]),
+            ("decision_cache_evictions_total", "counter", "Decision cache evictions", stats["evictions"]),
+            ("decision_cache_coalesced_total", "counter", "Requests that joined an identical in-flight check", self.coalesced),
+            ("decision_cache_bytes", "gauge", "Approximate decision cache memory use", stats["bytes"]),
+        ]
+        return [(name, kind, doc, [(name, {}, value)]) for name, kind, doc, value in families]
+
+    def stats(self) -> Dict[str, int]:
+        stats = self.cache.stats()
+        stats.update({
+            "enabled": self.enabled,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations
+        })
+        return stats
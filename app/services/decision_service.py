@@ -0,0 +1,185 @@
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+from app.schemas.credit import CreditCheckRequest, CreditCheckResponse, CreditFactor, Decision, Confidence, RiskLevel
+from app.utils.metrics import STAGE_LATENCY, DECISIONS, RULE_HITS, INFERENCE_SKIPPED
+
+RULES_STAGE = STAGE_LATENCY.labels("rules")
+RESPONSE_STAGE = STAGE_LATENCY.labels("response")
+RULE_CATEGORIES = ("auto_reject", "auto_approve", "require_guarantor", "require_collateral")
+# Number of applicant-specific reasons returned with each decision
+MAX_FACTORS = 3
+
+def get_risk_level(score: float) -> RiskLevel:
+    if score >= 0.8: return RiskLevel.low
+    if score >= 0.6: return RiskLevel.medium
+    if score >= 0.4: return RiskLevel.high
+    return RiskLevel.very_high
+
+def format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+def build_input_data(request: CreditCheckRequest) -> Dict[str, Any]:
+    """
+    Flattens a credit check request into the record shape expected by the model.
+    """
+    input_data = request.client.model_dump()
+    input_data.update(request.loan.model_dump())
+
+    # Add client_id if missing (for processing)
+    if 'client_id' not in input_data:
+        input_data['client_id'] = str(uuid.uuid4())
+    return input_data
+
+class DecisionService:
+    """
+    Combines the ML score with the rule engine into a final credit decision.
+    """
+    def __init__(self, model_service, rule_engine):
+        self.model_service = model_service
+        self.rule_engine = rule_engine
+
+    def prescreen(self, features: Dict[str, Any], ruleset=None) -> Optional[CreditCheckResponse]:
+        """
+        First stage of a staged decision: runs only the auto_reject rules on the engineered features.
+        Returns the rejection when one fires, since no model score can change it; None means the
+        decision needs the model (call decide with prescreened=True and the same ruleset).
+        """
+        start = time.perf_counter()
+        rule_results = self.rule_engine.check_auto_reject(features, ruleset or self.rule_engine.active)
+        rules_done = time.perf_counter()
+        RULES_STAGE.observe(rules_done - start)
+        if not rule_results["auto_reject"]:
+            return None
+
+        response = CreditCheckResponse(
+            decision=Decision.rejected,
+            credit_score=0.0,
+            confidence=Confidence.high,
+            risk_level=RiskLevel.very_high,
+            monthly_payment_estimate=round(features.get("estimated_monthly_payment", 0), 2),
+            debt_to_income_ratio=round(features.get("debt_to_income_ratio", 0), 4),
+            recommendations=rule_results["recommendations"],
+            rules_applied=[r["name"] for r in rule_results["auto_reject"]],
+            scored=False
+        )
+        INFERENCE_SKIPPED.inc()
+        self._record_metrics(response, rule_results)
+        RESPONSE_STAGE.observe(time.perf_counter() - rules_done)
+        return response
+
+    def decide(self, ml_score: float, features: Dict[str, Any],
+               contributions: Optional[Dict[str, float]] = None, prescreened: bool = False,
+               ruleset=None) -> CreditCheckResponse:
+        start = time.perf_counter()
+
+        # 1. Run rule engine against one snapshot, so a concurrent reload cannot mix two rule versions.
+        # A prescreened decision must pass the snapshot its prescreen used
+        ruleset = ruleset or self.rule_engine.active
+        rule_results = self.rule_engine.check_rules(features, ruleset, skip_auto_reject=prescreened)
+        thresholds = self.rule_engine.get_thresholds(ruleset)
+        rules_done = time.perf_counter()
+        RULES_STAGE.observe(rules_done - start)
+
+        # 2. Determine decision
+        decision = Decision.manual_review
+        recommendations = rule_results["recommendations"]
+        flags = rule_results["flags"]
+        rules_applied = [r["name"] for r in rule_results["auto_reject"] + rule_results["auto_approve"]]
+
+        if rule_results["auto_reject"]:
+            decision = Decision.rejected
+        elif rule_results["auto_approve"]:
+            decision = Decision.approved
+        else:
+            # Use ML threshold
+            min_score = thresholds.get("min_credit_score", 0.5)
+            if ml_score >= min_score:
+                decision = Decision.approved
+            else:
+                decision = Decision.rejected
+
+        # Confidence
+        confidence = Confidence.medium
+        if ml_score >= thresholds.get("high_confidence_threshold", 0.8) or ml_score <= thresholds.get("low_confidence_threshold", 0.3):
+            confidence = Confidence.high
+
+        # Risk Level
+        risk_level = get_risk_level(ml_score)
+
+        # 3. Format response
+        response = CreditCheckResponse(
+            decision=decision,
+            credit_score=round(ml_score * 100, 2),
+            confidence=confidence,
+            risk_level=risk_level,
+            monthly_payment_estimate=round(features.get("estimated_monthly_payment", 0), 2),
+            debt_to_income_ratio=round(features.get("debt_to_income_ratio", 0), 4),
+            factors=self.get_factors(features, contributions),
+            recommendations=recommendations + flags,
+            rules_applied=rules_applied
+        )
+
+        self._record_metrics(response, rule_results)
+        RESPONSE_STAGE.observe(time.perf_counter() - rules_done)
+        return response
+
+    def approves(self, ml_score: float, features: Dict[str, Any], ruleset=None) -> bool:
+        """
+        Whether decide() would approve, without building a response or recording metrics and rule
+        statistics. For evaluating hypothetical loans rather than real applications.
+        """
+        ruleset = ruleset or self.rule_engine.active
+        if self.rule_engine.matches_any(features, "auto_reject", ruleset):
+            return False
+        if self.rule_engine.matches_any(features, "auto_approve", ruleset):
+            return True
+        return ml_score >= self.rule_engine.get_thresholds(ruleset).get("min_credit_score", 0.5)
+
+    @staticmethod
+    def _record_metrics(response: CreditCheckResponse, rule_results: Dict[str, Any]):
+        DECISIONS.labels(response.decision.value).inc()
+        for category in RULE_CATEGORIES:
+            for rule in rule_results[category]:
+                RULE_HITS.labels(category, rule["name"]).inc()
+
+    def get_factors(self, features: Dict[str, Any],
+                    contributions: Optional[Dict[str, float]] = None) -> List[CreditFactor]:
+        """
+        Applicant-specific reasons: the features whose decision-path contributions moved this
+        applicant's score the most. Falls back to global feature importance without contributions.
+        """
+        if contributions is None:
+            return self.get_global_factors(features)
+
+        factors = []
+        for factor_name, contribution in sorted(contributions.items(), key=lambda x: abs(x[1]), reverse=True)[:MAX_FACTORS]:
+            points = round(contribution * 100, 2)
+            factors.append(CreditFactor(
+                factor=factor_name,
+                impact="positive" if contribution > 0 else "negative" if contribution < 0 else "neutral",
+                description=f"{factor_name} = {format_value(features.get(factor_name))} "
+                            f"{'raised' if contribution >= 0 else 'lowered'} the credit score by {abs(points)} points",
+                contribution=points
+            ))
+        return factors
+
+    def get_global_factors(self, features: Dict[str, Any]) -> List[CreditFactor]:
+        # Create some factors for explainability (demo)
+        factors = []
+        top_importance = self.model_service.get_top_factors(MAX_FACTORS)
+        for imp in top_importance:
+            factor_name = imp["factor"]
+            # Simple logic for impact direction (demo)
+            impact = "positive"
+            if "ratio" in factor_name or "debt" in factor_name:
+                impact = "negative" if features.get(factor_name, 0) > 0.5 else "positive"
+
+            factors.append(CreditFactor(
+                factor=factor_name,
+                impact=impact,
+                description=f"Based on historical data for {factor_name}"
+            ))
+        return factors
@@ -0,0 +1,96 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+class InferenceScheduler:
+    """
+    Collects concurrent single predictions for up to max_wait_ms (or max_batch_size items)
+    and runs them as one batched prediction in a worker thread, off the event loop. Batches
+    of one go to predict_one when given, so a lone request skips the batch path's DataFrame.
+    """
+    def __init__(self, predict_batch: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+                 max_batch_size: int = 32, max_wait_ms: float = 2.0, max_workers: int = 1,
+                 executor: Optional[ThreadPoolExecutor] = None,
+                 predict_one: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        self.predict_batch = predict_batch
+        self.predict_one = predict_one
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        # Schedulers for different kinds of input can share one pool, so together they stay within max_workers
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer = None
+        self._loop = None
+
+    async def predict(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures are bound to a loop; start fresh if we are now running on a new one
+            self._loop, self._pending, self._timer = loop, [], None
+
+        future = loop.create_future()
+        self._pending.append((input_data, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    async def predict_many(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Runs an already-formed batch in the inference executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._predict, records)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = self._loop.run_in_executor(self.executor, self._run, [input_data for input_data, _ in batch])
+        task.add_done_callback(partial(self._resolve, [future for _, future in batch]))
+
+    def _predict(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.predict_one is not None and len(records) == 1:
+            return [self.predict_one(records[0])]
+        return self.predict_batch(records)
+
+    def _run(self, records: List[Dict[str, Any]]) -> List[Any]:
+        try:
+            return self._predict(records)
+        except Exception:
+            # Isolate the failing record(s) so one bad input doesn't fail its neighbours
+            results = []
+            for record in records:
+                try:
+                    results.extend(self._predict([record]))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    @staticmethod
+    def _resolve(futures: List[asyncio.Future], task: asyncio.Future):
+        if task.cancelled():
+            for future in futures:
+                future.cancel()
+            return
+
+        error = task.exception()
+        for i, future in enumerate(futures):
+            if future.done():
+                continue  # caller went away
+            if error is not None:
+                future.set_exception(error)
+            elif isinstance(task.result()[i], Exception):
+                future.set_exception(task.result()[i])
+            else:
+                future.set_result(task.result()[i])
@@ -0,0 +1,93 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+DEFAULT_TENURES = [3, 6, 9, 12, 18, 24, 36, 48, 60]
+
+class LoanOfferOptimizer:
+    """
+    Finds, for one client, the largest approvable amount at each tenure.
+
+    1. Scores a log-spaced grid of amounts x tenures as one batch.
+    2. Brackets each tenure's boundary between its largest approved grid amount and the next
+       one, then bisects all tenures together, one batch per step, down to amount_step.
+    Amounts are whole multiples of amount_step, so every evaluation runs at most
+    grid_points + log2(range / amount_step) batches.
+    """
+    def __init__(self, model_service, decision_service, grid_points: int = 16):
+        self.model_service = model_service
+        self.decision_service = decision_service
+        self.grid_points = max(2, grid_points)
+
+    def _evaluate(self, client: Dict[str, Any], loan: Dict[str, Any], points: List[Tuple[int, float]],
+                  ruleset) -> List[Dict[str, Any]]:
+        """Scores (tenure, amount) points in one batch and applies the rules to each."""
+        records = [dict(client, **loan, loan_tenure_months=tenure, requested_loan_amount=amount)
+                   for tenure, amount in points]
+        probs, df_engineered = self.model_service.score_records(records)
+        results = []
+        for prob, features in zip(probs.tolist(), df_engineered.to_dict(orient='records')):
+            results.append({
+                "approved": self.decision_service.approves(prob, features, ruleset),
+                "credit_score": round(prob * 100, 2),
+                "monthly_payment": round(features["estimated_monthly_payment"], 2)
+            })
+        return results
+
+    def optimize(self, client: Dict[str, Any], loan: Dict[str, Any], tenures: List[int], min_amount: float,
+                 max_amount: float, amount_step: float) -> Dict[str, Any]:
+        # One rules snapshot for the whole search, like a single decision
+        ruleset = self.decision_service.rule_engine.active
+        low_unit = math.ceil(min_amount / amount_step)
+        high_unit = math.floor(max_amount / amount_step)
+        if high_unit < low_unit:
+            raise ValueError(f"No multiple of {amount_step} between {min_amount} and {max_amount}")
+
+        # 1. Coarse grid
+        units = np.unique(np.round(np.geomspace(low_unit, high_unit, self.grid_points)).astype(np.int64)).tolist()
+        points = [(tenure, unit * amount_step) for tenure in tenures for unit in units]
+        grid = self._evaluate(client, loan, points, ruleset)
+        evaluations = len(grid)
+
+        best_found: Dict[int, Optional[Dict[str, Any]]] = {}
+        brackets: Dict[int, List[int]] = {}
+        for i, tenure in enumerate(tenures):
+            row = grid[i * len(units):(i + 1) * len(units)]
+            approved = [k for k, result in enumerate(row) if result["approved"]]
+            if not approved:
+                best_found[tenure] = None
+                continue
+            k = approved[-1]
+            best_found[tenure] = dict(row[k], unit=units[k])
+            if k + 1 < len(units):
+                # Approved at units[k], not at units[k + 1]: the boundary lies in between
+                brackets[tenure] = [units[k], units[k + 1]]
+
+        # 2. Bisect every open bracket at once
+        while brackets:
+            active = [(tenure, (low + high) // 2) for tenure, (low, high) in brackets.items() if high - low > 1]
+            if not active:
+                break
+            results = self._evaluate(client, loan, [(tenure, unit * amount_step) for tenure, unit in active], ruleset)
+            evaluations += len(results)
+            for (tenure, unit), result in zip(active, results):
+                if result["approved"]:
+                    brackets[tenure][0] = unit
+                    best_found[tenure] = dict(result, unit=unit)
+                else:
+                    brackets[tenure][1] = unit
+
+        # 3. Frontier: the largest approvable amount per tenure
+        offers = []
+        for tenure in tenures:
+            found = best_found[tenure]
+            offers.append({
+                "loan_tenure_months": tenure,
+                "max_amount": round(found["unit"] * amount_step, 2) if found else None,
+                "monthly_payment": found["monthly_payment"] if found else None,
+                "credit_score": found["credit_score"] if found else None
+            })
+        approvable = [offer for offer in offers if offer["max_amount"] is not None]
+        # Largest amount; on ties the shorter tenure, which costs less interest
+        best = max(approvable, key=lambda o: (o["max_amount"], -o["loan_tenure_months"])) if approvable else None
+        return {"best": best, "offers": offers, "evaluations": evaluations}
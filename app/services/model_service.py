@@ -1,76 +1,350 @@
-import joblib
+import hashlib
 import json
 import os
+import threading
+import time
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Optional
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from app.config import settings
-from app.utils.preprocessing import create_derived_features
+from app.utils.preprocessing import create_derived_features_fast, derive_features_record
+from app.services.tree_engine import ForestEngine, UnsupportedModelError, META_FILE, COMPACT_SUFFIX
+from app.utils.metrics import STAGE_LATENCY, INFERENCE_BATCH_SIZE
+
+FEATURE_STAGE = STAGE_LATENCY.labels("feature_engineering")
+INFERENCE_STAGE = STAGE_LATENCY.labels("model_inference")
+
+# Representative applicant used to warm up a freshly loaded model before it takes traffic
+WARMUP_RECORD = {
+    'age': 35, 'gender': 'M', 'marital_status': 'married', 'number_of_dependents': 2,
+    'education_level': 'tertiary', 'employment_type': 'formal', 'employment_sector': 'private',
+    'years_at_current_job': 10.0, 'monthly_income': 10000.0, 'has_other_income': False,
+    'other_income_amount': 0.0, 'total_savings': 50000.0, 'savings_account_age_months': 48,
+    'average_monthly_deposit': 2000.0, 'num_previous_loans': 2, 'previous_loans_repaid_on_time': 2,
+    'has_existing_loan': False, 'existing_loan_balance': 0.0, 'existing_loan_monthly_payment': 0.0,
+    'requested_loan_amount': 5000.0, 'loan_purpose': 'business', 'loan_tenure_months': 12,
+    'has_guarantor': True, 'has_collateral': False
+}
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ModelArtifacts:
+    """
+    One loaded artifact set (model, metrics, feature importance). It is never mutated
+    after loading, so requests that picked it up keep using it across a hot swap.
+    """
+    def __init__(self, model, engine: Optional[ForestEngine], metrics: Dict[str, float],
+                 feature_importance: Dict[str, float], version: str, training_date: Optional[str], path: str,
+                 explainer: Optional[ForestEngine] = None):
+        self.model = model
+        self.engine = engine
+        # Per-prediction feature contributions; the serving engine doubles as explainer when present
+        self.explainer = explainer
+        self.metrics = metrics
+        self.feature_importance = feature_importance
+        self.version = version
+        self.training_date = training_date
+        self.path = path
+        self.loaded_at = datetime.now().isoformat()
 
 class ModelService:
     def __init__(self):
-        self.model = None
-        self.metrics = {}
-        self.feature_importance = {}
-        self.model_loaded = False
-        self.load_model()
+        self.active: Optional[ModelArtifacts] = None
+        self.reload_listeners: List[Callable[[], None]] = []
+        self._reload_lock = threading.Lock()
+        # Seconds spent loading and warming up the last artifact set
+        self.load_timings: Dict[str, float] = {}
+
+    @property
+    def model_loaded(self) -> bool:
+        return self.active is not None
+
+    @property
+    def model(self):
+        return self.active.model if self.active else None
+
+    @property
+    def engine(self) -> Optional[ForestEngine]:
+        return self.active.engine if self.active else None
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        return self.active.metrics if self.active else {}
+
+    @property
+    def feature_importance(self) -> Dict[str, float]:
+        return self.active.feature_importance if self.active else {}
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.active.version if self.active else None
 
     def load_model(self):
         try:
-            if os.path.exists(settings.MODEL_PATH):
-                self.model = joblib.load(settings.MODEL_PATH)
-                self.model_loaded = True
-                print(f"Model loaded from {settings.MODEL_PATH}")
+            artifact_path = (
+                os.path.join(settings.NATIVE_MODEL_DIR, META_FILE) if settings.MODEL_MMAP else settings.MODEL_PATH
+            )
+            if os.path.exists(artifact_path):
+                self.reload_model(settings.MODEL_PATH)
             else:
-                print(f"Warning: Model file not found at {settings.MODEL_PATH}")
-
-            metrics_path = os.path.join(os.path.dirname(settings.MODEL_PATH), 'model_metrics.json')
-            if os.path.exists(metrics_path):
-                with open(metrics_path, 'r') as f:
-                    self.metrics = json.load(f)
-
-            importance_path = os.path.join(os.path.dirname(settings.MODEL_PATH), 'feature_importance.json')
-            if os.path.exists(importance_path):
-                with open(importance_path, 'r') as f:
-                    self.feature_importance = json.load(f)
+                print(f"Warning: Model file not found at {artifact_path}")
         except Exception as e:
             print(f"Error loading model artifacts: {e}")
 
+    def reload_model(self, model_path: Optional[str] = None) -> ModelArtifacts:
+        """
+        Loads a new artifact set, warms it up and atomically makes it the active model.
+        Requests already in progress finish on the previous artifacts. On any failure the
+        current model stays active and the error is raised.
+        """
+        model_path = model_path or settings.MODEL_PATH
+        with self._reload_lock:
+            start = time.perf_counter()
+            artifacts = self.load_artifacts(model_path)
+            loaded = time.perf_counter()
+            self.warm_up(artifacts)
+            self.active = artifacts
+            self.load_timings = {"load": loaded - start, "warm_up": time.perf_counter() - loaded}
+            print(f"Model {artifacts.version} loaded from {model_path} in {time.perf_counter() - start:.2f}s")
+
+        for listener in self.reload_listeners:
+            listener()
+        return artifacts
+
+    def load_artifacts(self, model_path: str) -> ModelArtifacts:
+        model_dir = os.path.dirname(model_path)
+        if settings.MODEL_MMAP:
+            model, engine, version, source_path = self.load_native(model_path)
+        elif model_path.endswith(COMPACT_SUFFIX):
+            # Compact export from ml/train_model.py: no pickle and no sklearn at serving time
+            model, engine = None, ForestEngine.load_compact(model_path)
+            version = file_sha256(model_path)[:12]
+            source_path = model_path
+        else:
+            # joblib (and sklearn, via unpickling) is only imported when serving the pickled pipeline
+            import joblib
+            model = joblib.load(model_path)
+            engine = self.build_engine(model)
+            # The version identifies the exact artifact
+            version = file_sha256(model_path)[:12]
+            source_path = model_path
+
+        metrics = {}
+        metrics_path = os.path.join(model_dir, 'model_metrics.json')
+        if os.path.exists(metrics_path):
+            with open(metrics_path, 'r') as f:
+                metrics = json.load(f)
+
+        feature_importance = {}
+        importance_path = os.path.join(model_dir, 'feature_importance.json')
+        if os.path.exists(importance_path):
+            with open(importance_path, 'r') as f:
+                feature_importance = json.load(f)
+
+        # training_date comes from the training run if recorded
+        training_date = datetime.fromtimestamp(os.path.getmtime(source_path)).isoformat()
+        metadata_path = os.path.join(model_dir, 'model_metadata.json')
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r') as f:
+                training_date = json.load(f).get('training_date', training_date)
+
+        return ModelArtifacts(
+            model=model,
+            engine=engine,
+            explainer=engine or self.build_explainer(model),
+            metrics=metrics,
+            feature_importance=feature_importance,
+            version=version,
+            training_date=training_date,
+            path=model_path
+        )
+
+    def load_native(self, model_path: str):
+        """
+        Maps the native export in NATIVE_MODEL_DIR instead of unpickling the pipeline. The node
+        arrays live in the page cache, so every worker process shares one physical copy.
+        """
+        engine = ForestEngine.load(settings.NATIVE_MODEL_DIR, mmap_mode="r")
+        meta_path = os.path.join(settings.NATIVE_MODEL_DIR, META_FILE)
+        if engine.source_sha256 is None:
+            return None, engine, file_sha256(meta_path)[:12], meta_path
+
+        # Same version as the pickled model it was exported from
+        if os.path.exists(model_path) and file_sha256(model_path) != engine.source_sha256:
+            print(f"Warning: native export in {settings.NATIVE_MODEL_DIR} does not match {model_path}; "
+                  f"re-export it with: python ml/train_model.py --export-native")
+        return None, engine, engine.source_sha256[:12], meta_path
+
+    def warm_up(self, artifacts: ModelArtifacts):
+        """Runs sample single and batch predictions so the first real request pays no warm-up cost."""
+        self._predict_with(artifacts, dict(WARMUP_RECORD))
+        self._predict_batch_with(artifacts, [dict(WARMUP_RECORD), dict(WARMUP_RECORD, requested_loan_amount=50000.0)])
+
+    def add_reload_listener(self, listener: Callable[[], None]):
+        """Registers a callback run after every (re)load of the model artifacts."""
+        self.reload_listeners.append(listener)
+
+    def build_engine(self, model) -> Optional[ForestEngine]:
+        """Exports the pipeline to the native engine when enabled; None means use sklearn."""
+        if settings.INFERENCE_ENGINE != "native":
+            return None
+        try:
+            return ForestEngine.from_pipeline(model)
+        except UnsupportedModelError as e:
+            print(f"Warning: native inference engine unavailable, falling back to sklearn: {e}")
+            return None
+
+    def build_explainer(self, model) -> Optional[ForestEngine]:
+        """Flat-array copy of the forest used only for contributions when serving with sklearn."""
+        try:
+            return ForestEngine.from_pipeline(model)
+        except UnsupportedModelError as e:
+            print(f"Warning: per-decision explanations unavailable: {e}")
+            return None
+
     def predict(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        if not self.model_loaded:
+        artifacts = self.active
+        if artifacts is None:
             raise Exception("Model is not loaded")
+        return self._predict_with(artifacts, input_data)
+
+    def predict_features(self, engineered_features: Dict[str, Any]) -> Dict[str, Any]:
+        """Like predict for one record whose features were already engineered (derive_features_record)."""
+        artifacts = self.active
+        if artifacts is None:
+            raise Exception("Model is not loaded")
+        return self._predict_features_with(artifacts, engineered_features)
+
+    def _predict_with(self, artifacts: ModelArtifacts, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+
+        # Apply feature engineering on the plain dict (no DataFrame round trip)
+        engineered_features = derive_features_record(input_data)
+        FEATURE_STAGE.observe(time.perf_counter() - start)
+        return self._predict_features_with(artifacts, engineered_features)
+
+    def _predict_features_with(self, artifacts: ModelArtifacts, engineered_features: Dict[str, Any]) -> Dict[str, Any]:
+        engineered_at = time.perf_counter()
+
+        # Predict probability and per-feature contributions (one tree walk with the native engine)
+        contributions = None
+        if artifacts.engine is not None:
+            probs, contributions = artifacts.engine.explain(artifacts.engine.transform([engineered_features]))
+            prob = probs[0]
+        else:
+            # We need to ensure we drop the same columns as during training
+            # Usually client_id and credit_worthy (target)
+            X = pd.DataFrame([{k: v for k, v in engineered_features.items() if k != 'client_id'}])
+            prob = artifacts.model.predict_proba(X)[0, 1]
+            if artifacts.explainer is not None:
+                contributions = artifacts.explainer.explain(artifacts.explainer.transform([engineered_features]))[1]
+        INFERENCE_STAGE.observe(time.perf_counter() - engineered_at)
+        INFERENCE_BATCH_SIZE.observe(1)
 
-        # Convert input dict to DataFrame
-        df = pd.DataFrame([input_data])
-        
-        # Apply feature engineering
-        df_engineered = create_derived_features(df)
-        
-        # We need to ensure we drop the same columns as during training
-        # Usually client_id and credit_worthy (target)
-        cols_to_drop = ['client_id'] if 'client_id' in df_engineered.columns else []
-        X = df_engineered.drop(columns=cols_to_drop)
-        
-        # Predict probability
-        prob = self.model.predict_proba(X)[0, 1]
-        
-        # Also get intermediate engineered features for rule engine
-        engineered_features = df_engineered.iloc[0].to_dict()
-        
         return {
             "score": float(prob),
-            "engineered_features": engineered_features
+            "engineered_features": engineered_features,
+            "contributions": self._contribution_dicts(artifacts, contributions)[0],
+            "model_version": artifacts.version
         }
 
+    def predict_batch(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Scores many records with a single DataFrame, feature engineering pass and predict_proba call.
+        Results are returned in the same order as the input records.
+        """
+        artifacts = self.active
+        if artifacts is None:
+            raise Exception("Model is not loaded")
+        return self._predict_batch_with(artifacts, records)
+
+    def _predict_batch_with(self, artifacts: ModelArtifacts, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not records:
+            return []
+
+        start = time.perf_counter()
+        df = pd.DataFrame(records)
+        df_engineered = create_derived_features_fast(df)
+        FEATURE_STAGE.observe(time.perf_counter() - start)
+        return self._score_with(artifacts, df_engineered)
+
+    def predict_engineered(self, features: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Like predict_batch for records whose features were already engineered (derive_features_record),
+        so a caller that needed the features first does not compute them twice.
+        """
+        artifacts = self.active
+        if artifacts is None:
+            raise Exception("Model is not loaded")
+        if not features:
+            return []
+        return self._score_with(artifacts, pd.DataFrame(features))
+
+    def score_records(self, records: List[Dict[str, Any]]) -> Tuple[np.ndarray, pd.DataFrame]:
+        """
+        Probabilities and engineered features for many records in one pass, without contributions
+        or metrics. For what-if evaluations such as the loan offer search, not for decisions.
+        """
+        artifacts = self.active
+        if artifacts is None:
+            raise Exception("Model is not loaded")
+        df_engineered = create_derived_features_fast(pd.DataFrame(records))
+        if artifacts.engine is not None:
+            probs = artifacts.engine.predict(df_engineered)
+        else:
+            cols_to_drop = ['client_id'] if 'client_id' in df_engineered.columns else []
+            probs = artifacts.model.predict_proba(df_engineered.drop(columns=cols_to_drop))[:, 1]
+        return probs, df_engineered
+
+    def _score_with(self, artifacts: ModelArtifacts, df_engineered: pd.DataFrame) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        contributions = None
+        if artifacts.engine is not None:
+            probs, contributions = artifacts.engine.explain(artifacts.engine.transform(df_engineered))
+        else:
+            cols_to_drop = ['client_id'] if 'client_id' in df_engineered.columns else []
+            X = df_engineered.drop(columns=cols_to_drop)
+            probs = artifacts.model.predict_proba(X)[:, 1]
+            if artifacts.explainer is not None:
+                contributions = artifacts.explainer.explain(artifacts.explainer.transform(df_engineered))[1]
+        INFERENCE_STAGE.observe(time.perf_counter() - start)
+        INFERENCE_BATCH_SIZE.observe(len(df_engineered))
+        engineered_features = df_engineered.to_dict(orient='records')
+        contribution_dicts = self._contribution_dicts(artifacts, contributions, len(df_engineered))
+
+        return [
+            {"score": float(prob), "engineered_features": features, "contributions": row_contributions,
+             "model_version": artifacts.version}
+            for prob, features, row_contributions in zip(probs, engineered_features, contribution_dicts)
+        ]
+
+    def _contribution_dicts(self, artifacts: ModelArtifacts, contributions: Optional[np.ndarray],
+                            n_rows: int = 1) -> List[Optional[Dict[str, float]]]:
+        if contributions is None:
+            return [None] * n_rows
+        names = artifacts.explainer.feature_names
+        return [dict(zip(names, row)) for row in contributions.tolist()]
+
     def get_top_factors(self, n: int = 5) -> List[Dict[str, float]]:
         sorted_importance = sorted(self.feature_importance.items(), key=lambda x: x[1], reverse=True)
         return [{"factor": k, "importance": v} for k, v in sorted_importance[:n]]
 
     def get_info(self) -> Dict[str, Any]:
+        artifacts = self.active
         return {
-            "loaded": self.model_loaded,
+            "loaded": artifacts is not None,
+            "version": artifacts.version if artifacts else None,
+            "training_date": artifacts.training_date if artifacts else None,
+            "loaded_at": artifacts.loaded_at if artifacts else None,
             "metrics": self.metrics,
             "top_factors": self.get_top_factors(10)
         }
 
+# Artifacts are loaded by the application lifespan (or explicitly via load_model), not on import
 model_service = ModelService()
@@ -1,40 +1,258 @@
+import ast
+import hashlib
 import json
+import math
 import os
-from typing import Dict, List, Any, Optional
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from app.schemas.credit import ClientProfile, LoanRequest
+from app.utils.preprocessing import DERIVED_FEATURES
+
+# Names a condition may reference: raw request fields plus engineered features
+FEATURE_NAMES = frozenset(list(ClientProfile.model_fields) + list(LoanRequest.model_fields) + DERIVED_FEATURES)
+
+# Only comparisons, boolean logic and basic arithmetic are allowed in conditions
+ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or,
+    ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Name, ast.Load, ast.Constant
+)
+
+EVAL_GLOBALS = {"__builtins__": {}}
+
+class RuleValidationError(ValueError):
+    pass
+
+def compile_condition(condition: str, allowed_names=FEATURE_NAMES):
+    """
+    Parses and validates a rule condition once, returning a code object that can be
+    evaluated against a features dict without re-parsing.
+    """
+    try:
+        tree = ast.parse(condition, mode="eval")
+    except SyntaxError as e:
+        raise RuleValidationError(f"Invalid syntax in condition '{condition}': {e.msg}")
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise RuleValidationError(f"Unsupported expression '{type(node).__name__}' in condition '{condition}'")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, str, bool, type(None))):
+            raise RuleValidationError(f"Unsupported constant {node.value!r} in condition '{condition}'")
+        if isinstance(node, ast.Name) and node.id not in allowed_names:
+            raise RuleValidationError(f"Unknown feature '{node.id}' in condition '{condition}'")
+
+    return compile(tree, "<rule>", "eval")
+
+def compile_rules(config: Dict[str, Any]) -> Dict[str, List[Tuple[Dict[str, Any], Any]]]:
+    """
+    Validates every rule in a config and pairs it with its compiled condition.
+    Raises RuleValidationError on the first invalid rule.
+    """
+    compiled = {}
+    for category, rules in config.get("rules", {}).items():
+        entries = []
+        for rule in rules:
+            missing = [key for key in ("name", "condition", "message") if key not in rule]
+            if missing:
+                raise RuleValidationError(f"Rule in '{category}' is missing {', '.join(missing)}")
+            try:
+                entries.append((rule, compile_condition(rule["condition"])))
+            except RuleValidationError as e:
+                raise RuleValidationError(f"Rule '{rule['name']}': {e}")
+        compiled[category] = entries
+    return compiled
+
+# Adaptive auto_reject ordering: the order is recomputed every REORDER_EVERY checks
+REORDER_EVERY = 1000
+# Reading the clock costs about as much as a simple condition, so only every Nth check is timed
+PROFILE_TIMING_EVERY = 8
+
+class RuleStats:
+    """Evaluation and hit counts of one rule, and the time spent in its timed evaluations."""
+    __slots__ = ("evaluations", "hits", "timed", "seconds")
+
+    def __init__(self):
+        self.evaluations = 0
+        self.hits = 0
+        self.timed = 0
+        self.seconds = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.evaluations if self.evaluations else 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.seconds / self.timed if self.timed else 0.0
+
+    @property
+    def total_seconds(self) -> float:
+        """Estimated time across all evaluations."""
+        return self.mean_seconds * self.evaluations
+
+DEFAULT_CONFIG = {
+    "rules": {"auto_reject": [], "auto_approve": [], "require_guarantor": [], "require_collateral": []},
+    "thresholds": {}
+}
+
+class RuleSet:
+    """
+    One validated rules config with its compiled conditions. Its rules are never mutated after
+    creation (only the profile counters are), so a request that picked it up evaluates every
+    rule against the same version even if a reload happens meanwhile.
+    """
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.compiled_rules = compile_rules(config)
+        # Serialized once: GET /api/v1/rules serves these bytes and their hash as the ETag
+        self.body = json.dumps(config, sort_keys=True, separators=(",", ":")).encode()
+        self.version = hashlib.sha256(self.body).hexdigest()[:16]
+        self.etag = f'"{self.version}"'
+        self.loaded_at = datetime.now().isoformat()
+        # Profile, aligned with compiled_rules. Counters are updated without a lock; they are statistics
+        self.stats = {category: [RuleStats() for _ in entries] for category, entries in self.compiled_rules.items()}
+        self.checks = 0
+        self.reject_order = list(range(len(self.compiled_rules.get("auto_reject", []))))
+
+    def inherit_stats(self, previous: "RuleSet"):
+        """Keeps the profile of rules that are unchanged (same category, name and condition) in previous."""
+        known = {
+            (category, rule["name"], rule["condition"]): stats
+            for category, entries in previous.compiled_rules.items()
+            for (rule, _), stats in zip(entries, previous.stats[category])
+        }
+        for category, entries in self.compiled_rules.items():
+            self.stats[category] = [
+                known.get((category, rule["name"], rule["condition"]), stats)
+                for (rule, _), stats in zip(entries, self.stats[category])
+            ]
+        self.reorder()
+
+    def reorder(self):
+        """
+        Orders auto_reject rules by expected cost of finding a hit (mean time / hit rate), so cheap
+        rules that fire often run first. Rules that have never fired go last; ties keep file order.
+        """
+        stats = self.stats.get("auto_reject", [])
+        self.reject_order = sorted(
+            range(len(stats)),
+            key=lambda i: (stats[i].mean_seconds / stats[i].hit_rate if stats[i].hits else math.inf,
+                           stats[i].mean_seconds)
+        )
+
+    def get_thresholds(self) -> Dict[str, float]:
+        return self.config.get("thresholds", {
+            "min_credit_score": 0.5,
+            "high_confidence_threshold": 0.8,
+            "low_confidence_threshold": 0.4
+        })
 
 class RuleEngine:
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, profiling: bool = True, adaptive_order: bool = False):
         self.config_path = config_path
-        self.config = self.load_config()
+        # Record per-rule evaluation time (hit rates are always counted)
+        self.profiling = profiling
+        # Decision-only auto_reject checks (matches_any) run in profiled order and stop at the first hit.
+        # Implies profiling; decisions with a response still report every matching rule
+        self.adaptive_order = adaptive_order
+        self.active = RuleSet(self.load_config())
+        self.reload_listeners: List[Callable[[], None]] = []
+        self._write_lock = threading.Lock()
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self.active.config
+
+    @property
+    def compiled_rules(self) -> Dict[str, List[Tuple[Dict[str, Any], Any]]]:
+        return self.active.compiled_rules
+
+    @property
+    def version(self) -> str:
+        return self.active.version
     
     def load_config(self) -> Dict[str, Any]:
         if not os.path.exists(self.config_path):
             # Return a default empty config if file doesn't exist
-            return {"rules": {"auto_reject": [], "auto_approve": [], "require_guarantor": [], "require_collateral": []}, "thresholds": {}}
+            return DEFAULT_CONFIG
         
         with open(self.config_path, 'r') as f:
             return json.load(f)
 
-    def reload(self):
-        """Reloads the configuration from disk."""
-        self.config = self.load_config()
+    def reload(self) -> RuleSet:
+        """
+        Reloads the configuration from disk and swaps in the new rule set. Listeners only run
+        when the content actually changed, so re-reading an unchanged file is free.
+        """
+        ruleset = RuleSet(self.load_config())
+        if ruleset.version == self.active.version:
+            return self.active
+        ruleset.inherit_stats(self.active)
+        self.active = ruleset
+        for listener in self.reload_listeners:
+            listener()
+        return ruleset
+
+    def save(self, config: Dict[str, Any]) -> RuleSet:
+        """
+        Validates config, writes it with a temp file plus rename (readers and watchers in other
+        workers never see a partial file) and activates it in this process.
+        Raises RuleValidationError without touching the file if any rule is invalid.
+        """
+        RuleSet(config)
+        directory = os.path.dirname(os.path.abspath(self.config_path))
+        with self._write_lock:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".rules-", suffix=".json.tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(config, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.config_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            return self.reload()
+
+    def add_reload_listener(self, listener: Callable[[], None]):
+        """Registers a callback run after every reload that changed the rules."""
+        self.reload_listeners.append(listener)
     
-    def evaluate_condition(self, condition: str, features: Dict[str, Any]) -> bool:
+    def evaluate_condition(self, condition, features: Dict[str, Any]) -> bool:
         """
-        Safety note: This uses eval() which is generally dangerous. 
-        In a production environment, use a proper expression parser like simpleeval.
-        For this demo, we'll use eval with a restricted global environment.
+        Evaluates a condition (compiled code or raw string) against the features.
+        Conditions are validated to contain only comparisons, boolean operators and
+        arithmetic, and run without builtins. A condition that cannot be evaluated
+        for these features (e.g. a missing value) does not match.
         """
+        if isinstance(condition, str):
+            condition = compile_condition(condition)
         try:
-            # Create a clean safe names dict from features
-            safe_names = {k: v for k, v in features.items() if not k.startswith('__')}
-            return eval(condition, {"__builtins__": None}, safe_names)
-        except Exception as e:
-            print(f"Error evaluating condition '{condition}': {e}")
+            return bool(eval(condition, EVAL_GLOBALS, features))
+        except Exception:
             return False
             
-    def check_rules(self, features: Dict[str, Any]) -> Dict[str, Any]:
-        results = {
+    def _evaluate(self, condition, features: Dict[str, Any], stats: RuleStats, timed: bool) -> bool:
+        if timed:
+            start = time.perf_counter()
+            matched = self.evaluate_condition(condition, features)
+            stats.seconds += time.perf_counter() - start
+            stats.timed += 1
+        else:
+            matched = self.evaluate_condition(condition, features)
+        stats.evaluations += 1
+        stats.hits += matched
+        return matched
+
+    @staticmethod
+    def _empty_results() -> Dict[str, Any]:
+        return {
             "auto_reject": [],
             "auto_approve": [],
             "require_guarantor": [],
@@ -42,43 +260,108 @@ class RuleEngine:
             "flags": [],
             "recommendations": []
         }
-        
-        rules = self.config.get("rules", {})
-        
-        # 1. Check auto_reject
-        for rule in rules.get("auto_reject", []):
-            if self.evaluate_condition(rule["condition"], features):
+
+    def _timed(self, ruleset: RuleSet) -> bool:
+        # Hit counts are always kept; evaluation time is sampled
+        return (self.profiling or self.adaptive_order) and ruleset.checks % PROFILE_TIMING_EVERY == 0
+
+    def _check_auto_reject(self, features: Dict[str, Any], ruleset: RuleSet, results: Dict[str, Any], timed: bool):
+        ruleset.checks += 1
+        reject_rules = ruleset.compiled_rules.get("auto_reject", [])
+        stats = ruleset.stats.get("auto_reject", [])
+        if self.adaptive_order and ruleset.checks % REORDER_EVERY == 0:
+            ruleset.reorder()
+        # Every matching rule is a rejection reason, so the explanation never depends on the profiled order
+        for (rule, condition), rule_stats in zip(reject_rules, stats):
+            if self._evaluate(condition, features, rule_stats, timed):
                 results["auto_reject"].append(rule)
                 results["recommendations"].append(rule["message"])
+
+    def check_auto_reject(self, features: Dict[str, Any], ruleset: Optional[RuleSet] = None) -> Dict[str, Any]:
+        """Runs only the auto_reject rules; the other categories come back empty."""
+        ruleset = ruleset or self.active
+        results = self._empty_results()
+        self._check_auto_reject(features, ruleset, results, self._timed(ruleset))
+        return results
+
+    def check_rules(self, features: Dict[str, Any], ruleset: Optional[RuleSet] = None,
+                    skip_auto_reject: bool = False) -> Dict[str, Any]:
+        """
+        Evaluates every rule category. skip_auto_reject is for callers that already ran
+        check_auto_reject on these features and found no hit.
+        """
+        results = self._empty_results()
+        ruleset = ruleset or self.active
+        rules = ruleset.compiled_rules
+        stats = ruleset.stats
+        timed = self._timed(ruleset)
         
-        if results["auto_reject"]:
-            return results # Return early for rejections
+        # 1. Check auto_reject
+        if not skip_auto_reject:
+            self._check_auto_reject(features, ruleset, results, timed)
+            if results["auto_reject"]:
+                return results # Return early for rejections
             
         # 2. Check require_guarantor
-        for rule in rules.get("require_guarantor", []):
-            if self.evaluate_condition(rule["condition"], features):
+        for (rule, condition), rule_stats in zip(rules.get("require_guarantor", []),
+                                                 stats.get("require_guarantor", [])):
+            if self._evaluate(condition, features, rule_stats, timed):
                 if not features.get("has_guarantor", False):
                     results["require_guarantor"].append(rule)
                     results["flags"].append(f"Guarantor Required: {rule['message']}")
                     
         # 3. Check require_collateral
-        for rule in rules.get("require_collateral", []):
-            if self.evaluate_condition(rule["condition"], features):
+        for (rule, condition), rule_stats in zip(rules.get("require_collateral", []),
+                                                 stats.get("require_collateral", [])):
+            if self._evaluate(condition, features, rule_stats, timed):
                 if not features.get("has_collateral", False):
                     results["require_collateral"].append(rule)
                     results["flags"].append(f"Collateral Required: {rule['message']}")
                     
         # 4. Check auto_approve
-        for rule in rules.get("auto_approve", []):
-            if self.evaluate_condition(rule["condition"], features):
+        for (rule, condition), rule_stats in zip(rules.get("auto_approve", []), stats.get("auto_approve", [])):
+            if self._evaluate(condition, features, rule_stats, timed):
                 results["auto_approve"].append(rule)
                 results["recommendations"].append(f"Auto-approval criteria met: {rule['message']}")
                 
         return results
 
-    def get_thresholds(self) -> Dict[str, float]:
-        return self.config.get("thresholds", {
-            "min_credit_score": 0.5,
-            "high_confidence_threshold": 0.8,
-            "low_confidence_threshold": 0.4
-        })
+    def matches_any(self, features: Dict[str, Any], category: str, ruleset: Optional[RuleSet] = None) -> bool:
+        """Whether any rule of a category matches, without touching the rule statistics (for what-if evaluations)."""
+        ruleset = ruleset or self.active
+        entries = ruleset.compiled_rules.get(category, [])
+        if category == "auto_reject" and self.adaptive_order:
+            # Only the decision is needed, so the rules most likely to fire cheaply go first
+            entries = [entries[i] for i in ruleset.reject_order]
+        return any(self.evaluate_condition(condition, features) for _, condition in entries)
+
+    def profile(self) -> Dict[str, Any]:
+        """Per-rule profile of the active rules, most total evaluation time first."""
+        ruleset = self.active
+        total_seconds = sum(s.total_seconds for category in ruleset.stats.values() for s in category) or 1.0
+        rules = []
+        for category, entries in ruleset.compiled_rules.items():
+            for (rule, _), stats in zip(entries, ruleset.stats[category]):
+                rules.append({
+                    "category": category,
+                    "name": rule["name"],
+                    "evaluations": stats.evaluations,
+                    "hits": stats.hits,
+                    "hit_rate": round(stats.hit_rate, 4),
+                    "mean_us": round(stats.mean_seconds * 1e6, 3),
+                    "total_ms": round(stats.total_seconds * 1000, 3),
+                    "time_share": round(stats.total_seconds / total_seconds, 4)
+                })
+        rules.sort(key=lambda r: r["total_ms"], reverse=True)
+        reject_rules = ruleset.compiled_rules.get("auto_reject", [])
+        return {
+            "version": ruleset.version,
+            "profiling": self.profiling or self.adaptive_order,
+            "adaptive_order": self.adaptive_order,
+            "checks": ruleset.checks,
+            "auto_reject_order": [reject_rules[i][0]["name"] for i in ruleset.reject_order],
+            "rules": rules
+        }
+
+    def get_thresholds(self, ruleset: Optional[RuleSet] = None) -> Dict[str, float]:
+        return (ruleset or self.active).get_thresholds()
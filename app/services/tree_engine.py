@@ -0,0 +1,421 @@
+import glob
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+Records = Union[pd.DataFrame, List[Dict[str, Any]]]
+
+APPLY_CHUNK_ROWS = 1024
+# Node arrays written by ForestEngine.save, one .npy file each
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "roots", "children", "node_delta", "node_group")
+# Derived from the others; exports written before they were saved are still loadable
+DERIVED_ARRAY_NAMES = ("children", "node_delta", "node_group")
+META_FILE = "meta.json"
+# ForestEngine.save writes <directory>.v<timestamp> and points the <directory> symlink at it
+VERSION_SEPARATOR = ".v"
+# Single-file export written by ForestEngine.save_compact
+COMPACT_FORMAT_VERSION = 1
+COMPACT_SUFFIX = ".npz"
+
+class UnsupportedModelError(ValueError):
+    pass
+
+def _column(data: Records, name: str, dtype=None) -> np.ndarray:
+    if isinstance(data, pd.DataFrame):
+        return data[name].to_numpy(dtype=dtype)
+    return np.array([record.get(name) for record in data], dtype=dtype)
+
+def _narrow_int_dtype(max_value: int) -> np.dtype:
+    for dtype in (np.uint8, np.int16, np.int32):
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+def float32_floor(values: np.ndarray) -> np.ndarray:
+    """
+    Largest float32 <= each value. For any float32 x, x <= value exactly when x <= float32_floor(value),
+    so float32 thresholds rounded this way split float32 features exactly like the float64 originals.
+    """
+    rounded = np.asarray(values, dtype=np.float64).astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+class ForestEngine:
+    """
+    Evaluates the fitted preprocessing + RandomForestClassifier pipeline from flat NumPy arrays.
+
+    The ColumnTransformer is reduced to its fitted parameters (medians, means, scales,
+    one-hot categories) and all trees are stacked into one set of node arrays
+    (feature, threshold, left, right, value) so a batch of rows walks every tree at once.
+    Results match sklearn's predict_proba; sklearn remains the reference implementation.
+    """
+    def __init__(self, params: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.params = params
+        self.numerical_features = params["numerical_features"]
+        self.categorical_features = params["categorical_features"]
+        self.binary_features = params["binary_features"]
+        self.num_median = np.asarray(params["num_median"], dtype=np.float64)
+        self.num_mean = np.asarray(params["num_mean"], dtype=np.float64)
+        self.num_scale = np.asarray(params["num_scale"], dtype=np.float64)
+        self.categories = [np.asarray(c, dtype=object) for c in params["categories"]]
+        self.binary_fill = np.asarray(params["binary_fill"], dtype=np.float64)
+        self.max_depth = params["max_depth"]
+        # sha256 of the model file the engine was exported from, when known
+        self.source_sha256: Optional[str] = None
+
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"].astype(np.intp)
+        self.n_trees = len(self.roots)
+        # Interleaved [left, right] pairs so a step is a single take(node * 2 + go_right)
+        children = arrays.get("children")
+        if children is None:
+            children = np.column_stack([self.left, self.right]).ravel().astype(np.intp)
+        self.children = children
+        self._build_explainer(arrays.get("node_delta"), arrays.get("node_group"))
+
+    def _build_explainer(self, node_delta: Optional[np.ndarray] = None, node_group: Optional[np.ndarray] = None):
+        """
+        Precomputes what a TreeInterpreter-style explanation needs: for every node, the change in
+        positive-class value from its parent, and the input feature its parent split on. A row's
+        contributions are then just these deltas summed along its decision paths. Exports store
+        both arrays, so memory-mapped workers share them instead of each building a copy.
+        """
+        self.feature_names = self.numerical_features + self.categorical_features + self.binary_features
+        self.bias = float(np.mean(self.value[self.roots]))
+        if node_delta is None or node_group is None:
+            node_delta, node_group = self._explainer_arrays()
+        self.node_delta = node_delta
+        self.node_group = node_group
+
+    def _explainer_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Transformed column -> input feature (all one-hot columns of a categorical map to it)
+        groups = list(range(len(self.numerical_features)))
+        for i, categories in enumerate(self.categories):
+            groups += [len(self.numerical_features) + i] * len(categories)
+        groups += [len(self.numerical_features) + len(self.categories) + i for i in range(len(self.binary_features))]
+        column_group = np.asarray(groups, dtype=np.intp)
+
+        n_nodes = len(self.feature)
+        node_ids = np.arange(n_nodes)
+        internal = np.asarray(self.left) != node_ids
+        parent = np.full(n_nodes, -1, dtype=np.intp)
+        parent[self.left[internal]] = node_ids[internal]
+        parent[self.right[internal]] = node_ids[internal]
+        has_parent = parent >= 0
+
+        node_delta = np.zeros(n_nodes, dtype=np.float64)
+        node_delta[has_parent] = self.value[has_parent] - self.value[parent[has_parent]]
+        node_group = np.zeros(n_nodes, dtype=np.intp)
+        node_group[has_parent] = column_group[self.feature[parent[has_parent]]]
+        return node_delta, node_group
+
+    @classmethod
+    def from_pipeline(cls, pipeline) -> "ForestEngine":
+        """Exports a fitted Pipeline(preprocessor, RandomForestClassifier) into flat arrays."""
+        try:
+            preprocessor = pipeline.named_steps["preprocessor"]
+            forest = pipeline.named_steps["classifier"]
+            transformers = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_}
+            num, numerical_features = transformers["num"]
+            cat, categorical_features = transformers["cat"]
+            binary, binary_features = transformers["bin"]
+            onehot = cat.named_steps["onehot"]
+            num_imputer = num.named_steps["imputer"]
+            scaler = num.named_steps["scaler"]
+            binary_imputer = binary.named_steps["imputer"]
+            estimators = forest.estimators_
+        except (AttributeError, KeyError) as e:
+            raise UnsupportedModelError(f"Unsupported pipeline structure: {e}")
+
+        if onehot.drop_idx_ is not None or list(forest.classes_) != [0, 1]:
+            raise UnsupportedModelError("Only binary classifiers with undropped one-hot columns are supported")
+
+        params = {
+            "numerical_features": list(numerical_features),
+            "categorical_features": list(categorical_features),
+            "binary_features": list(binary_features),
+            "num_median": num_imputer.statistics_.astype(np.float64).tolist(),
+            "num_mean": (scaler.mean_ if scaler.with_mean else np.zeros(len(numerical_features))).tolist(),
+            "num_scale": (scaler.scale_ if scaler.with_std else np.ones(len(numerical_features))).tolist(),
+            "categories": [c.tolist() for c in onehot.categories_],
+            "binary_fill": binary_imputer.statistics_.astype(np.float64).tolist(),
+            "max_depth": int(max(e.tree_.max_depth for e in estimators)),
+        }
+
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n) + offset
+
+            # Leaves point at themselves so every row can take max_depth steps
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            left.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            right.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            counts = tree.value[:, 0, :]
+            normalizer = counts.sum(axis=1)
+            normalizer[normalizer == 0.0] = 1.0
+            value.append(counts[:, 1] / normalizer)
+
+            roots.append(offset)
+            offset += n
+
+        arrays = {
+            "feature": np.concatenate(feature).astype(np.int32),
+            "threshold": np.concatenate(threshold).astype(np.float64),
+            "left": np.concatenate(left).astype(np.int32),
+            "right": np.concatenate(right).astype(np.int32),
+            "value": np.concatenate(value).astype(np.float64),
+            "roots": np.asarray(roots, dtype=np.int32),
+        }
+        return cls(params, arrays)
+
+    def save(self, directory: str, source_sha256: Optional[str] = None):
+        """
+        Writes the engine as one .npy file per node array plus meta.json, for load(mmap_mode="r").
+        Every export goes to its own versioned directory and `directory` is a symlink that is
+        swapped to it in one rename, so readers never see a half-written or missing export.
+        """
+        directory = directory.rstrip(os.sep)
+        version_dir = f"{directory}{VERSION_SEPARATOR}{time.time_ns()}"
+        os.makedirs(version_dir)
+        arrays = {
+            "feature": self.feature, "threshold": self.threshold, "left": self.left, "right": self.right,
+            "value": self.value, "roots": self.roots, "children": self.children,
+            "node_delta": self.node_delta, "node_group": self.node_group
+        }
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(version_dir, f"{name}.npy"), np.ascontiguousarray(arrays[name]))
+        with open(os.path.join(version_dir, META_FILE), 'w') as f:
+            json.dump({"params": self.params, "source_sha256": source_sha256}, f)
+
+        # Relative target, so the export still resolves when the model directory is mounted elsewhere
+        tmp_link = f"{directory}.link.tmp"
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        os.symlink(os.path.basename(version_dir), tmp_link)
+        previous_dir = os.path.realpath(directory) if os.path.islink(directory) else None
+        if os.path.isdir(directory) and previous_dir is None:
+            # An export from before versioned directories; replacing it once cannot be atomic
+            shutil.rmtree(directory)
+        os.replace(tmp_link, directory)
+
+        # The previous export is kept for loaders that resolved the link just before the swap; processes
+        # that still map older ones keep their files alive until they reload
+        keep = {os.path.realpath(version_dir), previous_dir}
+        for old_dir in glob.glob(f"{glob.escape(directory)}{VERSION_SEPARATOR}*"):
+            if os.path.realpath(old_dir) not in keep:
+                shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = "r") -> "ForestEngine":
+        """
+        Loads an engine written by save(). With mmap_mode="r" the node arrays stay in the
+        page cache and are shared by every process that maps the same files.
+        """
+        # Resolve the symlink once, so every file comes from the same export even if save() swaps it
+        directory = os.path.realpath(directory)
+        with open(os.path.join(directory, META_FILE), 'r') as f:
+            meta = json.load(f)
+        arrays = {
+            # asarray drops the memmap subclass without copying, so hot-path ops return plain arrays
+            name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+            for name in ARRAY_NAMES
+            if name not in DERIVED_ARRAY_NAMES or os.path.exists(os.path.join(directory, f"{name}.npy"))
+        }
+        engine = cls(meta["params"], arrays)
+        engine.source_sha256 = meta.get("source_sha256")
+        return engine
+
+    def save_compact(self, path: str, source_sha256: Optional[str] = None, extra_meta: Optional[Dict[str, Any]] = None):
+        """
+        Writes the engine as one pickle-free, versioned .npz file. Thresholds are stored as float32
+        (rounded down, so splits are unchanged) and child links as per-tree offsets in the narrowest
+        integer type that fits; leaf values stay float64 so probabilities match sklearn exactly.
+        """
+        roots = np.asarray(self.roots, dtype=np.int64)
+        tree_start = np.repeat(roots, np.diff(np.append(roots, len(self.feature))))
+        left = np.asarray(self.left, dtype=np.int64) - tree_start
+        right = np.asarray(self.right, dtype=np.int64) - tree_start
+        index_dtype = _narrow_int_dtype(int(max(left.max(), right.max())))
+        meta = {
+            "format_version": COMPACT_FORMAT_VERSION,
+            "params": self.params,
+            "source_sha256": source_sha256,
+            **(extra_meta or {})
+        }
+        tmp_path = f"{path}.tmp{COMPACT_SUFFIX}"
+        np.savez_compressed(
+            tmp_path,
+            meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+            feature=np.asarray(self.feature).astype(_narrow_int_dtype(int(np.max(self.feature)))),
+            threshold=float32_floor(self.threshold),
+            left=left.astype(index_dtype),
+            right=right.astype(index_dtype),
+            value=np.asarray(self.value, dtype=np.float64),
+            roots=roots.astype(np.int32),
+            node_delta=np.asarray(self.node_delta, dtype=np.float64),
+            node_group=np.asarray(self.node_group).astype(_narrow_int_dtype(len(self.feature_names)))
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_compact(cls, path: str) -> "ForestEngine":
+        """Loads a file written by save_compact(); no pickle is involved."""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data["meta"].tobytes())
+            if meta.get("format_version") != COMPACT_FORMAT_VERSION:
+                raise UnsupportedModelError(f"Unsupported compact model format: {meta.get('format_version')}")
+            roots = data["roots"].astype(np.int32)
+            tree_start = np.repeat(roots, np.diff(np.append(roots, len(data["feature"]))))
+            arrays = {
+                "feature": data["feature"].astype(np.int32),
+                "threshold": data["threshold"],
+                "left": (data["left"] + tree_start).astype(np.int32),
+                "right": (data["right"] + tree_start).astype(np.int32),
+                "value": data["value"],
+                "roots": roots,
+            }
+            # Files from before the explainer arrays were stored rebuild them
+            if "node_delta" in data.files and "node_group" in data.files:
+                arrays["node_delta"] = data["node_delta"]
+                arrays["node_group"] = data["node_group"].astype(np.intp)
+        engine = cls(meta["params"], arrays)
+        engine.source_sha256 = meta.get("source_sha256")
+        return engine
+
+    def collapse(self, nodes: np.ndarray) -> "ForestEngine":
+        """
+        Returns a copy where each of the given nodes becomes a leaf (predicting its own value),
+        with the nodes that are no longer reachable removed and the rest renumbered.
+        """
+        n_nodes = len(self.feature)
+        feature = np.array(self.feature, dtype=np.int32)
+        threshold = np.array(self.threshold)
+        left = np.array(self.left, dtype=np.int32)
+        right = np.array(self.right, dtype=np.int32)
+        nodes = np.asarray(nodes, dtype=np.intp)
+        feature[nodes] = 0
+        threshold[nodes] = np.inf
+        left[nodes] = nodes
+        right[nodes] = nodes
+
+        # 1. Walk down from the roots to find the surviving nodes and the new depth
+        node_ids = np.arange(n_nodes)
+        reachable = np.zeros(n_nodes, dtype=bool)
+        reachable[self.roots] = True
+        frontier = np.asarray(self.roots, dtype=np.intp)
+        max_depth = 0
+        while True:
+            frontier = frontier[left[frontier] != node_ids[frontier]]
+            if len(frontier) == 0:
+                break
+            max_depth += 1
+            frontier = np.concatenate([left[frontier], right[frontier]])
+            reachable[frontier] = True
+
+        # 2. Renumber; trees stay contiguous and in order, so the new roots are still offsets
+        keep = np.flatnonzero(reachable)
+        new_index = np.cumsum(reachable) - 1
+        arrays = {
+            "feature": feature[keep],
+            "threshold": threshold[keep],
+            "left": new_index[left[keep]].astype(np.int32),
+            "right": new_index[right[keep]].astype(np.int32),
+            "value": np.asarray(self.value)[keep],
+            "roots": new_index[self.roots].astype(np.int32),
+        }
+        engine = ForestEngine(dict(self.params, max_depth=max_depth), arrays)
+        engine.source_sha256 = self.source_sha256
+        return engine
+
+    def transform(self, data: Records) -> np.ndarray:
+        """Reproduces the fitted ColumnTransformer: scaled numerics, one-hot categoricals, binaries."""
+        numeric = np.column_stack([_column(data, name, np.float64) for name in self.numerical_features])
+        numeric = np.where(np.isnan(numeric), self.num_median, numeric)
+        numeric = (numeric - self.num_mean) / self.num_scale
+
+        one_hot = [
+            (_column(data, name, object)[:, None] == categories[None, :]).astype(np.float64)
+            for name, categories in zip(self.categorical_features, self.categories)
+        ]
+
+        binary = np.column_stack([_column(data, name, np.float64) for name in self.binary_features])
+        binary = np.where(np.isnan(binary), self.binary_fill, binary)
+
+        return np.hstack([numeric] + one_hot + [binary])
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Returns the leaf node index reached in every tree, shape (n_rows, n_trees)."""
+        # Trees split on float32 features, exactly as sklearn does
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.shape[0] <= APPLY_CHUNK_ROWS:
+            return self._apply_chunk(X)
+        # Bounded chunks keep the (rows, trees) working set cache friendly
+        return np.vstack([self._apply_chunk(X[start:start + APPLY_CHUNK_ROWS])
+                          for start in range(0, X.shape[0], APPLY_CHUNK_ROWS)])
+
+    def _apply_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            go_right = ~(flat_X.take(row_offsets + self.feature.take(nodes)) <= self.threshold.take(nodes))
+            nodes = self.children.take(nodes * 2 + go_right)
+        return nodes
+
+    def explain(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (probabilities, contributions) for a transformed matrix, walking the trees once.
+        contributions has one column per input feature (see feature_names), and for every row
+        bias + contributions.sum() equals the probability up to float rounding.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        chunks = [self._explain_chunk(X[start:start + APPLY_CHUNK_ROWS])
+                  for start in range(0, X.shape[0], APPLY_CHUNK_ROWS)]
+        leaves = np.vstack([leaves for leaves, _ in chunks])
+        contributions = np.vstack([contributions for _, contributions in chunks])
+        return np.cumsum(self.value[leaves], axis=1)[:, -1] / self.n_trees, contributions
+
+    def _explain_chunk(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        n_rows, n_features = X.shape
+        n_groups = len(self.feature_names)
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        group_offsets = (np.arange(n_rows, dtype=np.intp) * n_groups)[:, None]
+        totals = np.zeros(n_rows * n_groups, dtype=np.float64)
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            go_right = ~(flat_X.take(row_offsets + self.feature.take(nodes)) <= self.threshold.take(nodes))
+            next_nodes = self.children.take(nodes * 2 + go_right)
+            # Rows already at a leaf stay there and add nothing
+            deltas = np.where(next_nodes != nodes, self.node_delta.take(next_nodes), 0.0)
+            totals += np.bincount((group_offsets + self.node_group.take(next_nodes)).ravel(),
+                                  weights=deltas.ravel(), minlength=totals.size)
+            nodes = next_nodes
+        return nodes, totals.reshape(n_rows, n_groups) / self.n_trees
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Positive-class probability for each row of a transformed matrix."""
+        leaf_values = self.value[self.apply(X)]
+        # Accumulate trees in order, like sklearn, so sums match to the last bit
+        return np.cumsum(leaf_values, axis=1)[:, -1] / self.n_trees
+
+    def predict(self, data: Records) -> np.ndarray:
+        """Positive-class probability for raw engineered records or a DataFrame."""
+        return self.predict_proba(self.transform(data))
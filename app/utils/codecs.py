@@ -0,0 +1,171 @@
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+Model = TypeVar("Model", bound=BaseModel)
+
+# Struct-of-arrays bodies for bulk calls: {"columns": {"age": [...], ...}}
+COLUMNAR_SUBTYPE = "vnd.credit-columnar"
+
+class JSONCodec:
+    """
+    JSON bodies. Models are parsed and rendered by pydantic-core directly from and to bytes;
+    plain dicts (columnar bodies) go through orjson when it is installed.
+    """
+    name = "json"
+    media_type = "application/json"
+
+    def decode(self, body: bytes) -> Any:
+        return orjson.loads(body) if orjson is not None else json.loads(body)
+
+    def encode(self, value: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(value, separators=(",", ":"), default=_json_default).encode()
+
+    def decode_model(self, model: Type[Model], body: bytes) -> Model:
+        return model.model_validate_json(body)
+
+    def encode_model(self, value: BaseModel) -> bytes:
+        return value.model_dump_json().encode()
+
+class MsgpackCodec:
+    """MessagePack bodies; models cross the wire as their JSON-mode dicts."""
+    name = "msgpack"
+    media_type = "application/msgpack"
+
+    def decode(self, body: bytes) -> Any:
+        return msgpack.unpackb(body)
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_json_default)
+
+    def decode_model(self, model: Type[Model], body: bytes) -> Model:
+        return model.model_validate(self.decode(body))
+
+    def encode_model(self, value: BaseModel) -> bytes:
+        return self.encode(value.model_dump(mode="json"))
+
+def _json_default(value: Any) -> Any:
+    # What orjson handles natively: enums, datetimes and numpy values in columnar bodies
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not serializable")
+
+JSON = JSONCodec()
+MSGPACK = MsgpackCodec()
+# Media subtype suffix (after "+" for structured types) -> codec
+CODECS = {"json": JSON, "msgpack": MSGPACK, "x-msgpack": MSGPACK}
+
+class MediaType:
+    """A negotiated wire format: the codec and whether bodies are columnar."""
+    def __init__(self, codec, columnar: bool = False):
+        self.codec = codec
+        self.columnar = columnar
+
+    @property
+    def content_type(self) -> str:
+        if self.columnar:
+            return f"application/{COLUMNAR_SUBTYPE}+{self.codec.name}"
+        return self.codec.media_type
+
+def parse_media_type(value: str) -> Optional[MediaType]:
+    """application/json, application/msgpack, application/vnd.credit-columnar+json|+msgpack; None otherwise."""
+    mime = value.split(";", 1)[0].strip().lower()
+    kind, _, subtype = mime.partition("/")
+    if kind != "application":
+        return None
+    base, _, suffix = subtype.partition("+")
+    if base == COLUMNAR_SUBTYPE:
+        codec = CODECS.get(suffix or "json")
+        columnar = True
+    else:
+        codec = CODECS.get(base)
+        columnar = False
+    if codec is None or (codec is MSGPACK and msgpack is None):
+        return None
+    return MediaType(codec, columnar)
+
+def request_media_type(content_type: Optional[str]) -> MediaType:
+    """Format of a request body; missing Content-Type means JSON, unsupported ones are a 415."""
+    if not content_type:
+        return MediaType(JSON)
+    media_type = parse_media_type(content_type)
+    if media_type is None:
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Type {content_type}")
+    return media_type
+
+def response_media_type(accept: Optional[str], default: MediaType) -> MediaType:
+    """Picks the response format from Accept by quality, in header order on ties; 406 if none is supported."""
+    if not accept:
+        return default
+    offers: List[Tuple[float, int, str]] = []
+    for position, part in enumerate(accept.split(",")):
+        mime, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        if mime and quality > 0:
+            offers.append((-quality, position, mime.lower()))
+
+    for _, _, mime in sorted(offers):
+        if mime in ("*/*", "application/*"):
+            return default
+        media_type = parse_media_type(mime)
+        if media_type is not None:
+            return media_type
+    raise HTTPException(status_code=406, detail=f"None of the accepted media types are supported: {accept}")
+
+def decode_model(media_type: MediaType, model: Type[Model], body: bytes) -> Model:
+    """Parses and validates a body, reporting failures as FastAPI's usual 422."""
+    try:
+        return media_type.codec.decode_model(model, body)
+    except ValidationError as e:
+        raise RequestValidationError([dict(err, loc=("body",) + tuple(err["loc"])) for err in e.errors()])
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Malformed {media_type.codec.name} body: {e}")
+
+def decode_body(media_type: MediaType, body: bytes) -> Any:
+    try:
+        return media_type.codec.decode(body)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Malformed {media_type.codec.name} body: {e}")
+
+def model_response(media_type: MediaType, value: BaseModel, status_code: int = 200) -> Response:
+    return Response(media_type.codec.encode_model(value), status_code=status_code, media_type=media_type.content_type)
+
+def encoded_response(media_type: MediaType, value: Dict[str, Any], status_code: int = 200) -> Response:
+    return Response(media_type.codec.encode(value), status_code=status_code, media_type=media_type.content_type)
+
+def request_body_docs(model: Type[BaseModel], columnar: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """OpenAPI requestBody for routes that read and negotiate the raw body themselves."""
+    schema = model.model_json_schema()
+    content = {"application/json": {"schema": schema}, "application/msgpack": {"schema": schema}}
+    if columnar is not None:
+        for suffix in ("json", "msgpack"):
+            content[f"application/{COLUMNAR_SUBTYPE}+{suffix}"] = {"schema": columnar}
+    return {"requestBody": {"required": True, "content": content}}
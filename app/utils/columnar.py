@@ -0,0 +1,174 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app.schemas.credit import ClientProfile, LoanRequest, CreditCheckResponse
+
+CLIENT_FIELDS = list(ClientProfile.model_fields)
+LOAN_FIELDS = list(LoanRequest.model_fields)
+RESPONSE_FIELDS = list(CreditCheckResponse.model_fields)
+
+BOOL_VALUES = {
+    True: True, False: False, "true": True, "false": False, "1": True, "0": False,
+    "yes": True, "no": False, "on": True, "off": False, "t": True, "f": False, "y": True, "n": False
+}
+TYPE_MESSAGES = {
+    "int": "Input should be a valid integer",
+    "float": "Input should be a valid number",
+    "bool": "Input should be a valid boolean",
+}
+
+# OpenAPI schema of a columnar batch body
+COLUMNAR_REQUEST_SCHEMA = {
+    "type": "object",
+    "required": ["columns"],
+    "properties": {
+        "columns": {
+            "type": "object",
+            "description": "One equally long list per CreditCheckRequest field (client and loan fields, flat)",
+            "additionalProperties": {"type": "array"}
+        }
+    }
+}
+
+class ColumnarValidationError(ValueError):
+    """The columnar body as a whole is unusable (missing columns, ragged lengths)."""
+    pass
+
+class ColumnSpec:
+    """Type, bounds and default of one request field, read from the pydantic schema."""
+    __slots__ = ("name", "loc", "kind", "ge", "le", "choices", "default", "required")
+
+    def __init__(self, section: str, name: str, field):
+        self.name = name
+        self.loc = f"{section}.{name}"
+        self.ge = next((m.ge for m in field.metadata if hasattr(m, "ge")), None)
+        self.le = next((m.le for m in field.metadata if hasattr(m, "le")), None)
+        self.required = field.is_required()
+        self.default = None if self.required else field.default
+        self.choices = None
+        if isinstance(field.annotation, type) and issubclass(field.annotation, Enum):
+            self.kind = "enum"
+            self.choices = [member.value for member in field.annotation]
+        else:
+            self.kind = field.annotation.__name__
+
+    def enum_message(self) -> str:
+        quoted = [f"'{value}'" for value in self.choices]
+        return f"Input should be {', '.join(quoted[:-1])} or {quoted[-1]}"
+
+SPECS = [ColumnSpec("client", name, field) for name, field in ClientProfile.model_fields.items()] + \
+        [ColumnSpec("loan", name, field) for name, field in LoanRequest.model_fields.items()]
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, bool):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+Failures = List[Tuple[np.ndarray, str]]
+
+def _numeric_column(spec: ColumnSpec, values: List[Any]) -> Tuple[List[Any], np.ndarray, Failures]:
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Some entries are not numbers; convert one by one so only those rows fail
+        array = np.array([_to_float(v) for v in values], dtype=np.float64)
+    invalid = np.isnan(array)
+    if spec.kind == "int":
+        invalid |= np.isinf(array) | (np.floor(array) != array)
+    failures = [(invalid, TYPE_MESSAGES[spec.kind])]
+    if spec.ge is not None:
+        failures.append((~invalid & (array < spec.ge), f"Input should be greater than or equal to {spec.ge}"))
+    if spec.le is not None:
+        failures.append((~invalid & (array > spec.le), f"Input should be less than or equal to {spec.le}"))
+    if spec.kind == "int":
+        return np.where(invalid, 0, array).astype(np.int64).tolist(), array, failures
+    return array.tolist(), array, failures
+
+def _lookup_column(spec: ColumnSpec, values: List[Any]) -> Tuple[List[Any], Failures]:
+    if spec.kind == "enum":
+        allowed = set(spec.choices)
+        converted = [v if isinstance(v, str) and v in allowed else None for v in values]
+        message = spec.enum_message()
+    else:
+        converted = [
+            BOOL_VALUES.get(v.lower() if isinstance(v, str) else v) if isinstance(v, (bool, int, float, str)) else None
+            for v in values
+        ]
+        message = TYPE_MESSAGES["bool"]
+    invalid = np.fromiter((v is None for v in converted), dtype=bool, count=len(converted))
+    return converted, [(invalid, message)]
+
+def validate_columns(columns: Dict[str, List[Any]]) -> Tuple[List[Optional[Dict[str, Any]]], List[Optional[str]]]:
+    """
+    Validates a struct-of-arrays body column by column with the same rules as CreditCheckRequest,
+    without building a model per application. Returns one flat record (or None) and one error
+    (or None) per row; errors are formatted like the per-item errors of the batch endpoint.
+    """
+    if not isinstance(columns, dict) or not all(isinstance(v, list) for v in columns.values()):
+        raise ColumnarValidationError("'columns' must map field names to lists")
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ColumnarValidationError(f"Columns have different lengths: {sorted(lengths)}")
+    rows = lengths.pop() if lengths else 0
+    missing = [spec.loc for spec in SPECS if spec.required and spec.name not in columns]
+    if missing:
+        raise ColumnarValidationError(f"Missing columns: {', '.join(missing)}")
+
+    # 1. Convert and check every column as a whole
+    converted = []
+    arrays: Dict[str, np.ndarray] = {}
+    failures: Failures = []
+    invalid = np.zeros(rows, dtype=bool)
+    field_invalid: Dict[str, np.ndarray] = {}
+    for spec in SPECS:
+        values = columns.get(spec.name)
+        if values is None:
+            converted.append([spec.default] * rows)
+            continue
+        if spec.kind in ("int", "float"):
+            column, arrays[spec.name], column_failures = _numeric_column(spec, values)
+        else:
+            column, column_failures = _lookup_column(spec, values)
+        converted.append(column)
+        field_invalid[spec.name] = np.zeros(rows, dtype=bool)
+        for mask, message in column_failures:
+            field_invalid[spec.name] |= mask
+            failures.append((mask, f"{spec.loc}: {message}"))
+        invalid |= field_invalid[spec.name]
+
+    # 2. ClientProfile.validate_repaid_count, for rows where both counts are valid
+    if "previous_loans_repaid_on_time" in arrays and "num_previous_loans" in arrays:
+        checked = ~field_invalid["previous_loans_repaid_on_time"] & ~field_invalid["num_previous_loans"]
+        exceeds = checked & (arrays["previous_loans_repaid_on_time"] > arrays["num_previous_loans"])
+        failures.append((exceeds, "client.previous_loans_repaid_on_time: Value error, "
+                                  "repaid loans cannot exceed total previous loans"))
+        invalid |= exceeds
+
+    # 3. Errors only for the failing rows, records for the rest
+    errors: List[Optional[str]] = [None] * rows
+    for mask, message in failures:
+        for index in np.flatnonzero(mask):
+            errors[index] = message if errors[index] is None else f"{errors[index]}; {message}"
+    names = [spec.name for spec in SPECS]
+    records = [None if bad else dict(zip(names, row)) for bad, row in zip(invalid.tolist(), zip(*converted))]
+    return records, errors
+
+def nest(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The {"client": ..., "loan": ...} shape of a flat record, as CreditCheckRequest dumps it."""
+    return {
+        "client": {name: record[name] for name in CLIENT_FIELDS},
+        "loan": {name: record[name] for name in LOAN_FIELDS}
+    }
+
+def encode_results(responses: List[Optional[CreditCheckResponse]], errors: List[Optional[str]]) -> Dict[str, Any]:
+    """Struct-of-arrays form of a batch result: one list per response field, null where the row failed."""
+    columns: Dict[str, List[Any]] = {"index": list(range(len(responses))), "error": errors}
+    for name in RESPONSE_FIELDS:
+        columns[name] = [getattr(r, name) if r is not None else None for r in responses]
+    columns["factors"] = [[f.model_dump() for f in factors] if factors is not None else None
+                          for factors in columns["factors"]]
+    succeeded = sum(r is not None for r in responses)
+    return {"total": len(responses), "succeeded": succeeded, "failed": len(responses) - succeeded, "columns": columns}
@@ -0,0 +1,56 @@
+import os
+import threading
+from typing import Callable, List, Optional, Tuple
+
+Signature = Tuple[Optional[Tuple[float, int]], ...]
+
+class FileWatcher:
+    """
+    Polls a set of files and calls `callback` once they have changed and then stayed
+    unchanged for one full interval, so half-written files are not picked up.
+    """
+    def __init__(self, paths: List[str], callback: Callable[[], None], interval: float = 5.0, name: str = "file-watcher"):
+        self.paths = paths
+        self.callback = callback
+        self.interval = interval
+        self.name = name
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._applied = self.signature()
+
+    def signature(self) -> Signature:
+        result = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                result.append((stat.st_mtime, stat.st_size))
+            except OSError:
+                result.append(None)
+        return tuple(result)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def poll(self, previous: Signature) -> Signature:
+        """Checks once; returns the signature observed so the next poll can test for stability."""
+        current = self.signature()
+        if current != self._applied and current == previous:
+            self._applied = current
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"{self.name}: reload failed: {e}")
+        return current
+
+    def _run(self):
+        previous = self._applied
+        while not self._stop.wait(self.interval):
+            previous = self.poll(previous)
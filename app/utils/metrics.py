@@ -0,0 +1,301 @@
+import math
+import threading
+import time
+from threading import get_ident
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets in seconds, from 50us to 5s
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Shards:
+    """
+    Per-thread accumulators. Each thread only ever writes its own shard, so recording
+    needs no lock; readers sum the shards at scrape time.
+    """
+    __slots__ = ("size", "_shards", "_lock")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._shards: Dict[int, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def local(self) -> List[float]:
+        shard = self._shards.get(get_ident())
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(get_ident(), [0] * self.size)
+        return shard
+
+    def totals(self) -> List[float]:
+        totals = [0] * self.size
+        for shard in list(self._shards.values()):
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards.values():
+                shard[:] = [0] * self.size
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lookup: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._new_child()
+
+    def labels(self, *values):
+        """Returns the child for these label values; cache it on hot paths."""
+        child = self._lookup.get(values)
+        if child is None:
+            key = tuple(str(v) for v in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+                self._lookup[values] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _all_children(self) -> Iterable[Tuple[Dict[str, str], object]]:
+        if not self.labelnames:
+            yield {}, self._default
+        for key, child in list(self._children.items()):
+            yield dict(zip(self.labelnames, key)), child
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+class _CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1):
+        self._shards.local()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def samples(self) -> List[Sample]:
+        return [(self.name + "_total", labels, child.value) for labels, child in self._all_children()]
+
+class _GaugeChild:
+    __slots__ = ("_shards", "_base")
+
+    def __init__(self):
+        self._shards = _Shards(1)
+        self._base = 0
+
+    def inc(self, amount: float = 1):
+        self._shards.local()[0] += amount
+
+    def dec(self, amount: float = 1):
+        self._shards.local()[0] -= amount
+
+    def set(self, value: float):
+        self._shards.reset()
+        self._base = value
+
+    @property
+    def value(self) -> float:
+        return self._base + self._shards.totals()[0]
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def samples(self) -> List[Sample]:
+        return [(self.name, labels, child.value) for labels, child in self._all_children()]
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "_shards")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        # One slot per bucket, one for +Inf, then the running sum
+        self._shards = _Shards(len(upper_bounds) + 2)
+
+    def observe(self, value: float):
+        shard = self._shards.local()
+        shard[bisect_left(self.upper_bounds, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        totals = self._shards.totals()
+        return totals[:-1], totals[-1]
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; observe() is a bisect plus two additions on a per-thread shard."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        for labels, child in self._all_children():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds + (math.inf,), counts):
+                cumulative += count
+                samples.append((self.name + "_bucket", dict(labels, le=_format_value(bound)), cumulative))
+            samples.append((self.name + "_count", labels, cumulative))
+            samples.append((self.name + "_sum", labels, total))
+        return samples
+
+class Registry:
+    """In-process metric registry rendered in the Prometheus text exposition format."""
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], List[Tuple[str, str, str, List[Sample]]]]):
+        """Adds a callback returning (name, type, help, samples) families computed at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        families = [(m.name, m.type_name, m.documentation, m.samples()) for m in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        lines = []
+        for name, type_name, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {type_name}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# Application metrics
+STAGE_LATENCY = registry.histogram(
+    "credit_stage_duration_seconds", "Time spent in each stage of a credit check", ["stage"]
+)
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "End-to-end HTTP request latency", ["method", "route", "status"]
+)
+REQUESTS_IN_FLIGHT = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+INFERENCE_BATCH_SIZE = registry.histogram(
+    "credit_inference_batch_size", "Rows per model inference call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384)
+)
+DECISIONS = registry.counter("credit_decisions", "Credit decisions returned", ["decision"])
+RULE_HITS = registry.counter("credit_rule_hits", "Business rules that fired", ["category", "rule"])
+INFERENCE_SKIPPED = registry.counter(
+    "credit_inference_skipped", "Checks decided by an auto_reject rule without running the model"
+)
+SHADOW_SCORES = registry.histogram(
+    "credit_shadow_score", "Model scores computed in the background for checks rejected without the model",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency and in-flight requests. It also stamps
+    scope["state"]["received_at"] so handlers can measure time spent before they run.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        scope.setdefault("state", {})["received_at"] = start
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"], getattr(route, "path", "unmatched"), status[0]
+            ).observe(time.perf_counter() - start)
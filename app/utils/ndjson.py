@@ -0,0 +1,47 @@
+from typing import AsyncIterator, Optional
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Optional[bytes]]:
+    """
+    Splits a streamed body into lines without buffering more than one line. A line longer than
+    max_line_bytes is skipped and reported as None, so one bad record can't exhaust memory.
+    """
+    buffer = b""
+    discarding = False
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            end = buffer.find(b"\n")
+            if end < 0:
+                break
+            line, buffer = buffer[:end], buffer[end + 1:]
+            if discarding:
+                discarding = False
+                yield None
+            elif len(line) > max_line_bytes:
+                yield None
+            else:
+                yield line
+        if len(buffer) > max_line_bytes:
+            buffer = b""
+            discarding = True
+    if discarding:
+        yield None
+    elif buffer:
+        yield buffer
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streams newline-delimited JSON while the request body is still being read.
+
+    Starlette's StreamingResponse watches for disconnects by consuming receive(), which would
+    swallow request body chunks. Here the body iterator owns receive(); a client disconnect
+    surfaces as ClientDisconnect from request.stream() instead.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -1,9 +1,7 @@
+import math
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.impute import SimpleImputer
+from typing import Dict, Any, Optional
 
 def create_derived_features(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -54,10 +52,120 @@ def create_derived_features(df: pd.DataFrame) -> pd.DataFrame:
     
     return df
 
+INTEREST_RATE_MONTHLY = 0.025
+
+DERIVED_FEATURES = [
+    'estimated_monthly_payment', 'debt_to_income_ratio', 'loan_to_income_ratio',
+    'savings_to_loan_ratio', 'income_stability_score', 'repayment_history_score',
+    'total_monthly_income', 'affordability_ratio', 'is_new_client', 'age_group'
+]
+
+# (1 + r) ** n for every tenure the API accepts. Built with the same vectorized numpy power
+# as create_derived_features so the scalar path reproduces its results bit for bit.
+_ANNUITY_GROWTH = (1 + INTEREST_RATE_MONTHLY) ** np.arange(0, 61)
+
+def _annuity_growth(n) -> float:
+    if 0 <= n < len(_ANNUITY_GROWTH) and n == int(n):
+        return float(_ANNUITY_GROWTH[int(n)])
+    return float(((1 + INTEREST_RATE_MONTHLY) ** np.array([n]))[0])
+
+def _div(a, b) -> float:
+    # Mirrors numpy division semantics (inf/nan instead of ZeroDivisionError)
+    if b == 0:
+        if a == 0 or a != a:
+            return float('nan')
+        return float('inf') if (a > 0) == (math.copysign(1.0, b) > 0) else float('-inf')
+    return a / b
+
+def get_age_group(age) -> str:
+    if age <= 25: return 'young'
+    if age <= 45: return 'adult'
+    return 'senior'
+
+def derive_client_features(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Computes the derived features that depend only on the client profile.
+    """
+    return {
+        'income_stability_score': _div(record['years_at_current_job'], record['age']),
+        'repayment_history_score': record['previous_loans_repaid_on_time'] / max(record['num_previous_loans'], 1),
+        'total_monthly_income': record['monthly_income'] + record['other_income_amount'],
+        'is_new_client': int(record['num_previous_loans'] == 0),
+        'age_group': get_age_group(record['age'])
+    }
+
+def derive_features_record(record: Dict[str, Any], client_features: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Scalar equivalent of create_derived_features for a single record.
+    Returns the input record extended with the derived features, in the same column order.
+    """
+    if client_features is None:
+        client_features = derive_client_features(record)
+
+    amount = record['requested_loan_amount']
+    monthly_income = record['monthly_income']
+    existing_payment = record['existing_loan_monthly_payment']
+    total_monthly_income = client_features['total_monthly_income']
+
+    growth = _annuity_growth(record['loan_tenure_months'])
+    payment = _div(amount * INTEREST_RATE_MONTHLY * growth, growth - 1)
+
+    features = dict(record)
+    features['estimated_monthly_payment'] = payment
+    features['debt_to_income_ratio'] = _div(existing_payment + payment, monthly_income)
+    features['loan_to_income_ratio'] = _div(amount, monthly_income * 12)
+    features['savings_to_loan_ratio'] = _div(record['total_savings'], amount)
+    features['income_stability_score'] = client_features['income_stability_score']
+    features['repayment_history_score'] = client_features['repayment_history_score']
+    features['total_monthly_income'] = total_monthly_income
+    features['affordability_ratio'] = _div(total_monthly_income - existing_payment - payment, total_monthly_income)
+    features['is_new_client'] = client_features['is_new_client']
+    features['age_group'] = client_features['age_group']
+    return features
+
+def create_derived_features_fast(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Column-wise equivalent of create_derived_features without row-wise apply.
+    """
+    df = df.copy()
+
+    amount = df['requested_loan_amount'].to_numpy()
+    monthly_income = df['monthly_income'].to_numpy()
+    existing_payment = df['existing_loan_monthly_payment'].to_numpy()
+    num_previous_loans = df['num_previous_loans'].to_numpy()
+    age = df['age'].to_numpy()
+
+    growth = (1 + INTEREST_RATE_MONTHLY) ** df['loan_tenure_months'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payment = (amount * INTEREST_RATE_MONTHLY * growth) / (growth - 1)
+        total_monthly_income = monthly_income + df['other_income_amount'].to_numpy()
+
+        df['estimated_monthly_payment'] = payment
+        df['debt_to_income_ratio'] = (existing_payment + payment) / monthly_income
+        df['loan_to_income_ratio'] = amount / (monthly_income * 12)
+        df['savings_to_loan_ratio'] = df['total_savings'].to_numpy() / amount
+        df['income_stability_score'] = df['years_at_current_job'].to_numpy() / age
+        df['repayment_history_score'] = (
+            df['previous_loans_repaid_on_time'].to_numpy() / np.maximum(num_previous_loans, 1)
+        ).astype(np.float64)
+        df['total_monthly_income'] = total_monthly_income
+        df['affordability_ratio'] = (total_monthly_income - existing_payment - payment) / total_monthly_income
+
+    df['is_new_client'] = (num_previous_loans == 0).astype(int)
+    df['age_group'] = np.where(age <= 25, 'young', np.where(age <= 45, 'adult', 'senior')).astype(object)
+
+    return df
+
 def get_preprocessing_pipeline():
     """
     Returns the unified ColumnTransformer for the model.
     """
+    # Only needed for training; serving never builds a pipeline, so sklearn is imported lazily
+    from sklearn.preprocessing import StandardScaler, OneHotEncoder
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.impute import SimpleImputer
+
     numerical_features = [
         'age', 'years_at_current_job', 'monthly_income', 'other_income_amount',
         'total_savings', 'savings_account_age_months', 'average_monthly_deposit',
@@ -0,0 +1,31 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+class StartupState:
+    """
+    Tracks service readiness and how long each startup phase took (in milliseconds).
+    Created when app.main is first imported, so "imports" covers loading the application modules.
+    """
+    def __init__(self):
+        self.created_at = time.perf_counter()
+        self.ready = False
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    def mark(self, name: str):
+        """Records the time since this state was created as a phase."""
+        self.phases[name] = round((time.perf_counter() - self.created_at) * 1000, 1)
+
+    def mark_ready(self):
+        self.mark("total")
+        self.ready = True
+
+startup = StartupState()
@@ -0,0 +1,138 @@
+"""
+Encode/decode benchmarks for the wire formats of the check and batch endpoints.
+
+Compares FastAPI's default path (json.loads + model validation for bodies, response_model
+validation + jsonable dict + json.dumps for responses) with the negotiated codecs in
+app/utils/codecs.py: JSON through pydantic-core/orjson, msgpack, and columnar batch bodies.
+No model inference is involved; responses are synthetic.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_codecs.py
+    PYTHONPATH=. python benchmarks/bench_codecs.py --sizes 100 1000 --min-time 1
+"""
+import argparse
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Tuple
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from bench_hot_path import measure, summarize
+from app.schemas.credit import (
+    CreditCheckRequest, CreditCheckResponse, CreditFactor, BatchCreditCheckRequest, BatchCreditCheckResponse,
+    BatchItemResult
+)
+from app.services.decision_service import build_input_data
+from app.services.model_service import WARMUP_RECORD
+from app.utils import codecs
+from app.utils.codecs import JSON, MSGPACK
+from app.utils.columnar import CLIENT_FIELDS, LOAN_FIELDS, validate_columns, encode_results
+
+DEFAULT_SIZES = [1000]
+
+def sample_response() -> CreditCheckResponse:
+    return CreditCheckResponse(
+        decision="approved", credit_score=83.48, confidence="high", risk_level="low",
+        monthly_payment_estimate=912.5, debt_to_income_ratio=0.0487,
+        factors=[
+            CreditFactor(factor=name, impact="positive", contribution=points,
+                         description=f"{name} = 0.95 raised the credit score by {points} points")
+            for name, points in (("debt_to_income_ratio", 7.99), ("affordability_ratio", 4.72),
+                                 ("repayment_history_score", 3.58))
+        ],
+        recommendations=["Excellent repayment history with conservative loan request"],
+        rules_applied=["auto_approve: excellent_history"]
+    )
+
+def build_cases(sizes: List[int]) -> Dict[str, Tuple[int, Callable[[], Any]]]:
+    loop = asyncio.new_event_loop()
+    payload = {
+        "client": {k: WARMUP_RECORD[k] for k in CLIENT_FIELDS},
+        "loan": {k: WARMUP_RECORD[k] for k in LOAN_FIELDS}
+    }
+    response = sample_response()
+    response_field = create_response_field("Response_check", CreditCheckResponse, mode="serialization")
+    batch_field = create_response_field("Response_batch", BatchCreditCheckResponse, mode="serialization")
+
+    def fastapi_encode(field, value) -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=value))
+        return JSONResponse(content).body
+
+    body = json.dumps(payload).encode()
+    cases = {
+        "check decode: fastapi json": (1, lambda: CreditCheckRequest.model_validate(json.loads(body))),
+        "check decode: json codec": (1, lambda: JSON.decode_model(CreditCheckRequest, body)),
+        "check encode: fastapi json": (1, lambda: fastapi_encode(response_field, response)),
+        "check encode: json codec": (1, lambda: JSON.encode_model(response)),
+    }
+    if codecs.msgpack is not None:
+        packed = MSGPACK.encode(payload)
+        cases["check decode: msgpack"] = (1, lambda: MSGPACK.decode_model(CreditCheckRequest, packed))
+        cases["check encode: msgpack"] = (1, lambda: MSGPACK.encode_model(response))
+
+    for size in sizes:
+        rows = {"requests": [payload] * size}
+        columns = {"columns": {k: [WARMUP_RECORD[k]] * size for k in CLIENT_FIELDS + LOAN_FIELDS}}
+        responses = [response.model_copy(update={"request_id": str(i)}) for i in range(size)]
+        errors = [None] * size
+        rows_body, columns_body = json.dumps(rows).encode(), json.dumps(columns).encode()
+
+        def decode_rows(batch):
+            return [build_input_data(CreditCheckRequest.model_validate(item)) for item in batch.requests]
+
+        def batch_model():
+            return BatchCreditCheckResponse(total=size, succeeded=size, failed=0, results=[
+                BatchItemResult(index=i, response=r) for i, r in enumerate(responses)
+            ])
+
+        cases[f"batch decode: fastapi json rows[{size}]"] = (
+            size, lambda b=rows_body: decode_rows(BatchCreditCheckRequest.model_validate(json.loads(b)))
+        )
+        cases[f"batch decode: json codec rows[{size}]"] = (
+            size, lambda b=rows_body: decode_rows(JSON.decode_model(BatchCreditCheckRequest, b))
+        )
+        cases[f"batch decode: json columnar[{size}]"] = (
+            size, lambda b=columns_body: validate_columns(JSON.decode(b)["columns"])
+        )
+        cases[f"batch encode: fastapi json rows[{size}]"] = (
+            size, lambda m=batch_model: fastapi_encode(batch_field, m())
+        )
+        cases[f"batch encode: json codec rows[{size}]"] = (size, lambda m=batch_model: JSON.encode_model(m()))
+        cases[f"batch encode: json columnar[{size}]"] = (
+            size, lambda r=responses, e=errors: JSON.encode(encode_results(r, e))
+        )
+        if codecs.msgpack is not None:
+            packed_columns = MSGPACK.encode(columns)
+            cases[f"batch decode: msgpack columnar[{size}]"] = (
+                size, lambda b=packed_columns: validate_columns(MSGPACK.decode(b)["columns"])
+            )
+            cases[f"batch encode: msgpack columnar[{size}]"] = (
+                size, lambda r=responses, e=errors: MSGPACK.encode(encode_results(r, e))
+            )
+    return cases
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request/response codecs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Batch sizes to benchmark")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds to spend per case")
+    parser.add_argument("--min-repeats", type=int, default=3, help="Minimum repetitions per case")
+    args = parser.parse_args()
+
+    if codecs.orjson is None:
+        print("orjson is not installed; JSON dicts use the stdlib encoder")
+    if codecs.msgpack is None:
+        print("msgpack is not installed; skipping msgpack cases")
+
+    print(f"{'case':<52} {'median':>12} {'p95':>12} {'items/s':>14}")
+    for name, case in build_cases(args.sizes).items():
+        if args.filter and args.filter not in name:
+            continue
+        rows, fn = case
+        r = summarize(measure(fn, args.min_time, args.min_repeats), rows)
+        print(f"{name:<52} {r['median_s'] * 1e6:>10.1f}us {r['p95_s'] * 1e6:>10.1f}us {r['rows_per_s']:>14.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Micro-benchmarks for the scoring hot path.
+
+Measures feature engineering, model inference, rule evaluation and the full HTTP route
+(in-process ASGI client) at several batch sizes, writes the results to JSON and compares
+them with a saved baseline.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_hot_path.py --save-baseline
+    PYTHONPATH=. python benchmarks/bench_hot_path.py --tolerance 0.25
+
+Exits with status 1 when any case is slower (or has lower throughput) than the
+baseline by more than the tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Any, List
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from app.config import settings
+from app.utils.preprocessing import create_derived_features, create_derived_features_fast
+
+TRAINING_DATA_PATH = 'data/training_data.csv'
+DEFAULT_BASELINE = 'benchmarks/baseline.json'
+DEFAULT_SIZES = [1, 10, 100, 10000]
+
+CLIENT_FIELDS = [
+    'age', 'gender', 'marital_status', 'number_of_dependents', 'education_level', 'employment_type',
+    'employment_sector', 'years_at_current_job', 'monthly_income', 'has_other_income', 'other_income_amount',
+    'total_savings', 'savings_account_age_months', 'average_monthly_deposit', 'num_previous_loans',
+    'previous_loans_repaid_on_time', 'has_existing_loan', 'existing_loan_balance', 'existing_loan_monthly_payment'
+]
+LOAN_FIELDS = ['requested_loan_amount', 'loan_purpose', 'loan_tenure_months', 'has_guarantor', 'has_collateral']
+
+def load_records(n: int) -> List[Dict[str, Any]]:
+    if not os.path.exists(TRAINING_DATA_PATH):
+        sys.exit(f"{TRAINING_DATA_PATH} not found. Run ml/generate_training_data.py first.")
+    df = pd.read_csv(TRAINING_DATA_PATH).drop(columns=['credit_worthy'])
+    # Keep only applications the API would accept, then repeat rows to reach n
+    df = df[(df['requested_loan_amount'] <= 500000) & (df['age'] >= 18)]
+    repeats = -(-n // len(df))
+    return pd.concat([df] * repeats, ignore_index=True).head(n).to_dict(orient='records')
+
+def to_payload(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "client": {k: record[k] for k in CLIENT_FIELDS},
+        "loan": {k: record[k] for k in LOAN_FIELDS}
+    }
+
+def measure(fn: Callable[[], Any], min_time: float, min_repeats: int) -> List[float]:
+    fn()  # warm-up
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < min_repeats or time.perf_counter() - started < min_time:
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+def summarize(timings: List[float], rows: int) -> Dict[str, float]:
+    median = statistics.median(timings)
+    return {
+        "rows": rows,
+        "repeats": len(timings),
+        "median_s": median,
+        "p95_s": float(np.percentile(timings, 95)),
+        "rows_per_s": rows / median
+    }
+
+def build_cases(sizes: List[int]) -> Dict[str, Callable[[], Any]]:
+    from httpx import AsyncClient
+    from app.main import app
+    from app.routers import credit
+    from app.services.model_service import model_service
+    from app.services.rule_engine import RuleEngine
+
+    # The in-process client does not run the app lifespan, so load the model here
+    model_service.load_model()
+
+    # Measure real work, not cache hits, and allow the largest batch through the API
+    credit.decision_cache.enabled = False
+    settings.MAX_BATCH_SIZE = max(settings.MAX_BATCH_SIZE, max(sizes))
+
+    rule_engine = RuleEngine(settings.RULES_CONFIG_PATH)
+    headers = {"X-API-Key": settings.API_KEY}
+    loop = asyncio.new_event_loop()
+    cases = {}
+
+    for size in sizes:
+        records = load_records(size)
+        frame = pd.DataFrame(records)
+        features = create_derived_features_fast(frame).to_dict(orient='records')
+        payloads = [to_payload(r) for r in records]
+
+        cases[f"create_derived_features[{size}]"] = (size, lambda frame=frame: create_derived_features(frame))
+        cases[f"create_derived_features_fast[{size}]"] = (size, lambda frame=frame: create_derived_features_fast(frame))
+        if size == 1:
+            cases["model_service.predict[1]"] = (1, lambda r=records[0]: model_service.predict(r))
+        else:
+            cases[f"model_service.predict_batch[{size}]"] = (size, lambda records=records: model_service.predict_batch(records))
+        cases[f"rule_engine.check_rules[{size}]"] = (
+            size, lambda features=features: [rule_engine.check_rules(f) for f in features]
+        )
+
+        async def post_check(payloads=payloads):
+            async with AsyncClient(app=app, base_url="http://bench") as ac:
+                if len(payloads) == 1:
+                    response = await ac.post("/api/v1/credit/check", json=payloads[0], headers=headers)
+                else:
+                    response = await ac.post("/api/v1/credit/check/batch", json={"requests": payloads}, headers=headers)
+                response.raise_for_status()
+
+        route = "/api/v1/credit/check" if size == 1 else "/api/v1/credit/check/batch"
+        cases[f"POST {route}[{size}]"] = (size, lambda post_check=post_check: loop.run_until_complete(post_check()))
+
+        if 1 < size <= 100:
+            async def post_concurrent(payloads=payloads):
+                async with AsyncClient(app=app, base_url="http://bench") as ac:
+                    responses = await asyncio.gather(*[
+                        ac.post("/api/v1/credit/check", json=p, headers=headers) for p in payloads
+                    ])
+                for response in responses:
+                    response.raise_for_status()
+
+            cases[f"POST /api/v1/credit/check x{size} concurrent[{size}]"] = (
+                size, lambda post_concurrent=post_concurrent: loop.run_until_complete(post_concurrent())
+            )
+    return cases
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if current["median_s"] > reference["median_s"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: median {current['median_s'] * 1e3:.3f}ms vs baseline {reference['median_s'] * 1e3:.3f}ms"
+            )
+        elif current["rows_per_s"] < reference["rows_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {current['rows_per_s']:.0f} rows/s vs baseline {reference['rows_per_s']:.0f} rows/s"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the credit scoring hot path")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Batch sizes to benchmark")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds to spend per case")
+    parser.add_argument("--min-repeats", type=int, default=3, help="Minimum repetitions per case")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--output", default=None, help="Write this run's results to a JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown before failing")
+    args = parser.parse_args()
+
+    cases = build_cases(args.sizes)
+    results = {}
+    print(f"{'case':<62} {'median':>12} {'p95':>12} {'rows/s':>14}")
+    for name, (rows, fn) in cases.items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = summarize(measure(fn, args.min_time, args.min_repeats), rows)
+        r = results[name]
+        print(f"{name:<62} {r['median_s'] * 1e3:>10.3f}ms {r['p95_s'] * 1e3:>10.3f}ms {r['rows_per_s']:>14.0f}")
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "inference_engine": settings.INFERENCE_ENGINE
+        },
+        "results": results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {"meta": report["meta"], "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline["meta"] = report["meta"]
+        baseline["results"].update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%} tolerance:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%} tolerance against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,33 @@ else
     echo "Model found at ml/models/credit_model.joblib"
 fi
 
+WORKERS=${WORKERS:-1}
+
+# With several workers, serve the memory-mapped native export so workers share the model's pages
+if [ "$WORKERS" -gt 1 ]; then
+    export MODEL_MMAP=${MODEL_MMAP:-true}
+fi
+native_export_stale() {
+    [ ! -f "$1/meta.json" ] || [ "ml/models/credit_model.joblib" -nt "$1/meta.json" ]
+}
+if [ "${MODEL_MMAP:-false}" = "true" ]; then
+    # Training writes the export next to the model, so this is normally up to date
+    NATIVE_MODEL_DIR=${NATIVE_MODEL_DIR:-ml/models/native}
+    if native_export_stale "$NATIVE_MODEL_DIR" && [ ! -w "$(dirname "$NATIVE_MODEL_DIR")" ]; then
+        # The model directory is mounted read-only (docker-compose); export to the writable data directory
+        NATIVE_MODEL_DIR=data/native-model
+    fi
+    export NATIVE_MODEL_DIR
+    if native_export_stale "$NATIVE_MODEL_DIR"; then
+        echo "Exporting native model to $NATIVE_MODEL_DIR..."
+        mkdir -p "$(dirname "$NATIVE_MODEL_DIR")"
+        python ml/train_model.py --export-native --native-dir "$NATIVE_MODEL_DIR" || {
+            echo "Warning: could not export the native model, serving the pickled model instead"
+            export MODEL_MMAP=false
+        }
+    fi
+fi
+
 # Start the application
-echo "Starting FastAPI server..."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+echo "Starting FastAPI server with $WORKERS worker(s)..."
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers "$WORKERS"
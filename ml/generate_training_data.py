@@ -1,158 +1,271 @@
-import pandas as pd
-import numpy as np
-import uuid
+import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+# Base seed for reproducibility; every chunk gets its own child seed derived from it
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 100_000
+
+COLUMNS = [
+    'client_id', 'age', 'gender', 'marital_status', 'number_of_dependents', 'education_level',
+    'employment_type', 'employment_sector', 'years_at_current_job', 'monthly_income', 'has_other_income',
+    'other_income_amount', 'total_savings', 'savings_account_age_months', 'average_monthly_deposit',
+    'num_previous_loans', 'previous_loans_repaid_on_time', 'has_existing_loan', 'existing_loan_balance',
+    'existing_loan_monthly_payment', 'requested_loan_amount', 'loan_purpose', 'loan_tenure_months',
+    'has_guarantor', 'has_collateral', 'credit_worthy'
+]
+
+_HEX_DIGITS = np.frombuffer(b'0123456789abcdef', dtype='S1')
+# Positions of the 32 hex digits inside the 36-character 8-4-4-4-12 UUID layout
+_UUID_DIGIT_POSITIONS = np.array([i for i in range(36) if i not in (8, 13, 18, 23)])
+
+def _uuid4_strings(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Random version-4 UUID strings drawn from rng, so client ids are reproducible too."""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+
+    chars = np.full((n, 36), b'-', dtype='S1')
+    digits = np.empty((n, 32), dtype='S1')
+    digits[:, 0::2] = _HEX_DIGITS[raw >> 4]
+    digits[:, 1::2] = _HEX_DIGITS[raw & 0x0F]
+    chars[:, _UUID_DIGIT_POSITIONS] = digits
+    return chars.view('S36').ravel().astype(str).astype(object)
+
+def _choice(rng: np.random.Generator, options, n: int, p=None) -> np.ndarray:
+    return np.asarray(options, dtype=object)[rng.choice(len(options), size=n, p=p)]
+
+def generate_chunk(num_records: int, seed) -> pd.DataFrame:
+    """
+    Generates one chunk of synthetic clients, loan requests and credit_worthy labels
+    with column operations only. The same seed always yields the same chunk.
+    """
+    rng = np.random.default_rng(seed)
+    n = num_records
+
+    # Basic Info
+    client_id = _uuid4_strings(rng, n)
+    age = rng.integers(18, 66, size=n)
+    gender = _choice(rng, ['M', 'F'], n, p=[0.55, 0.45])
+    marital_status = _choice(rng, ['single', 'married', 'divorced', 'widowed'], n, p=[0.4, 0.5, 0.08, 0.02])
+    num_dependents = rng.integers(0, 11, size=n)
+    education_level = _choice(rng, ['none', 'basic', 'secondary', 'tertiary'], n, p=[0.1, 0.3, 0.4, 0.2])
+
+    # Employment
+    employment_type = _choice(rng, ['formal', 'informal', 'self_employed', 'unemployed'], n, p=[0.3, 0.4, 0.25, 0.05])
+    employment_sector = _choice(rng, ['government', 'private', 'agriculture', 'trading', 'other'], n, p=[0.15, 0.25, 0.3, 0.2, 0.1])
+    years_at_current_job = np.where(age > 18, np.round(rng.uniform(0, 1, n) * np.minimum(age - 18, 40), 1), 0.0)
+
+    # Income
+    monthly_income = np.clip(rng.lognormal(mean=7.5, sigma=0.8, size=n), 500, 50000) # Median ~1800 GHS
+
+    has_other_income = rng.random(n) < 0.3
+    other_income_amount = np.where(has_other_income, np.round(rng.uniform(0, 20000, n), 2), 0.0)
+
+    # Savings
+    total_savings = np.clip(rng.lognormal(mean=8.0, sigma=1.2, size=n), 0, 500000) # Median ~3000 GHS
+    savings_account_age_months = rng.integers(0, 241, size=n)
+    average_monthly_deposit = np.round(rng.uniform(0, 20000, n), 2)
+
+    # Loan History
+    num_previous_loans = rng.integers(0, 11, size=n)
+    # Uniform integer in [0, num_previous_loans]; always 0 for clients without loans
+    previous_loans_repaid_on_time = np.floor(rng.random(n) * (num_previous_loans + 1)).astype(np.int64)
+
+    has_existing_loan = rng.random(n) < 0.4
+    existing_loan_balance = np.where(has_existing_loan, np.round(rng.uniform(0, 200000, n), 2), 0.0)
+    existing_loan_monthly_payment = np.where(has_existing_loan, np.round(rng.uniform(0, 10000, n), 2), 0.0)
+
+    # Requested Loan
+    requested_loan_amount = np.clip(rng.lognormal(mean=9.0, sigma=1.0, size=n), 500, 200000) # Median ~8000 GHS
+    loan_purpose = _choice(rng, ['business', 'education', 'medical', 'housing', 'personal', 'agriculture'], n)
+    loan_tenure_months = rng.integers(3, 61, size=n)
+
+    has_guarantor = rng.random(n) < 0.6
+    has_collateral = rng.random(n) < 0.3
+
+    # Credit Worthiness Logic (Target)
+    score = np.zeros(n, dtype=np.int64)
+
+    # Income vs Loan
+    score += np.select(
+        [requested_loan_amount < monthly_income * 6, requested_loan_amount < monthly_income * 12], [20, 10], -20
+    )
 
-# Set seed for reproducibility
-np.random.seed(42)
+    # Tenure
+    score += np.where(years_at_current_job > 2, 15, 0)
 
-def generate_synthetic_data(num_records=10000):
+    # Savings
+    score += np.where(total_savings > monthly_income * 3, 15, 0)
+    score += np.where(savings_account_age_months > 12, 10, 0)
+
+    # History
+    repayment_ratio = previous_loans_repaid_on_time / np.maximum(num_previous_loans, 1)
+    history_points = np.select([repayment_ratio == 1.0, repayment_ratio > 0.8, repayment_ratio < 0.5], [25, 15, -30], 0)
+    score += np.where(num_previous_loans > 0, history_points, 0)
+
+    # Employment
+    score += np.select([employment_type == 'formal', employment_type == 'unemployed'], [15, -40], 0)
+
+    # Debt-to-income (simplified)
+    est_new_payment = requested_loan_amount / loan_tenure_months
+    dti = (existing_loan_monthly_payment + est_new_payment) / monthly_income
+    score += np.select([dti < 0.4, dti > 0.6], [20, -30], 0)
+
+    # Guarantor/Collateral
+    score += np.where(has_guarantor, 10, 0)
+    score += np.where(has_collateral, 15, 0)
+
+    # Age
+    score += np.where((age >= 21) & (age <= 60), 5, -10)
+
+    # Base threshold for approval is around 50 points; randomness for middle scores
+    middle_approved = (rng.random(n) < 0.6).astype(np.int64)
+    credit_worthy = np.select([score > 50, score < 30], [1, 0], middle_approved)
+
+    # Add realistic noise (flip 10% of labels)
+    credit_worthy = np.where(rng.random(n) < 0.10, 1 - credit_worthy, credit_worthy)
+
+    return pd.DataFrame({
+        'client_id': client_id,
+        'age': age,
+        'gender': gender,
+        'marital_status': marital_status,
+        'number_of_dependents': num_dependents,
+        'education_level': education_level,
+        'employment_type': employment_type,
+        'employment_sector': employment_sector,
+        'years_at_current_job': years_at_current_job,
+        'monthly_income': np.round(monthly_income, 2),
+        'has_other_income': has_other_income,
+        'other_income_amount': other_income_amount,
+        'total_savings': np.round(total_savings, 2),
+        'savings_account_age_months': savings_account_age_months,
+        'average_monthly_deposit': average_monthly_deposit,
+        'num_previous_loans': num_previous_loans,
+        'previous_loans_repaid_on_time': previous_loans_repaid_on_time,
+        'has_existing_loan': has_existing_loan,
+        'existing_loan_balance': existing_loan_balance,
+        'existing_loan_monthly_payment': existing_loan_monthly_payment,
+        'requested_loan_amount': np.round(requested_loan_amount, 2),
+        'loan_purpose': loan_purpose,
+        'loan_tenure_months': loan_tenure_months,
+        'has_guarantor': has_guarantor,
+        'has_collateral': has_collateral,
+        'credit_worthy': credit_worthy
+    }, columns=COLUMNS)
+
+def _ordered_map(fn, jobs, workers: int) -> Iterator:
+    """
+    Applies fn to each job tuple in order, optionally across processes. At most
+    2 * workers results are in flight, which keeps memory bounded.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield fn(*job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        window = []
+        for job in jobs:
+            window.append(executor.submit(fn, *job))
+            if len(window) >= 2 * workers:
+                yield window.pop(0).result()
+        for future in window:
+            yield future.result()
+
+def _chunk_jobs(num_records: int, chunk_size: int, seed: int):
+    # Chunk seeds are spawned from the base seed, so output doesn't depend on the worker count
+    sizes = [min(chunk_size, num_records - start) for start in range(0, num_records, chunk_size)]
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+def iter_chunks(num_records: int, chunk_size: int = DEFAULT_CHUNK_SIZE, seed: int = DEFAULT_SEED,
+                workers: int = 1) -> Iterator[pd.DataFrame]:
+    """Yields the dataset chunk by chunk, in order, identical for any number of workers."""
+    yield from _ordered_map(generate_chunk, _chunk_jobs(num_records, chunk_size, seed), workers)
+
+def _render_chunk(num_records: int, seed, header: bool, keep_frame: bool):
+    # CSV formatting is the expensive part, so it happens in the worker as well
+    chunk = generate_chunk(num_records, seed)
+    csv_text = chunk.to_csv(index=False, header=header)
+    return (chunk if keep_frame else None), csv_text, len(chunk), int(chunk['credit_worthy'].sum())
+
+def generate_synthetic_data(num_records: int = 10000, output_path: Optional[str] = 'data/training_data.csv',
+                            parquet_path: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            workers: int = 1, seed: int = DEFAULT_SEED) -> Dict[str, float]:
+    """
+    Generates num_records rows and streams them to CSV and/or Parquet without holding
+    the whole dataset in memory. Returns the row count and share of credit-worthy rows.
+    """
     print(f"Generating {num_records} synthetic records...")
-    
-    data = []
-    for _ in range(num_records):
-        # Basic Info
-        client_id = str(uuid.uuid4())
-        age = np.random.randint(18, 66)
-        gender = np.random.choice(['M', 'F'], p=[0.55, 0.45])
-        marital_status = np.random.choice(['single', 'married', 'divorced', 'widowed'], p=[0.4, 0.5, 0.08, 0.02])
-        num_dependents = np.random.randint(0, 11)
-        education_level = np.random.choice(['none', 'basic', 'secondary', 'tertiary'], p=[0.1, 0.3, 0.4, 0.2])
-        
-        # Employment
-        employment_type = np.random.choice(['formal', 'informal', 'self_employed', 'unemployed'], p=[0.3, 0.4, 0.25, 0.05])
-        employment_sector = np.random.choice(['government', 'private', 'agriculture', 'trading', 'other'], p=[0.15, 0.25, 0.3, 0.2, 0.1])
-        years_at_current_job = round(float(np.random.uniform(0, min(age - 18, 40))), 1) if age > 18 else 0
-        
-        # Income
-        monthly_income = float(np.random.lognormal(mean=7.5, sigma=0.8)) # Median ~1800 GHS
-        monthly_income = np.clip(monthly_income, 500, 50000)
-        
-        has_other_income = np.random.choice([True, False], p=[0.3, 0.7])
-        other_income_amount = round(float(np.random.uniform(0, 20000)), 2) if has_other_income else 0.0
-        
-        # Savings
-        total_savings = float(np.random.lognormal(mean=8.0, sigma=1.2)) # Median ~3000 GHS
-        total_savings = np.clip(total_savings, 0, 500000)
-        savings_account_age_months = np.random.randint(0, 241)
-        average_monthly_deposit = round(float(np.random.uniform(0, 20000)), 2)
-        
-        # Loan History
-        num_previous_loans = np.random.randint(0, 11)
-        if num_previous_loans > 0:
-            previous_loans_repaid_on_time = np.random.randint(0, num_previous_loans + 1)
-        else:
-            previous_loans_repaid_on_time = 0
-            
-        has_existing_loan = np.random.choice([True, False], p=[0.4, 0.6])
-        if has_existing_loan:
-            existing_loan_balance = round(float(np.random.uniform(0, 200000)), 2)
-            existing_loan_monthly_payment = round(float(np.random.uniform(0, 10000)), 2)
-        else:
-            existing_loan_balance = 0.0
-            existing_loan_monthly_payment = 0.0
-            
-        # Requested Loan
-        requested_loan_amount = float(np.random.lognormal(mean=9.0, sigma=1.0)) # Median ~8000 GHS
-        requested_loan_amount = np.clip(requested_loan_amount, 500, 200000)
-        loan_purpose = np.random.choice(['business', 'education', 'medical', 'housing', 'personal', 'agriculture'])
-        loan_tenure_months = np.random.randint(3, 61)
-        
-        has_guarantor = np.random.choice([True, False], p=[0.6, 0.4])
-        has_collateral = np.random.choice([True, False], p=[0.3, 0.7])
-        
-        # Credit Worthiness Logic (Target)
-        score = 0
-        
-        # Income vs Loan
-        if requested_loan_amount < monthly_income * 6: score += 20
-        elif requested_loan_amount < monthly_income * 12: score += 10
-        else: score -= 20
-        
-        # Tenure
-        if years_at_current_job > 2: score += 15
-        
-        # Savings
-        if total_savings > monthly_income * 3: score += 15
-        if savings_account_age_months > 12: score += 10
-        
-        # History
-        if num_previous_loans > 0:
-            repayment_ratio = previous_loans_repaid_on_time / num_previous_loans
-            if repayment_ratio == 1.0: score += 25
-            elif repayment_ratio > 0.8: score += 15
-            elif repayment_ratio < 0.5: score -= 30
-        
-        # Employment
-        if employment_type == 'formal': score += 15
-        elif employment_type == 'unemployed': score -= 40
-        
-        # Debt-to-income (simplified)
-        est_new_payment = requested_loan_amount / loan_tenure_months
-        dti = (existing_loan_monthly_payment + est_new_payment) / monthly_income
-        if dti < 0.4: score += 20
-        elif dti > 0.6: score -= 30
-        
-        # Guarantor/Collateral
-        if has_guarantor: score += 10
-        if has_collateral: score += 15
-        
-        # Age
-        if 21 <= age <= 60: score += 5
-        else: score -= 10
-        
-        # Base threshold for approval is around 50 points
-        if score > 50:
-            credit_worthy = 1
-        elif score < 30:
-            credit_worthy = 0
-        else:
-            # Randomness for middle scores
-            credit_worthy = np.random.choice([0, 1], p=[0.4, 0.6])
-            
-        # Add realistic noise (flip 10% of labels)
-        if np.random.random() < 0.10:
-            credit_worthy = 1 - credit_worthy
-            
-        record = {
-            'client_id': client_id,
-            'age': age,
-            'gender': gender,
-            'marital_status': marital_status,
-            'number_of_dependents': num_dependents,
-            'education_level': education_level,
-            'employment_type': employment_type,
-            'employment_sector': employment_sector,
-            'years_at_current_job': years_at_current_job,
-            'monthly_income': round(monthly_income, 2),
-            'has_other_income': has_other_income,
-            'other_income_amount': other_income_amount,
-            'total_savings': round(total_savings, 2),
-            'savings_account_age_months': savings_account_age_months,
-            'average_monthly_deposit': average_monthly_deposit,
-            'num_previous_loans': num_previous_loans,
-            'previous_loans_repaid_on_time': previous_loans_repaid_on_time,
-            'has_existing_loan': has_existing_loan,
-            'existing_loan_balance': existing_loan_balance,
-            'existing_loan_monthly_payment': existing_loan_monthly_payment,
-            'requested_loan_amount': round(requested_loan_amount, 2),
-            'loan_purpose': loan_purpose,
-            'loan_tenure_months': loan_tenure_months,
-            'has_guarantor': has_guarantor,
-            'has_collateral': has_collateral,
-            'credit_worthy': credit_worthy
-        }
-        data.append(record)
-        
-    df = pd.DataFrame(data)
-    
-    # Save to CSV
-    os.makedirs('data', exist_ok=True)
-    df.to_csv('data/training_data.csv', index=False)
-    print(f"Data saved to data/training_data.csv. Shape: {df.shape}")
-    print(f"Class distribution:\n{df['credit_worthy'].value_counts(normalize=True)}")
-    
-    return df
+
+    if parquet_path:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow: pip install pyarrow")
+
+    for path in (output_path, parquet_path):
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    jobs = [
+        (size, chunk_seed, i == 0, parquet_path is not None)
+        for i, (size, chunk_seed) in enumerate(_chunk_jobs(num_records, chunk_size, seed))
+    ]
+
+    rows = 0
+    positives = 0
+    csv_file = open(output_path, 'w', newline='') if output_path else None
+    parquet_writer = None
+    try:
+        for chunk, csv_text, chunk_rows, chunk_positives in _ordered_map(_render_chunk, jobs, workers):
+            if csv_file is not None:
+                csv_file.write(csv_text)
+            if parquet_path:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(parquet_path, table.schema)
+                parquet_writer.write_table(table)
+            rows += chunk_rows
+            positives += chunk_positives
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+        if parquet_writer is not None:
+            parquet_writer.close()
+
+    for path in (output_path, parquet_path):
+        if path:
+            print(f"Data saved to {path}. Shape: ({rows}, {len(COLUMNS)})")
+    positive_rate = positives / max(rows, 1)
+    print(f"Class distribution: credit_worthy=1 {positive_rate:.4f}, credit_worthy=0 {1 - positive_rate:.4f}")
+
+    return {"rows": rows, "positive_rate": positive_rate}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic credit training data")
+    parser.add_argument("--rows", type=int, default=10000, help="Number of records to generate")
+    parser.add_argument("--output", default="data/training_data.csv", help="CSV output path ('' to skip CSV)")
+    parser.add_argument("--parquet", default=None, help="Also write Parquet to this path (requires pyarrow)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows generated per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Processes generating chunks in parallel")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Base random seed")
+    args = parser.parse_args()
+
+    generate_synthetic_data(
+        num_records=args.rows,
+        output_path=args.output or None,
+        parquet_path=args.parquet,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        seed=args.seed
+    )
 
 if __name__ == "__main__":
-    generate_synthetic_data()
+    main()
@@ -1,20 +1,43 @@
+import argparse
+import hashlib
+import inspect
+import io
 import pandas as pd
 import numpy as np
 import joblib
 import json
 import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, confusion_matrix
 from app.utils.preprocessing import create_derived_features, get_preprocessing_pipeline
+from app.services.tree_engine import ForestEngine
 
-def train_model():
+def build_classifier(n_estimators: int = 100) -> RandomForestClassifier:
+    # Model parameters optimized for VPS
+    return RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=10,
+        min_samples_split=10,
+        min_samples_leaf=5,
+        random_state=42
+    )
+
+def split_holdout(X: pd.DataFrame, y: pd.Series):
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+def train_model(data_path: str = 'data/training_data.csv'):
     print("Loading data...")
-    if not os.path.exists('data/training_data.csv'):
-        print("Error: data/training_data.csv not found. Run generate_training_data.py first.")
+    if not os.path.exists(data_path):
+        print(f"Error: {data_path} not found. Run generate_training_data.py first.")
         return
     
-    df = pd.read_csv('data/training_data.csv')
+    df = pd.read_csv(data_path)
     
     print("Engineering features...")
     df = create_derived_features(df)
@@ -24,20 +47,13 @@ def train_model():
     y = df['credit_worthy']
     
     # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    X_train, X_test, y_train, y_test = split_holdout(X, y)
     
     print("Creating preprocessing pipeline...")
     preprocessor = get_preprocessing_pipeline()
     
     print("Training Random Forest model...")
-    # Model parameters optimized for VPS
-    model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=10,
-        min_samples_split=10,
-        min_samples_leaf=5,
-        random_state=42
-    )
+    model = build_classifier()
     
     # Create full pipeline
     clf = Pipeline(steps=[
@@ -49,6 +65,10 @@ def train_model():
     clf.fit(X_train, y_train)
     
     print("Evaluating model...")
+    metrics = evaluate(clf, X_test, y_test)
+    save_artifacts(clf, metrics, n_training_rows=len(X_train))
+
+def evaluate(clf, X_test: pd.DataFrame, y_test: pd.Series) -> Dict[str, float]:
     y_pred = clf.predict(X_test)
     y_prob = clf.predict_proba(X_test)[:, 1]
     
@@ -61,16 +81,32 @@ def train_model():
     }
     
     print(f"Metrics: {json.dumps(metrics, indent=2)}")
-    
+    return metrics
+
+def save_artifacts(clf, metrics: Dict[str, float], n_training_rows: int, model_dir: str = 'ml/models'):
+    preprocessor = clf.named_steps['preprocessor']
+    model = clf.named_steps['classifier']
+
     # Save artifacts
-    os.makedirs('ml/models', exist_ok=True)
+    os.makedirs(model_dir, exist_ok=True)
     
     # Save the full pipeline (preprocessor + classifier)
-    joblib.dump(clf, 'ml/models/credit_model.joblib')
+    model_path = os.path.join(model_dir, 'credit_model.joblib')
+    joblib.dump(clf, model_path)
+    export_native(clf, model_path)
+    export_compact(clf, model_path)
     
     # Save metrics
-    with open('ml/models/model_metrics.json', 'w') as f:
+    with open(os.path.join(model_dir, 'model_metrics.json'), 'w') as f:
         json.dump(metrics, f, indent=2)
+    
+    # Save training metadata (reported by the API as ModelInfo.training_date)
+    with open(os.path.join(model_dir, 'model_metadata.json'), 'w') as f:
+        json.dump({
+            'training_date': datetime.now().isoformat(timespec='seconds'),
+            'n_training_rows': int(n_training_rows),
+            'n_estimators': len(model.estimators_)
+        }, f, indent=2)
         
     # Get feature importance
     # We need to get feature names after one-hot encoding
@@ -85,11 +121,361 @@ def train_model():
     # Sort by importance
     feature_importance_dict = {k: v for k, v in sorted(feature_importance_dict.items(), key=lambda item: item[1], reverse=True)}
     
-    with open('ml/models/feature_importance.json', 'w') as f:
+    with open(os.path.join(model_dir, 'feature_importance.json'), 'w') as f:
         json.dump(feature_importance_dict, f, indent=2)
         
-    print("Model and artifacts saved to ml/models/")
+    print(f"Model and artifacts saved to {model_dir}/")
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def export_native(clf, model_path: str, output_dir: Optional[str] = None):
+    """Writes the memory-mappable native engine export used when serving with MODEL_MMAP."""
+    output_dir = output_dir or os.path.join(os.path.dirname(model_path), 'native')
+    ForestEngine.from_pipeline(clf).save(output_dir, source_sha256=_file_sha256(model_path))
+    print(f"Native model export saved to {output_dir}/")
+
+# Compact export
+#
+# A single pickle-free .npz (see ForestEngine.save_compact) that can be served directly by pointing
+# MODEL_PATH at it. Optionally, subtrees that barely move the forest's probability are collapsed
+# into leaves, as long as holdout accuracy drops by at most the given budget.
+
+COMPACT_MODEL_NAME = 'credit_model.npz'
+
+def node_gains(engine: ForestEngine, node_weight: np.ndarray) -> np.ndarray:
+    """
+    For every node, the expected absolute change in the forest's probability (over the training
+    distribution) if its subtree were collapsed into a leaf. Leaves have zero gain.
+    """
+    n_nodes = len(engine.feature)
+    node_ids = np.arange(n_nodes)
+    internal = engine.left != node_ids
+    parent = np.full(n_nodes, -1, dtype=np.intp)
+    parent[engine.left[internal]] = node_ids[internal]
+    parent[engine.right[internal]] = node_ids[internal]
+    tree_start = np.repeat(engine.roots, np.diff(np.append(engine.roots, n_nodes)))
+
+    # Each leaf adds its share of the tree's samples times its distance from every ancestor's value
+    leaves = np.flatnonzero(~internal)
+    share = node_weight[leaves] / node_weight[tree_start[leaves]]
+    gains = np.zeros(n_nodes, dtype=np.float64)
+    ancestors = parent[leaves]
+    while (ancestors >= 0).any():
+        has_ancestor = ancestors >= 0
+        leaf, ancestor = leaves[has_ancestor], ancestors[has_ancestor]
+        np.add.at(gains, ancestor, share[has_ancestor] * np.abs(engine.value[leaf] - engine.value[ancestor]))
+        ancestors = np.where(has_ancestor, parent[np.maximum(ancestors, 0)], -1)
+    return gains / engine.n_trees
+
+def _accuracy(engine: ForestEngine, X: np.ndarray, y: np.ndarray) -> float:
+    # Same decision as the classifier's predict: class 1 only when its probability wins outright
+    return float(np.mean((engine.predict_proba(X) > 0.5) == y))
+
+def prune_forest(engine: ForestEngine, node_weight: np.ndarray, X_val: np.ndarray, y_val: np.ndarray,
+                 max_accuracy_loss: float) -> Tuple[ForestEngine, Dict[str, Any]]:
+    """
+    Collapses every subtree whose gain is below a cutoff. The cutoff is the largest (found by
+    bisection over gain quantiles) that keeps holdout accuracy within max_accuracy_loss.
+    """
+    gains = node_gains(engine, node_weight)
+    internal = engine.left != np.arange(len(engine.feature))
+    candidates = np.unique(np.quantile(gains[internal], np.linspace(0, 1, 129)))
+    baseline = _accuracy(engine, X_val, y_val)
+
+    def pruned_at(cutoff: float) -> ForestEngine:
+        return engine.collapse(np.flatnonzero(internal & (gains < cutoff)))
+
+    # candidates[lo] is known to fit the budget (lo = -1: no pruning); candidates[hi] is not
+    lo, hi = -1, len(candidates)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if baseline - _accuracy(pruned_at(candidates[mid]), X_val, y_val) <= max_accuracy_loss:
+            lo = mid
+        else:
+            hi = mid
+    pruned = pruned_at(candidates[lo]) if lo >= 0 else engine
+    report = {
+        'max_accuracy_loss': max_accuracy_loss,
+        'gain_cutoff': float(candidates[lo]) if lo >= 0 else 0.0,
+        'nodes_before': int(len(engine.feature)),
+        'nodes_after': int(len(pruned.feature)),
+        'max_depth_after': int(pruned.max_depth),
+        'accuracy_before': baseline,
+        'accuracy_after': _accuracy(pruned, X_val, y_val),
+        'max_probability_change': float(np.max(np.abs(pruned.predict_proba(X_val) - engine.predict_proba(X_val))))
+    }
+    print(f"Pruned {report['nodes_before']} -> {report['nodes_after']} nodes, holdout accuracy "
+          f"{report['accuracy_before']:.4f} -> {report['accuracy_after']:.4f}")
+    return pruned, report
+
+def export_compact(clf, model_path: str, output_path: Optional[str] = None, X_val: Optional[pd.DataFrame] = None,
+                   y_val: Optional[pd.Series] = None, max_accuracy_loss: Optional[float] = None) -> str:
+    """Writes the compact single-file export, pruned when a holdout set and accuracy budget are given."""
+    output_path = output_path or os.path.join(os.path.dirname(model_path), COMPACT_MODEL_NAME)
+    engine = ForestEngine.from_pipeline(clf)
+    extra_meta = {}
+    if max_accuracy_loss is not None and X_val is not None:
+        forest = clf.named_steps['classifier']
+        node_weight = np.concatenate([e.tree_.weighted_n_node_samples for e in forest.estimators_])
+        engine, extra_meta['pruning'] = prune_forest(
+            engine, node_weight, engine.transform(X_val), np.asarray(y_val), max_accuracy_loss
+        )
+    engine.save_compact(output_path, source_sha256=_file_sha256(model_path), extra_meta=extra_meta)
+    print(f"Compact model export saved to {output_path} ({os.path.getsize(output_path) / 1024:.0f} KB)")
+    return output_path
+
+def _median_seconds(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+def compare_formats(model_path: str, compact_paths: Dict[str, str],
+                    X_sample: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """Prints artifact size, load time and single/batch latency of the pickled model vs compact exports."""
+    single = X_sample.iloc[:1]
+    batch = X_sample.iloc[:1000]
+    single_records = single.to_dict(orient='records')
+    clf = joblib.load(model_path)
+    report = {
+        'joblib (sklearn)': {
+            'size_kb': os.path.getsize(model_path) / 1024,
+            'load_ms': _median_seconds(lambda: joblib.load(model_path), 3) * 1000,
+            'single_ms': _median_seconds(lambda: clf.predict_proba(single), 50) * 1000,
+            'batch_1000_ms': _median_seconds(lambda: clf.predict_proba(batch), 5) * 1000,
+        }
+    }
+    for name, path in compact_paths.items():
+        engine = ForestEngine.load_compact(path)
+        report[name] = {
+            'size_kb': os.path.getsize(path) / 1024,
+            'load_ms': _median_seconds(lambda: ForestEngine.load_compact(path), 10) * 1000,
+            'single_ms': _median_seconds(lambda: engine.predict(single_records), 50) * 1000,
+            'batch_1000_ms': _median_seconds(lambda: engine.predict(batch), 5) * 1000,
+        }
+    print(f"{'format':<20}{'size KB':>10}{'load ms':>10}{'single ms':>11}{'batch 1000 ms':>15}")
+    for name, row in report.items():
+        print(f"{name:<20}{row['size_kb']:>10.0f}{row['load_ms']:>10.1f}{row['single_ms']:>11.2f}"
+              f"{row['batch_1000_ms']:>15.1f}")
+    return report
+
+# Incremental training
+#
+# The data file is split into blocks of block_size rows, each identified by a hash of its raw
+# CSV text. Engineered features are cached on disk per block hash, and a manifest next to the
+# model records which trees were trained on which block. A rerun reuses the trees of unchanged
+# blocks and warm-starts the forest with new trees only for blocks that are new or changed.
+
+MANIFEST_NAME = 'tree_manifest.json'
+# Cached features are only valid for the feature engineering code that produced them
+FEATURES_VERSION = hashlib.sha256(inspect.getsource(create_derived_features).encode()).hexdigest()[:12]
+
+def iter_csv_blocks(data_path: str, block_size: int) -> Iterator[Tuple[str, str, int]]:
+    """Yields (hash, csv_text, rows) for each block of block_size data rows, without parsing them."""
+    with open(data_path, 'r', newline='') as f:
+        header = f.readline()
+        while True:
+            lines = [line for _, line in zip(range(block_size), f)]
+            if not lines:
+                return
+            text = header + ''.join(lines)
+            yield hashlib.sha256(text.encode()).hexdigest(), text, len(lines)
+
+def load_block_features(block_hash: str, text: str, cache_dir: str) -> Tuple[pd.DataFrame, bool]:
+    """Returns the engineered features of a block and whether they came from the cache."""
+    path = os.path.join(cache_dir, f"{block_hash[:32]}-{FEATURES_VERSION}.pkl")
+    if os.path.exists(path):
+        return pd.read_pickle(path), True
+
+    df = create_derived_features(pd.read_csv(io.StringIO(text)))
+    tmp_path = f"{path}.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+    return df, False
+
+def split_block(df: pd.DataFrame):
+    X = df.drop(columns=['client_id', 'credit_worthy'])
+    y = df['credit_worthy']
+    if len(df) < 10:
+        # Too small to hold anything out
+        return X, X.iloc[:0], y, y.iloc[:0]
+    stratify = y if y.nunique() == 2 and y.value_counts().min() >= 2 else None
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=stratify)
+
+def trees_for_block(rows: int, block_size: int, trees_per_block: int) -> int:
+    # A partial (most recent) block gets proportionally fewer trees, so every row carries the same weight
+    return max(1, round(trees_per_block * rows / block_size))
+
+def read_manifest(model_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(model_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def train_incremental(data_path: str = 'data/training_data.csv', model_dir: str = 'ml/models',
+                      cache_dir: str = 'data/feature_cache', block_size: int = 5000, trees_per_block: int = 25,
+                      rebuild: bool = False) -> Dict[str, Any]:
+    """
+    Updates the model in model_dir for the current contents of data_path, training trees only
+    for new or changed blocks. Falls back to a full rebuild (refitting the preprocessor) when
+    there is no matching manifest, the block settings or feature code changed, or rebuild is set.
+    """
+    start = time.perf_counter()
+    if not os.path.exists(data_path):
+        print(f"Error: {data_path} not found. Run generate_training_data.py first.")
+        return {}
+    os.makedirs(cache_dir, exist_ok=True)
+    model_path = os.path.join(model_dir, 'credit_model.joblib')
+
+    # 1. Hash the blocks and load their engineered features (cached per block hash)
+    print("Loading data...")
+    blocks = []
+    for block_hash, text, rows in iter_csv_blocks(data_path, block_size):
+        df, cached = load_block_features(block_hash, text, cache_dir)
+        X_train, X_test, y_train, y_test = split_block(df)
+        blocks.append({
+            'hash': block_hash, 'rows': rows, 'cached': cached,
+            'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test
+        })
+    features_cached = sum(block['cached'] for block in blocks)
+    print(f"{len(blocks)} blocks, engineered features reused from cache for {features_cached}")
+
+    # 2. Reuse the current model if the manifest describes it and the block settings still match
+    manifest = read_manifest(model_dir)
+    reusable = (
+        not rebuild and manifest is not None and os.path.exists(model_path)
+        and manifest.get('model_sha256') == _file_sha256(model_path)
+        and manifest.get('features_version') == FEATURES_VERSION
+        and manifest.get('block_size') == block_size
+        and manifest.get('trees_per_block') == trees_per_block
+    )
+    trees_by_hash = {}
+    if reusable:
+        clf = joblib.load(model_path)
+        preprocessor = clf.named_steps['preprocessor']
+        forest = clf.named_steps['classifier']
+        offset = 0
+        for entry in manifest['blocks']:
+            trees_by_hash[entry['hash']] = forest.estimators_[offset:offset + entry['trees']]
+            offset += entry['trees']
+    else:
+        print("Rebuilding: fitting preprocessing pipeline on all training rows...")
+        preprocessor = get_preprocessing_pipeline()
+        preprocessor.fit(pd.concat([block['X_train'] for block in blocks]))
+        forest = build_classifier()
+
+    entries = []
+    kept_trees = []
+    pending = []
+    for block in blocks:
+        if block['hash'] in trees_by_hash:
+            kept_trees.extend(trees_by_hash[block['hash']])
+            entries.append({'hash': block['hash'], 'rows': block['rows'], 'trees': len(trees_by_hash[block['hash']])})
+        else:
+            pending.append(block)
+
+    if reusable and not pending and len(kept_trees) == len(forest.estimators_):
+        print("Training data unchanged; model is up to date.")
+        return {'blocks': len(blocks), 'trained_blocks': 0, 'reused_blocks': len(entries),
+                'n_estimators': len(kept_trees), 'seconds': round(time.perf_counter() - start, 3)}
+
+    # 3. Warm start: keep the unchanged blocks' trees and add new trees per new or changed block
+    forest.estimators_ = kept_trees
+    forest.n_estimators = len(kept_trees)
+    forest.warm_start = True
+    trained = []
+    for block in pending:
+        if block['y_train'].nunique() < 2:
+            print(f"Skipping block {block['hash'][:12]}: needs both classes to train")
+            continue
+        n_trees = trees_for_block(block['rows'], block_size, trees_per_block)
+        forest.n_estimators += n_trees
+        forest.fit(preprocessor.transform(block['X_train']), block['y_train'])
+        entries.append({'hash': block['hash'], 'rows': block['rows'], 'trees': n_trees})
+        trained.append(block['hash'])
+    forest.warm_start = False
+    if not forest.estimators_:
+        print("Error: no block could be trained.")
+        return {}
+    print(f"Trained {len(trained)} blocks, reused trees of {len(entries) - len(trained)} blocks "
+          f"({forest.n_estimators} trees total)")
+
+    # 4. Evaluate on the union of the per-block holdouts and save
+    print("Evaluating model...")
+    clf = Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('classifier', forest)
+    ])
+    trained_hashes = {entry['hash'] for entry in entries}
+    used = [block for block in blocks if block['hash'] in trained_hashes]
+    metrics = evaluate(clf, pd.concat([b['X_test'] for b in used]), pd.concat([b['y_test'] for b in used]))
+    save_artifacts(clf, metrics, n_training_rows=sum(len(b['X_train']) for b in used), model_dir=model_dir)
+
+    manifest = {
+        'model_sha256': _file_sha256(model_path),
+        'features_version': FEATURES_VERSION,
+        'block_size': block_size,
+        'trees_per_block': trees_per_block,
+        'blocks': entries
+    }
+    with open(os.path.join(model_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    seconds = time.perf_counter() - start
+    print(f"Incremental training finished in {seconds:.2f}s")
+    return {'blocks': len(blocks), 'trained_blocks': len(trained), 'reused_blocks': len(entries) - len(trained),
+            'n_estimators': forest.n_estimators, 'seconds': round(seconds, 3), 'metrics': metrics}
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the credit worthiness model")
+    parser.add_argument("--data", default="data/training_data.csv", help="Training data CSV")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only train trees for new or changed blocks of the data, reusing the rest")
+    parser.add_argument("--model-dir", default="ml/models", help="Artifact directory (incremental mode)")
+    parser.add_argument("--cache-dir", default="data/feature_cache", help="Engineered feature cache (incremental mode)")
+    parser.add_argument("--block-size", type=int, default=5000, help="Rows per block (incremental mode)")
+    parser.add_argument("--trees-per-block", type=int, default=25, help="Trees per full block (incremental mode)")
+    parser.add_argument("--rebuild", action="store_true", help="Retrain every block (incremental mode)")
+    parser.add_argument("--export-native", action="store_true",
+                        help="Only re-export the existing model for memory-mapped serving (MODEL_MMAP)")
+    parser.add_argument("--native-dir", default=None,
+                        help="With --export-native: output directory (default: <model-dir>/native)")
+    parser.add_argument("--export-compact", action="store_true",
+                        help="Only re-export the existing model to the compact .npz format and compare it")
+    parser.add_argument("--prune-budget", type=float, default=None,
+                        help="With --export-compact: prune subtrees while holdout accuracy drops by at most this much")
+    args = parser.parse_args()
+
+    if args.export_compact:
+        model_path = os.path.join(args.model_dir, 'credit_model.joblib')
+        # The same holdout rows train_model evaluates on
+        df = create_derived_features(pd.read_csv(args.data))
+        _, X_val, _, y_val = split_holdout(df.drop(columns=['client_id', 'credit_worthy']), df['credit_worthy'])
+        clf = joblib.load(model_path)
+        compact_path = export_compact(clf, model_path, X_val=X_val, y_val=y_val, max_accuracy_loss=args.prune_budget)
+        if args.prune_budget is None:
+            compare_formats(model_path, {'compact': compact_path}, X_val)
+        else:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                unpruned_path = export_compact(clf, model_path, output_path=os.path.join(tmp_dir, COMPACT_MODEL_NAME))
+                compare_formats(model_path, {'compact (unpruned)': unpruned_path, 'compact (pruned)': compact_path},
+                                X_val)
+    elif args.export_native:
+        model_path = os.path.join(args.model_dir, 'credit_model.joblib')
+        export_native(joblib.load(model_path), model_path, output_dir=args.native_dir)
+    elif args.incremental:
+        train_incremental(args.data, model_dir=args.model_dir, cache_dir=args.cache_dir, block_size=args.block_size,
+                          trees_per_block=args.trees_per_block, rebuild=args.rebuild)
+    else:
+        train_model(args.data)
 
 if __name__ == "__main__":
-    from sklearn.pipeline import Pipeline # Need to import here for main block
-    train_model()
+    main()
@@ -0,0 +1,238 @@
+"""
+Concurrency load test for the credit check API.
+
+Builds CreditCheckRequest payloads from the same distributions as
+ml/generate_training_data.py and drives POST /api/v1/credit/check either closed-loop
+(fixed number of concurrent clients) or open-loop (Poisson arrivals at a fixed rate).
+Reports throughput, latency percentiles, error rate and the server's peak RSS.
+
+Usage:
+    PYTHONPATH=. python scripts/load_test.py --concurrency 32 --duration 30
+    PYTHONPATH=. python scripts/load_test.py --rate 200 --duration 30 --workers 2
+    PYTHONPATH=. python scripts/load_test.py --url http://localhost:8000 --server-pid 1234 --concurrency 16
+
+Without --url a local uvicorn server is started (and stopped) for the run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from app.config import settings
+from ml.generate_training_data import generate_chunk
+
+LOAN_FIELDS = ['requested_loan_amount', 'loan_purpose', 'loan_tenure_months', 'has_guarantor', 'has_collateral']
+SKIPPED_FIELDS = {'client_id', 'credit_worthy'}
+
+def build_payloads(n: int, seed: int) -> List[Dict[str, Any]]:
+    """Samples n request payloads from the training data distributions."""
+    records = generate_chunk(n, seed).drop(columns=list(SKIPPED_FIELDS)).to_dict(orient='records')
+    return [
+        {
+            "client": {k: v for k, v in record.items() if k not in LOAN_FIELDS},
+            "loan": {k: record[k] for k in LOAN_FIELDS}
+        }
+        for record in records
+    ]
+
+def read_peak_rss_kb(pid: int) -> int:
+    """Peak resident set size (VmHWM) of a process and its children, in KiB (Linux only)."""
+    total = 0
+    pids = [pid]
+    try:
+        children = subprocess.run(["pgrep", "-P", str(pid)], capture_output=True, text=True).stdout.split()
+        pids += [int(child) for child in children]
+    except FileNotFoundError:
+        pass
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        total += int(line.split()[1])
+        except OSError:
+            continue
+    return total
+
+class Recorder:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.status_counts: Dict[str, int] = {}
+        self.measuring = False
+
+    def record(self, latency: float, status: str, ok: bool):
+        if not self.measuring:
+            return
+        self.latencies.append(latency)
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+async def send(client: httpx.AsyncClient, payload: Dict[str, Any], recorder: Recorder, scheduled: float):
+    # Latency is measured from the scheduled send time so a slow server can't hide queueing delay
+    try:
+        response = await client.post("/api/v1/credit/check", json=payload)
+        recorder.record(time.perf_counter() - scheduled, str(response.status_code), response.status_code == 200)
+    except httpx.HTTPError as e:
+        recorder.record(time.perf_counter() - scheduled, type(e).__name__, False)
+
+async def run_closed_loop(client, payloads, recorder, concurrency: int, deadline: float):
+    counter = iter(range(10 ** 12))
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            payload = payloads[next(counter) % len(payloads)]
+            await send(client, payload, recorder, time.perf_counter())
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+async def run_open_loop(client, payloads, recorder, rate: float, deadline: float, seed: int):
+    rng = np.random.default_rng(seed)
+    tasks = set()
+    next_at = time.perf_counter()
+    i = 0
+    while next_at < deadline:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(send(client, payloads[i % len(payloads)], recorder, next_at))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        i += 1
+        next_at += rng.exponential(1.0 / rate)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+async def run_load(args, base_url: str, payloads: List[Dict[str, Any]]) -> Recorder:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    headers = {"X-API-Key": args.api_key}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=args.timeout) as client:
+        async def flip_measuring():
+            await asyncio.sleep(args.warmup)
+            recorder.measuring = True
+
+        measure_task = asyncio.create_task(flip_measuring())
+        deadline = time.perf_counter() + args.warmup + args.duration
+        if args.rate:
+            await run_open_loop(client, payloads, recorder, args.rate, deadline, args.seed)
+        else:
+            await run_closed_loop(client, payloads, recorder, args.concurrency, deadline)
+        await measure_task
+    return recorder
+
+def start_server(args) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"
+    ]
+    env = dict(os.environ, PYTHONPATH=os.environ.get("PYTHONPATH", "."))
+    # The payload pool repeats, so with the cache on most requests after the first pass would be cache hits
+    env["DECISION_CACHE_ENABLED"] = "true" if args.decision_cache else "false"
+    server = subprocess.Popen(command, env=env)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    started = time.perf_counter()
+    while time.perf_counter() - started < args.startup_timeout:
+        if server.poll() is not None:
+            sys.exit(f"Server exited during startup with code {server.returncode}")
+        try:
+            # /health answers 200 while the model is still loading; readiness waits for warm-up
+            if httpx.get(f"{base_url}/api/v1/health/ready", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    sys.exit("Server did not become ready in time")
+
+def stop_server(server: subprocess.Popen):
+    server.send_signal(signal.SIGINT)
+    try:
+        server.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+def percentile_ms(latencies: np.ndarray, q: float) -> Optional[float]:
+    return float(np.percentile(latencies, q) * 1000) if latencies.size else None
+
+def build_report(args, recorder: Recorder, peak_rss_kb: Optional[int]) -> Dict[str, Any]:
+    latencies = np.asarray(recorder.latencies)
+    total = len(latencies)
+    return {
+        "mode": "open_loop" if args.rate else "closed_loop",
+        "concurrency": None if args.rate else args.concurrency,
+        "target_rate": args.rate,
+        "decision_cache": None if args.url else args.decision_cache,
+        "duration_s": args.duration,
+        "requests": total,
+        "throughput_rps": total / args.duration,
+        "error_rate": recorder.errors / total if total else 0.0,
+        "status_counts": recorder.status_counts,
+        "latency_ms": {
+            "mean": float(latencies.mean() * 1000) if total else None,
+            "p50": percentile_ms(latencies, 50),
+            "p95": percentile_ms(latencies, 95),
+            "p99": percentile_ms(latencies, 99),
+            "p999": percentile_ms(latencies, 99.9),
+            "max": float(latencies.max() * 1000) if total else None
+        },
+        "server_peak_rss_mb": round(peak_rss_kb / 1024, 1) if peak_rss_kb else None,
+        "server_workers": args.workers if not args.url else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test POST /api/v1/credit/check")
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="PID to read peak RSS from when using --url")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the local server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local server")
+    parser.add_argument("--decision-cache", action="store_true",
+                        help="Keep the local server's decision cache on (measures cache hits, not scoring)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients (closed loop)")
+    parser.add_argument("--rate", type=float, default=None, help="Requests per second (open loop, Poisson arrivals)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--payloads", type=int, default=5000, help="Distinct request payloads to cycle through")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for payloads and arrivals")
+    parser.add_argument("--max-connections", type=int, default=256, help="HTTP connection pool size")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--startup-timeout", type=float, default=60.0, help="Seconds to wait for the local server")
+    parser.add_argument("--api-key", default=settings.API_KEY, help="X-API-Key header value")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.payloads, args.seed)
+
+    server = None
+    if args.url:
+        base_url, server_pid = args.url.rstrip("/"), args.server_pid
+    else:
+        server = start_server(args)
+        base_url, server_pid = f"http://127.0.0.1:{args.port}", server.pid
+
+    try:
+        recorder = asyncio.run(run_load(args, base_url, payloads))
+        peak_rss_kb = read_peak_rss_kb(server_pid) if server_pid else None
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    report = build_report(args, recorder, peak_rss_kb)
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Per-worker memory report for a multi-worker uvicorn server.
+
+    PYTHONPATH=. python scripts/memory_report.py --workers 4            # pickled model in every worker
+    PYTHONPATH=. python scripts/memory_report.py --workers 4 --mmap     # shared memory-mapped model
+    PYTHONPATH=. python scripts/memory_report.py --pid 1234             # an already running server
+
+For the server process and each of its workers it reports RSS, PSS (shared pages split between
+the processes mapping them) and USS (pages private to the process, i.e. what each additional
+worker really costs). Values come from /proc/<pid>/smaps_rollup, so this is Linux only.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from app.config import settings
+from scripts.load_test import build_payloads, start_server, stop_server
+
+def child_pids(pid: int) -> List[int]:
+    """All descendants of pid (uvicorn workers and their helpers), depth first."""
+    try:
+        output = subprocess.run(["pgrep", "-P", str(pid)], capture_output=True, text=True).stdout
+    except FileNotFoundError:
+        return []
+    pids = []
+    for child in (int(p) for p in output.split()):
+        pids.append(child)
+        pids.extend(child_pids(child))
+    return pids
+
+def read_memory_kb(pid: int) -> Dict[str, int]:
+    """Rss, Pss, Uss and Shared for one process, in KiB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[-1] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    return {"rss": fields.get("Rss", 0), "pss": fields.get("Pss", 0), "uss": private, "shared": shared}
+
+def process_name(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode(errors="replace").strip()[:60]
+    except OSError:
+        return "?"
+
+def build_report(pid: int) -> Dict[str, Any]:
+    processes = []
+    for p in [pid] + child_pids(pid):
+        try:
+            memory = read_memory_kb(p)
+        except OSError:
+            continue
+        processes.append({"pid": p, "cmd": process_name(p), **{k: round(v / 1024, 1) for k, v in memory.items()}})
+    return {
+        "processes": processes,
+        "total_pss_mb": round(sum(p["pss"] for p in processes), 1),
+        "total_uss_mb": round(sum(p["uss"] for p in processes), 1)
+    }
+
+def warm_up(base_url: str, requests: int):
+    # Touch every worker's model pages before measuring
+    payloads = build_payloads(requests, seed=3)
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        for payload in payloads:
+            client.post("/api/v1/credit/check", json=payload, headers={"X-API-Key": settings.API_KEY})
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'pid':>8} {'rss MB':>8} {'pss MB':>8} {'uss MB':>8} {'shared MB':>10}  cmd")
+    for p in report["processes"]:
+        print(f"{p['pid']:>8} {p['rss']:>8} {p['pss']:>8} {p['uss']:>8} {p['shared']:>10}  {p['cmd']}")
+    print(f"total PSS {report['total_pss_mb']} MB, total USS {report['total_uss_mb']} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-worker unique memory (USS) of the API server")
+    parser.add_argument("--pid", type=int, help="Report an already running server (master pid)")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers for the local server")
+    parser.add_argument("--mmap", action="store_true", help="Start the local server with MODEL_MMAP=true")
+    parser.add_argument("--port", type=int, default=8766, help="Port for the local server")
+    parser.add_argument("--warmup-requests", type=int, default=200, help="Requests sent before measuring")
+    parser.add_argument("--startup-timeout", type=float, default=60.0, help="Seconds to wait for the local server")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    if not sys.platform.startswith("linux"):
+        sys.exit("memory_report.py reads /proc and only runs on Linux")
+
+    server = None
+    if args.pid:
+        pid = args.pid
+    else:
+        os.environ["MODEL_MMAP"] = "true" if args.mmap else "false"
+        server = start_server(args)
+        pid = server.pid
+    try:
+        if server is not None:
+            warm_up(f"http://127.0.0.1:{args.port}", args.warmup_requests)
+            time.sleep(0.5)
+        report = build_report(pid)
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    report["model_mmap"] = args.mmap if server is not None else None
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import asyncio
+import pytest
+from app.main import start_services, stop_services
+from app.routers import credit
+
+@pytest.fixture(scope="session", autouse=True)
+def started_services(tmp_path_factory):
+    credit.audit_log.directory = str(tmp_path_factory.mktemp("audit"))
+    # AsyncClient(app=app) does not run the lifespan, so load and warm up the model once per session
+    watchers = asyncio.run(start_services())
+    yield
+    stop_services(watchers)
@@ -1,8 +1,10 @@
+import asyncio
 import pytest
 from httpx import AsyncClient
 from app.main import app
 from app.config import settings
 import json
+from app.schemas.credit import CreditCheckRequest
 
 @pytest.mark.asyncio
 async def test_health_endpoint():
@@ -106,3 +108,269 @@ async def test_authentication_error():
     async with AsyncClient(app=app, base_url="http://test") as ac:
         response = await ac.post("/api/v1/credit/check", json=payload, headers={"X-API-Key": "wrong"})
     assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_credit_check_batch():
+    valid = {
+        "client": {
+            "age": 35,
+            "gender": "M",
+            "marital_status": "married",
+            "number_of_dependents": 2,
+            "education_level": "tertiary",
+            "employment_type": "formal",
+            "employment_sector": "private",
+            "years_at_current_job": 10.0,
+            "monthly_income": 10000.0,
+            "has_other_income": False,
+            "other_income_amount": 0.0,
+            "total_savings": 50000.0,
+            "savings_account_age_months": 48,
+            "average_monthly_deposit": 2000.0,
+            "num_previous_loans": 2,
+            "previous_loans_repaid_on_time": 2,
+            "has_existing_loan": False,
+            "existing_loan_balance": 0.0,
+            "existing_loan_monthly_payment": 0.0
+        },
+        "loan": {
+            "requested_loan_amount": 5000.0,
+            "loan_purpose": "business",
+            "loan_tenure_months": 12,
+            "has_guarantor": True,
+            "has_collateral": False
+        }
+    }
+    invalid = {"client": dict(valid["client"], age=15), "loan": valid["loan"]}
+
+    headers = {"X-API-Key": settings.API_KEY}
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/api/v1/credit/check/batch", json={"requests": [valid, invalid, valid]}, headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert data["failed"] == 1
+    assert [r["index"] for r in data["results"]] == [0, 1, 2]
+    assert data["results"][0]["response"]["decision"] in ["approved", "manual_review"]
+    assert data["results"][1]["response"] is None
+    assert "client.age" in data["results"][1]["error"]
+    assert data["results"][2]["response"]["credit_score"] == data["results"][0]["response"]["credit_score"]
+
+@pytest.mark.asyncio
+async def test_credit_check_batch_too_large():
+    headers = {"X-API-Key": settings.API_KEY}
+    payload = {"requests": [{}] * (settings.MAX_BATCH_SIZE + 1)}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/api/v1/credit/check/batch", json=payload, headers=headers)
+    assert response.status_code == 413
+
+@pytest.mark.asyncio
+async def test_update_rules_rejects_invalid_condition():
+    payload = {
+        "version": "bad",
+        "rules": {"auto_reject": [{"name": "evil", "condition": "__import__('os')", "message": "nope"}]},
+        "thresholds": {}
+    }
+    with open(settings.RULES_CONFIG_PATH) as f:
+        before = f.read()
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.put("/api/v1/rules", json=payload, headers={"X-Admin-API-Key": settings.ADMIN_API_KEY})
+
+    assert response.status_code == 400
+    assert "evil" in response.json()["detail"]
+    with open(settings.RULES_CONFIG_PATH) as f:
+        assert f.read() == before
+
+@pytest.mark.asyncio
+async def test_model_reload_endpoint():
+    headers = {"X-Admin-API-Key": settings.ADMIN_API_KEY}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/api/v1/model/reload", headers=headers)
+        factors = await ac.get("/api/v1/credit/factors", headers={"X-API-Key": settings.API_KEY})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["version"] == data["previous_version"]
+    assert factors.json()["version"] == data["version"]
+    assert factors.json()["training_date"] is not None
+
+@pytest.mark.asyncio
+async def test_health_reports_readiness_and_startup_timings():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        health = await ac.get("/api/v1/health")
+        ready = await ac.get("/api/v1/health/ready")
+    body = health.json()
+    assert body["ready"] is True
+    assert {"imports", "model_load", "model_warm_up", "request_warm_up", "total"} <= set(body["startup_timings_ms"])
+    assert ready.status_code == 200
+
+@pytest.mark.asyncio
+async def test_readiness_probe_is_unavailable_while_starting(monkeypatch):
+    from app.utils.startup import startup
+    monkeypatch.setattr(startup, "ready", False)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get("/api/v1/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+@pytest.mark.asyncio
+async def test_rules_get_supports_conditional_requests():
+    headers = {"X-API-Key": settings.API_KEY}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        first = await ac.get("/api/v1/rules", headers=headers)
+        etag = first.headers["ETag"]
+        cached = await ac.get("/api/v1/rules", headers=dict(headers, **{"If-None-Match": etag}))
+    assert first.status_code == 200 and "auto_reject" in first.json()["rules"]
+    assert cached.status_code == 304 and cached.content == b""
+
+@pytest.mark.asyncio
+async def test_update_rules_is_versioned(tmp_path, monkeypatch):
+    from app.routers import credit
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(open(settings.RULES_CONFIG_PATH).read())
+    monkeypatch.setattr(credit.rule_engine, "config_path", str(rules_path))
+    monkeypatch.setattr(credit.rule_engine, "active", credit.rule_engine.active)
+    old_etag = credit.rule_engine.active.etag
+    config = json.loads(rules_path.read_text())
+    config["thresholds"]["min_credit_score"] = 0.55
+    admin = {"X-Admin-API-Key": settings.ADMIN_API_KEY}
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        updated = await ac.put("/api/v1/rules", json=config, headers=dict(admin, **{"If-Match": old_etag}))
+        stale = await ac.put("/api/v1/rules", json=config, headers=dict(admin, **{"If-Match": old_etag}))
+        current = await ac.get("/api/v1/rules", headers={"X-API-Key": settings.API_KEY})
+
+    assert updated.status_code == 200 and updated.headers["ETag"] != old_etag
+    assert stale.status_code == 412
+    assert current.headers["ETag"] == updated.headers["ETag"]
+    assert current.json()["thresholds"]["min_credit_score"] == 0.55
+    assert json.loads(rules_path.read_text())["thresholds"]["min_credit_score"] == 0.55
+    assert [p.name for p in tmp_path.iterdir()] == ["rules.json"]
+
+@pytest.mark.asyncio
+async def test_credit_check_stream(monkeypatch):
+    from app.services.model_service import WARMUP_RECORD
+    from app.routers import credit
+    monkeypatch.setattr(settings, "STREAM_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "STREAM_MAX_LINE_BYTES", 4096)
+    requests = [
+        {"client": WARMUP_RECORD, "loan": dict(WARMUP_RECORD, requested_loan_amount=amount)}
+        for amount in (1000.0, 5000.0, 20000.0)
+    ]
+    invalid = {"client": dict(WARMUP_RECORD, age=15), "loan": WARMUP_RECORD}
+    lines = [
+        json.dumps(requests[0]), json.dumps(invalid), "", json.dumps(requests[1]), "x" * 5000, json.dumps(requests[2])
+    ]
+
+    async def body():
+        # Split mid-line so the server has to reassemble records across reads
+        data = ("\n".join(lines) + "\n").encode()
+        for start in range(0, len(data), 777):
+            yield data[start:start + 777]
+
+    headers = {"X-API-Key": settings.API_KEY, "Content-Type": "application/x-ndjson"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/api/v1/credit/check/stream", content=body(), headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+    assert "client.age" in results[1]["error"]
+    assert "exceeds" in results[3]["error"]
+    for result, request in zip([results[0], results[2], results[4]], requests):
+        expected = await credit.score_request(CreditCheckRequest.model_validate(request))
+        assert result["response"]["credit_score"] == expected.credit_score
+        assert result["response"]["decision"] == expected.decision.value
+
+@pytest.mark.asyncio
+async def test_iter_lines_bounds_long_lines():
+    from app.utils.ndjson import iter_lines
+
+    async def chunks():
+        for chunk in (b'{"a"', b': 1}\nxxxxx', b'xxxxx', b'\n{}'):
+            yield chunk
+
+    assert [line async for line in iter_lines(chunks(), 8)] == [b'{"a": 1}', None, b'{}']
+
+@pytest.mark.asyncio
+async def test_rules_profile_requires_admin_key():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        denied = await ac.get("/api/v1/rules/profile", headers={"X-Admin-API-Key": "wrong"})
+        profile = await ac.get("/api/v1/rules/profile", headers={"X-Admin-API-Key": settings.ADMIN_API_KEY})
+    assert denied.status_code == 403
+    assert profile.status_code == 200
+    assert {"auto_reject_order", "rules", "checks"} <= set(profile.json())
+
+@pytest.mark.asyncio
+async def test_staged_decisions_skip_the_model_for_hard_rejects(monkeypatch):
+    from app.services.model_service import WARMUP_RECORD
+    from app.routers import credit
+    from app.utils.metrics import SHADOW_SCORES
+    approvable = CreditCheckRequest.model_validate({"client": WARMUP_RECORD, "loan": WARMUP_RECORD})
+    rejectable = CreditCheckRequest.model_validate({
+        "client": dict(WARMUP_RECORD, employment_type="unemployed"),
+        "loan": dict(WARMUP_RECORD, requested_loan_amount=20000.0)
+    })
+    unstaged = await credit.score_request(approvable, audit=False)
+
+    monkeypatch.setattr(settings, "STAGED_DECISIONS", True)
+    scored = []
+    predict_engineered = credit.scoring_scheduler.predict_batch
+    predict_features = credit.scoring_scheduler.predict_one
+    monkeypatch.setattr(
+        credit.scoring_scheduler, "predict_batch", lambda rows: scored.extend(rows) or predict_engineered(rows)
+    )
+    monkeypatch.setattr(
+        credit.scoring_scheduler, "predict_one", lambda row: scored.append(row) or predict_features(row)
+    )
+    shadow_count = lambda: next(v for name, _, v in SHADOW_SCORES.samples() if name.endswith("_count"))
+    shadow_before = shadow_count()
+
+    rejected = await credit.score_request(rejectable, audit=False)
+    assert rejected.decision.value == "rejected"
+    assert rejected.scored is False and rejected.credit_score == 0.0
+    assert "Unemployed clients cannot request loans above GHS 5,000" in rejected.recommendations
+    assert scored == []
+    staged = await credit.score_request(approvable, audit=False)
+    assert staged.scored is True and staged.credit_score == unstaged.credit_score
+    assert staged.decision == unstaged.decision
+
+    monkeypatch.setattr(settings, "SHADOW_SCORING", True)
+    records = [credit.build_input_data(approvable), credit.build_input_data(rejectable)]
+    batch = await credit.score_staged(records)
+    assert [r.scored for r in batch] == [True, False]
+    assert batch[0].credit_score == unstaged.credit_score
+    await asyncio.gather(*credit.shadow_tasks)
+    assert shadow_count() == shadow_before + 1
+    assert len(scored) == 3
+
+@pytest.mark.asyncio
+async def test_staged_decision_uses_one_rule_snapshot(monkeypatch):
+    from app.services.model_service import WARMUP_RECORD
+    from app.services.rule_engine import RuleSet
+    from app.routers import credit
+    request = CreditCheckRequest.model_validate({"client": WARMUP_RECORD, "loan": WARMUP_RECORD})
+    monkeypatch.setattr(settings, "STAGED_DECISIONS", True)
+    monkeypatch.setattr(credit.rule_engine, "active", credit.rule_engine.active)
+    prescreened_with = credit.rule_engine.active
+    config = json.loads(json.dumps(prescreened_with.config))
+    config["rules"]["auto_reject"].append({"name": "reject_everyone", "condition": "age > 0", "message": "No"})
+    reloaded = RuleSet(config)
+
+    predict_features = credit.scoring_scheduler.predict_one
+    def reload_while_scoring(row):
+        # The rules watcher swaps in a new rule set while the model scores
+        credit.rule_engine.active = reloaded
+        return predict_features(row)
+    monkeypatch.setattr(credit.scoring_scheduler, "predict_one", reload_while_scoring)
+
+    response = await credit.score_request(request)
+    record = credit.audit_log.get(response.request_id)
+
+    assert credit.rule_engine.active is reloaded
+    assert response.scored is True and "reject_everyone" not in response.rules_applied
+    assert record["rules_version"] == prescreened_with.version != reloaded.version
@@ -0,0 +1,75 @@
+import time
+import pytest
+from httpx import AsyncClient
+from app.config import settings
+from app.main import app
+from app.routers import credit
+from app.schemas.credit import CreditCheckResponse
+from app.services.audit_log import AuditLog
+from app.services.model_service import WARMUP_RECORD
+
+def make_response(**overrides) -> CreditCheckResponse:
+    return CreditCheckResponse(**dict(dict(
+        decision="approved", credit_score=80.0, confidence="high", risk_level="low",
+        monthly_payment_estimate=487.44, debt_to_income_ratio=0.0487
+    ), **overrides))
+
+def test_decisions_are_group_committed_and_found_by_request_id(tmp_path):
+    audit = AuditLog(str(tmp_path), batch_size=100)
+    responses = [make_response(credit_score=float(i)) for i in range(250)]
+    # Not queued while no writer is running
+    audit.record(responses[0], {}, {}, None, None)
+    assert audit.get(responses[0].request_id) is None
+    assert audit.stats()["queue_depth"] == 0
+
+    audit.start()
+    for response in responses:
+        audit.record(response, {"age": 35}, {"age": 35, "debt_to_income_ratio": 0.1}, "model-1", "rules-1")
+    # Visible whether or not the writer has committed it yet
+    assert audit.get(responses[0].request_id)["response"]["credit_score"] == 0.0
+    audit.stop()
+
+    assert audit.written == 250
+    # Transactions hold at most batch_size decisions
+    assert 3 <= audit.commits <= 250
+    record = audit.get(responses[123].request_id)
+    assert record["model_version"] == "model-1" and record["rules_version"] == "rules-1"
+    assert record["inputs"] == {"age": 35}
+    assert record["response"]["credit_score"] == 123.0
+    assert audit.get("missing") is None
+
+def test_segments_rotate_and_old_ones_are_pruned(tmp_path):
+    audit = AuditLog(str(tmp_path), batch_size=10, max_segment_bytes=1, segments_kept=2)
+    audit.start()
+    responses = []
+    for _ in range(4):
+        batch = [make_response() for _ in range(10)]
+        responses.append(batch)
+        for response in batch:
+            audit.record(response, {}, {}, None, None)
+        # Let each batch land in its own transaction
+        while audit.written < 10 * len(responses):
+            time.sleep(0.001)
+    audit.stop()
+
+    assert [number for number, _ in audit.segments()] == [4, 5]
+    assert audit.get(responses[-1][0].request_id) is not None
+    assert audit.get(responses[0][0].request_id) is None
+
+@pytest.mark.asyncio
+async def test_decision_lookup_endpoint():
+    payload = {"client": WARMUP_RECORD, "loan": dict(WARMUP_RECORD, requested_loan_amount=4321.0)}
+    headers = {"X-API-Key": settings.API_KEY}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        decision = (await ac.post("/api/v1/credit/check", json=payload, headers=headers)).json()
+        found = await ac.get(f"/api/v1/credit/check/{decision['request_id']}", headers=headers)
+        missing = await ac.get("/api/v1/credit/check/not-a-request", headers=headers)
+
+    assert found.status_code == 200
+    record = found.json()
+    assert record["response"] == decision
+    assert record["inputs"]["requested_loan_amount"] == 4321.0
+    assert "debt_to_income_ratio" in record["engineered_features"]
+    assert record["model_version"] == credit.model_service.version
+    assert record["rules_version"] == credit.rule_engine.version
+    assert missing.status_code == 404
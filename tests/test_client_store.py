@@ -0,0 +1,83 @@
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.config import settings
+from app.routers import credit
+from app.schemas.credit import ClientProfile
+from app.services.client_store import ClientProfileStore
+from app.services.model_service import WARMUP_RECORD
+from app.utils.columnar import CLIENT_FIELDS, LOAN_FIELDS
+from app.utils.preprocessing import derive_client_features
+
+HEADERS = {"X-API-Key": settings.API_KEY}
+CLIENT = {k: WARMUP_RECORD[k] for k in CLIENT_FIELDS}
+LOAN = {k: WARMUP_RECORD[k] for k in LOAN_FIELDS}
+
+def test_store_is_bounded_and_expires():
+    now = [0.0]
+    store = ClientProfileStore(max_bytes=20000, ttl_seconds=60)
+    store.cache.clock = lambda: now[0]
+    profile = ClientProfile.model_validate(CLIENT)
+
+    stored = store.put("c-1", profile)
+    assert stored.client_features == derive_client_features(profile.model_dump())
+    assert store.get("c-1") is stored
+    for i in range(20):
+        store.put(f"other-{i}", profile)
+    assert store.get("c-1") is None
+    assert store.cache.current_bytes <= 20000
+
+    store.put("c-2", profile)
+    now[0] = 61.0
+    assert store.get("c-2") is None
+
+@pytest.mark.asyncio
+async def test_loan_only_check_matches_full_check(monkeypatch):
+    import app.utils.preprocessing as preprocessing
+    calls = []
+    derive = preprocessing.derive_client_features
+    monkeypatch.setattr(preprocessing, "derive_client_features", lambda record: calls.append(record) or derive(record))
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        missing = await ac.post("/api/v1/credit/clients/officer-42/check", json=LOAN, headers=HEADERS)
+        stored = await ac.put("/api/v1/credit/clients/officer-42", json=CLIENT, headers=HEADERS)
+        results = []
+        for amount, tenure in ((3000.0, 12), (7000.0, 24)):
+            loan = dict(LOAN, requested_loan_amount=amount, loan_tenure_months=tenure)
+            calls.clear()
+            delta = await ac.post("/api/v1/credit/clients/officer-42/check", json=loan, headers=HEADERS)
+            # Client-only features came from the store, not recomputed per check
+            assert calls == []
+            credit.decision_cache.invalidate()
+            full = await ac.post("/api/v1/credit/check", json={"client": CLIENT, "loan": loan}, headers=HEADERS)
+            results.append((delta.json(), full.json()))
+        invalid = await ac.post("/api/v1/credit/clients/officer-42/check", json=dict(LOAN, loan_tenure_months=1),
+                                headers=HEADERS)
+        deleted = await ac.delete("/api/v1/credit/clients/officer-42", headers=HEADERS)
+        gone = await ac.post("/api/v1/credit/clients/officer-42/check", json=LOAN, headers=HEADERS)
+
+    assert missing.status_code == 404
+    assert stored.status_code == 200
+    assert stored.json()["client_features"]["is_new_client"] == 0
+    for delta, full in results:
+        assert delta["credit_score"] == full["credit_score"]
+        assert delta["decision"] == full["decision"]
+        assert delta["factors"] == full["factors"]
+    assert invalid.status_code == 422
+    assert deleted.status_code == 204
+    assert gone.status_code == 404
+
+@pytest.mark.asyncio
+async def test_stored_profile_decisions_are_audited_per_client():
+    loan = dict(LOAN, requested_loan_amount=5432.0)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        full = await ac.post("/api/v1/credit/check", json={"client": CLIENT, "loan": loan}, headers=HEADERS)
+        ids = []
+        for client_id in ("audit-a", "audit-b"):
+            await ac.put(f"/api/v1/credit/clients/{client_id}", json=CLIENT, headers=HEADERS)
+            check = await ac.post(f"/api/v1/credit/clients/{client_id}/check", json=loan, headers=HEADERS)
+            ids.append(check.json()["request_id"])
+        records = [(await ac.get(f"/api/v1/credit/check/{i}", headers=HEADERS)).json() for i in ids]
+
+    # Same application, but neither client is served the other's (or the anonymous) decision record
+    assert len({full.json()["request_id"], *ids}) == 3
+    assert [record["inputs"]["client_id"] for record in records] == ["audit-a", "audit-b"]
@@ -0,0 +1,89 @@
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from pydantic import ValidationError
+from app.main import app
+from app.config import settings
+from app.schemas.credit import CreditCheckRequest
+from app.services.decision_cache import request_fingerprint, payload_fingerprint
+from app.services.model_service import WARMUP_RECORD
+from app.utils.codecs import JSON, MSGPACK, MediaType, response_media_type, request_media_type
+from app.utils.columnar import CLIENT_FIELDS, LOAN_FIELDS, validate_columns, nest
+
+HEADERS = {"X-API-Key": settings.API_KEY}
+PAYLOAD = {"client": {k: WARMUP_RECORD[k] for k in CLIENT_FIELDS}, "loan": {k: WARMUP_RECORD[k] for k in LOAN_FIELDS}}
+
+def test_accept_negotiation():
+    default = MediaType(JSON)
+    assert response_media_type(None, default) is default
+    assert response_media_type("*/*", default) is default
+    assert response_media_type("text/html, application/json;q=0.5", default).codec is JSON
+    columnar = response_media_type("application/json;q=0.2, application/vnd.credit-columnar+json", default)
+    assert columnar.columnar and columnar.content_type == "application/vnd.credit-columnar+json"
+    with pytest.raises(HTTPException) as error:
+        response_media_type("text/html", default)
+    assert error.value.status_code == 406
+    with pytest.raises(HTTPException) as error:
+        request_media_type("text/csv")
+    assert error.value.status_code == 415
+
+def test_columnar_validation_matches_the_request_model():
+    rows = [
+        dict(WARMUP_RECORD),
+        dict(WARMUP_RECORD, age=15, gender="X"),
+        dict(WARMUP_RECORD, num_previous_loans=1, previous_loans_repaid_on_time=3),
+        dict(WARMUP_RECORD, monthly_income="many", has_guarantor="yes", loan_tenure_months=12.0),
+    ]
+    columns = {name: [row[name] for row in rows] for name in CLIENT_FIELDS + LOAN_FIELDS}
+
+    records, errors = validate_columns(columns)
+
+    for row, record, error in zip(rows, records, errors):
+        try:
+            request = CreditCheckRequest.model_validate(nest(row))
+        except ValidationError as e:
+            assert record is None
+            assert [err["loc"][-1] for err in e.errors()] == [part.split(":")[0].split(".")[-1]
+                                                              for part in error.split("; ")]
+            continue
+        assert error is None
+        # Columnar and row-wise forms of one application share a cache key
+        assert payload_fingerprint(nest(record)) == request_fingerprint(request)
+    assert errors[1] == ("client.age: Input should be greater than or equal to 18; "
+                         "client.gender: Input should be 'M' or 'F'")
+
+@pytest.mark.asyncio
+async def test_columnar_batch_round_trip():
+    columns = {name: [WARMUP_RECORD[name]] * 3 for name in CLIENT_FIELDS + LOAN_FIELDS}
+    columns["age"][1] = 15
+    headers = dict(HEADERS, **{"Content-Type": "application/vnd.credit-columnar+json"})
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        columnar = await ac.post("/api/v1/credit/check/batch", json={"columns": columns}, headers=headers)
+        rows = await ac.post("/api/v1/credit/check/batch", json={"columns": columns},
+                             headers=dict(headers, Accept="application/json"))
+        single = await ac.post("/api/v1/credit/check", json=PAYLOAD, headers=HEADERS)
+        ragged = await ac.post("/api/v1/credit/check/batch", json={"columns": dict(columns, age=[30])}, headers=headers)
+
+    assert columnar.headers["content-type"] == "application/vnd.credit-columnar+json"
+    body = columnar.json()
+    assert (body["total"], body["succeeded"], body["failed"]) == (3, 2, 1)
+    assert body["columns"]["error"][1].startswith("client.age")
+    assert body["columns"]["credit_score"][0] == single.json()["credit_score"]
+    assert body["columns"]["factors"][0] == single.json()["factors"]
+    assert [r["error"] is None for r in rows.json()["results"]] == [True, False, True]
+    assert ragged.status_code == 422
+
+@pytest.mark.asyncio
+async def test_msgpack_check():
+    msgpack = pytest.importorskip("msgpack")
+    headers = dict(HEADERS, **{"Content-Type": "application/msgpack"})
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        packed = await ac.post("/api/v1/credit/check", content=msgpack.packb(PAYLOAD), headers=headers)
+        as_json = await ac.post("/api/v1/credit/check", content=msgpack.packb(PAYLOAD),
+                                headers=dict(headers, Accept="application/json"))
+        invalid = await ac.post("/api/v1/credit/check", content=msgpack.packb({"client": {}}), headers=headers)
+
+    assert packed.headers["content-type"] == MSGPACK.media_type
+    assert msgpack.unpackb(packed.content) == as_json.json()
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"][0]["loc"][:2] == ["body", "client"]
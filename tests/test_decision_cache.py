@@ -0,0 +1,117 @@
+import json
+import asyncio
+import pytest
+from app.config import settings
+from app.schemas.credit import CreditCheckRequest, CreditCheckResponse
+from app.services.decision_cache import DecisionCache, request_fingerprint
+from app.services.rule_engine import RuleEngine
+from app.utils.ttl_cache import TTLCache
+
+PAYLOAD = {
+    "client": {
+        "age": 35, "gender": "M", "marital_status": "married", "number_of_dependents": 2,
+        "education_level": "tertiary", "employment_type": "formal", "employment_sector": "private",
+        "years_at_current_job": 10.0, "monthly_income": 10000.0, "has_other_income": False,
+        "other_income_amount": 0.0, "total_savings": 50000.0, "savings_account_age_months": 48,
+        "average_monthly_deposit": 2000.0, "num_previous_loans": 2, "previous_loans_repaid_on_time": 2,
+        "has_existing_loan": False, "existing_loan_balance": 0.0, "existing_loan_monthly_payment": 0.0
+    },
+    "loan": {
+        "requested_loan_amount": 5000.0, "loan_purpose": "business", "loan_tenure_months": 12,
+        "has_guarantor": True, "has_collateral": False
+    }
+}
+
+def make_response() -> CreditCheckResponse:
+    return CreditCheckResponse(
+        decision="approved", credit_score=80.0, confidence="high", risk_level="low",
+        monthly_payment_estimate=487.44, debt_to_income_ratio=0.0487
+    )
+
+def test_fingerprint_is_canonical():
+    reordered = {"loan": dict(reversed(list(PAYLOAD["loan"].items()))), "client": dict(PAYLOAD["client"], age=35.0)}
+    changed = {"client": PAYLOAD["client"], "loan": dict(PAYLOAD["loan"], requested_loan_amount=5001)}
+
+    fingerprint = request_fingerprint(CreditCheckRequest.model_validate(PAYLOAD))
+    assert request_fingerprint(CreditCheckRequest.model_validate(reordered)) == fingerprint
+    assert request_fingerprint(CreditCheckRequest.model_validate(changed)) != fingerprint
+
+def test_ttl_cache_evicts_least_recently_used_over_budget():
+    cache = TTLCache(max_bytes=300, ttl_seconds=60)
+    cache.set("a", 1, 100)
+    cache.set("b", 2, 100)
+    cache.set("c", 3, 100)
+    assert cache.get("a") == 1
+    cache.set("d", 4, 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+    assert cache.current_bytes == 300
+
+def test_ttl_cache_expires_entries():
+    now = [0.0]
+    cache = TTLCache(max_bytes=1000, ttl_seconds=10, clock=lambda: now[0])
+    cache.set("a", 1, 10)
+    now[0] = 9.0
+    assert cache.get("a") == 1
+    now[0] = 10.0
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_are_coalesced():
+    cache = DecisionCache(max_bytes=1024 * 1024, ttl_seconds=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return make_response()
+
+    results = await asyncio.gather(*[cache.get_or_compute("key", compute) for _ in range(5)])
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert cache.stats()["coalesced"] == 4
+
+    await cache.get_or_compute("key", compute)
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_rule_reload_invalidates_cache(tmp_path):
+    rules_path = tmp_path / "rules.json"
+    config = json.loads(open(settings.RULES_CONFIG_PATH).read())
+    rules_path.write_text(json.dumps(config))
+    cache = DecisionCache(max_bytes=1024 * 1024, ttl_seconds=60)
+    engine = RuleEngine(str(rules_path))
+    engine.add_reload_listener(cache.invalidate)
+
+    async def compute():
+        return make_response()
+
+    await cache.get_or_compute("key", compute)
+    # Re-reading unchanged rules keeps cached decisions
+    engine.reload()
+    assert cache.get("key") is not None
+
+    config["thresholds"]["min_credit_score"] = 0.55
+    rules_path.write_text(json.dumps(config))
+    engine.reload()
+    assert cache.get("key") is None
+    assert cache.stats()["invalidations"] == 1
+
+@pytest.mark.asyncio
+async def test_invalidation_from_another_thread_drops_in_flight_result():
+    cache = DecisionCache(max_bytes=1024 * 1024, ttl_seconds=60)
+
+    async def compute():
+        # A reload lands on the file watcher thread while the check is being scored
+        await asyncio.to_thread(cache.invalidate)
+        return make_response()
+
+    result = await cache.get_or_compute("key", compute)
+    assert result is not None
+    assert cache.get("key") is None
+    assert cache._inflight == {}
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,37 @@
+import pandas as pd
+from app.schemas.credit import CreditCheckRequest
+from ml.generate_training_data import COLUMNS, generate_chunk, generate_synthetic_data, iter_chunks
+
+LOAN_FIELDS = ['requested_loan_amount', 'loan_purpose', 'loan_tenure_months', 'has_guarantor', 'has_collateral']
+
+def test_chunks_are_reproducible():
+    first = generate_chunk(500, 123)
+    second = generate_chunk(500, 123)
+    pd.testing.assert_frame_equal(first, second)
+    assert list(first.columns) == COLUMNS
+    assert first['client_id'].str.match(r'^[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$').all()
+    assert first['client_id'].is_unique
+
+def test_output_does_not_depend_on_worker_count():
+    serial = pd.concat(iter_chunks(2500, chunk_size=1000, seed=7, workers=1), ignore_index=True)
+    parallel = pd.concat(iter_chunks(2500, chunk_size=1000, seed=7, workers=2), ignore_index=True)
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert len(serial) == 2500
+
+def test_generated_rows_are_valid_api_requests():
+    records = generate_chunk(1000, 3).drop(columns=['client_id', 'credit_worthy']).to_dict(orient='records')
+    for record in records:
+        CreditCheckRequest.model_validate({
+            "client": {k: v for k, v in record.items() if k not in LOAN_FIELDS},
+            "loan": {k: record[k] for k in LOAN_FIELDS}
+        })
+
+def test_streamed_csv_matches_chunks(tmp_path):
+    path = tmp_path / "training_data.csv"
+    summary = generate_synthetic_data(2500, output_path=str(path), chunk_size=1000, seed=11)
+    written = pd.read_csv(path)
+    expected = pd.concat(iter_chunks(2500, chunk_size=1000, seed=11), ignore_index=True)
+
+    assert summary["rows"] == 2500
+    assert written['client_id'].tolist() == expected['client_id'].tolist()
+    assert written['credit_worthy'].mean() == summary["positive_rate"]
@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from app.services.inference_scheduler import InferenceScheduler
+
+def make_predict_batch(calls):
+    def predict_batch(records):
+        calls.append(len(records))
+        for record in records:
+            if record["value"] < 0:
+                raise ValueError("negative value")
+        return [{"score": record["value"] * 2} for record in records]
+    return predict_batch
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_batch():
+    calls = []
+    scheduler = InferenceScheduler(make_predict_batch(calls), max_batch_size=64, max_wait_ms=20)
+    results = await asyncio.gather(*[scheduler.predict({"value": i}) for i in range(10)])
+    scheduler.shutdown()
+
+    assert calls == [10]
+    assert [r["score"] for r in results] == [i * 2 for i in range(10)]
+
+@pytest.mark.asyncio
+async def test_batch_flushes_at_max_size():
+    calls = []
+    scheduler = InferenceScheduler(make_predict_batch(calls), max_batch_size=4, max_wait_ms=1000)
+    results = await asyncio.gather(*[scheduler.predict({"value": i}) for i in range(8)])
+    scheduler.shutdown()
+
+    assert calls == [4, 4]
+    assert [r["score"] for r in results] == [i * 2 for i in range(8)]
+
+@pytest.mark.asyncio
+async def test_failing_item_only_fails_its_caller():
+    calls = []
+    scheduler = InferenceScheduler(make_predict_batch(calls), max_batch_size=64, max_wait_ms=20)
+    results = await asyncio.gather(
+        scheduler.predict({"value": 1}),
+        scheduler.predict({"value": -1}),
+        scheduler.predict({"value": 3}),
+        return_exceptions=True
+    )
+    scheduler.shutdown()
+
+    assert results[0] == {"score": 2}
+    assert isinstance(results[1], ValueError)
+    assert results[2] == {"score": 6}
+
+@pytest.mark.asyncio
+async def test_lone_request_takes_the_scalar_path():
+    calls, single = [], []
+    scheduler = InferenceScheduler(make_predict_batch(calls), max_batch_size=64, max_wait_ms=1,
+                                   predict_one=lambda record: single.append(record) or {"score": record["value"] * 2})
+    lone = await scheduler.predict({"value": 5})
+    pair = await asyncio.gather(scheduler.predict({"value": 1}), scheduler.predict({"value": 2}))
+    many = await scheduler.predict_many([{"value": 7}])
+    scheduler.shutdown()
+
+    assert lone == {"score": 10} and many == [{"score": 14}]
+    assert [r["score"] for r in pair] == [2, 4]
+    assert single == [{"value": 5}, {"value": 7}]
+    assert calls == [2]
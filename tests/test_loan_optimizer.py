@@ -0,0 +1,53 @@
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.config import settings
+from app.services.model_service import WARMUP_RECORD
+from app.utils.columnar import CLIENT_FIELDS
+
+HEADERS = {"X-API-Key": settings.API_KEY}
+CLIENT = {k: WARMUP_RECORD[k] for k in CLIENT_FIELDS}
+TERMS = {"loan_purpose": "business", "has_guarantor": True, "has_collateral": False}
+
+@pytest.mark.asyncio
+async def test_offers_sit_on_the_approval_boundary():
+    body = dict(TERMS, client=CLIENT, tenures=[24, 6, 6], amount_step=250)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/api/v1/credit/offers", json=body, headers=HEADERS)
+        assert response.status_code == 200
+        result = response.json()
+        checks = {}
+        for offer in result["offers"]:
+            for amount in (offer["max_amount"], offer["max_amount"] + 250):
+                loan = dict(TERMS, requested_loan_amount=amount, loan_tenure_months=offer["loan_tenure_months"])
+                check = await ac.post("/api/v1/credit/check", json={"client": CLIENT, "loan": loan}, headers=HEADERS)
+                checks[(offer["loan_tenure_months"], amount)] = check.json()
+
+    assert [o["loan_tenure_months"] for o in result["offers"]] == [6, 24]
+    for offer in result["offers"]:
+        assert offer["max_amount"] % 250 == 0
+        at_limit = checks[(offer["loan_tenure_months"], offer["max_amount"])]
+        assert at_limit["decision"] == "approved"
+        assert at_limit["credit_score"] == offer["credit_score"]
+        assert at_limit["monthly_payment_estimate"] == offer["monthly_payment"]
+        assert checks[(offer["loan_tenure_months"], offer["max_amount"] + 250)]["decision"] != "approved"
+    assert result["best"] == max(result["offers"], key=lambda o: o["max_amount"])
+    assert result["evaluations"] < 2 * (settings.OFFER_GRID_POINTS + 20)
+
+@pytest.mark.asyncio
+async def test_offers_for_a_stored_client_and_input_errors():
+    weak = dict(CLIENT, monthly_income=500.0, existing_loan_monthly_payment=400.0, has_existing_loan=True)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.put("/api/v1/credit/clients/offer-test", json=weak, headers=HEADERS)
+        stored = await ac.post("/api/v1/credit/offers", json=dict(TERMS, client_id="offer-test"), headers=HEADERS)
+        both = await ac.post("/api/v1/credit/offers", json=dict(TERMS, client=CLIENT, client_id="offer-test"),
+                             headers=HEADERS)
+        bad_tenure = await ac.post("/api/v1/credit/offers", json=dict(TERMS, client=CLIENT, tenures=[2]),
+                                   headers=HEADERS)
+
+    # Existing payments already exceed the debt-to-income limit, so no amount is approvable
+    assert stored.status_code == 200
+    assert stored.json()["best"] is None
+    assert all(o["max_amount"] is None for o in stored.json()["offers"])
+    assert both.status_code == 422
+    assert bad_tenure.status_code == 422
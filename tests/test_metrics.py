@@ -0,0 +1,74 @@
+import threading
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.config import settings
+from app.utils.metrics import Registry
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+    child = histogram.labels("rules")
+    for value in (0.05, 0.5, 0.5, 3.0):
+        child.observe(value)
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{stage="rules",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="rules",le="1"} 3' in text
+    assert 'latency_seconds_bucket{stage="rules",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{stage="rules"} 4' in text
+    assert 'latency_seconds_sum{stage="rules"} 4.05' in text
+
+def test_counters_sum_across_threads():
+    registry = Registry()
+    counter = registry.counter("hits", "Hits", ["rule"])
+
+    def work():
+        child = counter.labels("high_dti")
+        for _ in range(1000):
+            child.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert 'hits_total{rule="high_dti"} 4000' in registry.render()
+
+def test_gauge_and_label_escaping():
+    registry = Registry()
+    gauge = registry.gauge("in_flight", "In flight", ["path"])
+    gauge.labels('a"b').inc(3)
+    gauge.labels('a"b').dec()
+    assert 'in_flight{path="a\\"b"} 2' in registry.render()
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_stages():
+    payload = {
+        "client": {
+            "age": 41, "gender": "F", "marital_status": "single", "number_of_dependents": 1,
+            "education_level": "secondary", "employment_type": "informal", "employment_sector": "trading",
+            "years_at_current_job": 6.0, "monthly_income": 3200.0, "has_other_income": False,
+            "other_income_amount": 0.0, "total_savings": 7000.0, "savings_account_age_months": 30,
+            "average_monthly_deposit": 500.0, "num_previous_loans": 1, "previous_loans_repaid_on_time": 1,
+            "has_existing_loan": False, "existing_loan_balance": 0.0, "existing_loan_monthly_payment": 0.0
+        },
+        "loan": {
+            "requested_loan_amount": 4000.0, "loan_purpose": "business", "loan_tenure_months": 12,
+            "has_guarantor": False, "has_collateral": False
+        }
+    }
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.post("/api/v1/credit/check", json=payload, headers={"X-API-Key": settings.API_KEY})
+        response = await ac.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    for stage in ("validation", "feature_engineering", "model_inference", "rules", "response"):
+        assert f'credit_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert 'http_request_duration_seconds_count{method="POST",route="/api/v1/credit/check",status="200"}' in text
+    assert "credit_decisions_total" in text
+    assert "decision_cache_misses_total" in text
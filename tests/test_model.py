@@ -67,3 +67,42 @@ def test_feature_importance():
         assert 'factor' in f
         assert 'importance' in f
         assert f['importance'] >= 0
+
+def test_model_prediction_batch():
+    base = {
+        'age': 35, 'gender': 'M', 'marital_status': 'married', 'number_of_dependents': 2,
+        'education_level': 'tertiary', 'employment_type': 'formal', 'employment_sector': 'private',
+        'years_at_current_job': 10.0, 'monthly_income': 10000.0, 'has_other_income': False,
+        'other_income_amount': 0.0, 'total_savings': 50000.0, 'savings_account_age_months': 48,
+        'average_monthly_deposit': 2000.0, 'num_previous_loans': 2, 'previous_loans_repaid_on_time': 2,
+        'has_existing_loan': False, 'existing_loan_balance': 0.0, 'existing_loan_monthly_payment': 0.0,
+        'requested_loan_amount': 5000.0, 'loan_purpose': 'business', 'loan_tenure_months': 12,
+        'has_guarantor': True, 'has_collateral': False
+    }
+    records = [dict(base, requested_loan_amount=amount) for amount in (1000.0, 5000.0, 90000.0)]
+
+    results = model_service.predict_batch(records)
+    assert len(results) == 3
+    for record, result in zip(records, results):
+        single = model_service.predict(record)
+        assert result['score'] == pytest.approx(single['score'])
+        assert result['engineered_features']['requested_loan_amount'] == record['requested_loan_amount']
+
+def test_predictions_carry_applicant_specific_contributions():
+    from app.services.decision_service import DecisionService
+    from app.services.model_service import WARMUP_RECORD
+    from app.services.rule_engine import RuleEngine
+    from app.config import settings
+    strong = dict(WARMUP_RECORD, total_savings=80000.0, num_previous_loans=4, previous_loans_repaid_on_time=4)
+    weak = dict(WARMUP_RECORD, monthly_income=900.0, total_savings=50.0, requested_loan_amount=20000.0)
+
+    single = model_service.predict(strong)
+    batch = model_service.predict_batch([strong, weak])
+
+    assert single["contributions"] == batch[0]["contributions"]
+    assert batch[0]["contributions"] != batch[1]["contributions"]
+    decision_service = DecisionService(model_service, RuleEngine(settings.RULES_CONFIG_PATH))
+    factors = decision_service.decide(batch[1]["score"], batch[1]["engineered_features"], batch[1]["contributions"]).factors
+    assert len(factors) == 3
+    assert abs(factors[0].contribution) >= abs(factors[-1].contribution)
+    assert all((f.contribution > 0) == (f.impact == "positive") for f in factors)
@@ -0,0 +1,75 @@
+import pytest
+import numpy as np
+from app.config import settings
+from app.services.model_service import ModelService
+from app.utils.file_watcher import FileWatcher
+
+def test_reload_swaps_artifacts_and_notifies_listeners():
+    service = ModelService()
+    service.load_model()
+    calls = []
+    service.add_reload_listener(lambda: calls.append(1))
+    old = service.active
+
+    new = service.reload_model(settings.MODEL_PATH)
+
+    assert service.active is new and new is not old
+    assert new.version == old.version
+    assert len(new.version) == 12
+    assert new.training_date is not None
+    assert calls == [1]
+
+def test_failed_reload_keeps_current_model(tmp_path):
+    service = ModelService()
+    service.load_model()
+    old = service.active
+    broken = tmp_path / "credit_model.joblib"
+    broken.write_bytes(b"not a model")
+
+    with pytest.raises(Exception):
+        service.reload_model(str(broken))
+    assert service.active is old
+
+def test_file_watcher_fires_once_file_is_stable(tmp_path):
+    path = tmp_path / "artifact.bin"
+    path.write_bytes(b"v1")
+    fired = []
+    watcher = FileWatcher([str(path)], lambda: fired.append(1), interval=60)
+
+    previous = watcher.poll(watcher.signature())
+    assert fired == []
+
+    path.write_bytes(b"version 2")
+    previous = watcher.poll(previous)   # change seen, wait for it to settle
+    assert fired == []
+    previous = watcher.poll(previous)   # unchanged since last poll
+    assert fired == [1]
+    watcher.poll(previous)
+    assert fired == [1]
+
+def test_mmap_mode_serves_native_export(tmp_path, monkeypatch):
+    from app.services.model_service import model_service, file_sha256, WARMUP_RECORD
+    from app.services.tree_engine import ForestEngine
+    native_dir = str(tmp_path / "native")
+    ForestEngine.from_pipeline(model_service.model).save(native_dir, source_sha256=file_sha256(settings.MODEL_PATH))
+    monkeypatch.setattr(settings, "MODEL_MMAP", True)
+    monkeypatch.setattr(settings, "NATIVE_MODEL_DIR", native_dir)
+
+    service = ModelService()
+    service.load_model()
+
+    assert service.model is None and service.engine is not None
+    assert service.version == model_service.version
+    assert service.predict(dict(WARMUP_RECORD))["score"] == model_service.predict(dict(WARMUP_RECORD))["score"]
+
+def test_compact_model_path_serves_without_pickle(tmp_path):
+    from app.services.model_service import model_service, WARMUP_RECORD
+    from app.services.tree_engine import ForestEngine
+    path = str(tmp_path / "credit_model.npz")
+    ForestEngine.from_pipeline(model_service.model).save_compact(path)
+
+    service = ModelService()
+    service.reload_model(path)
+
+    assert service.model is None and service.engine.threshold.dtype == np.float32
+    assert service.predict(dict(WARMUP_RECORD))["score"] == model_service.predict(dict(WARMUP_RECORD))["score"]
@@ -0,0 +1,86 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.preprocessing import (
+    create_derived_features, create_derived_features_fast, derive_features_record
+)
+
+TRAINING_DATA_PATH = 'data/training_data.csv'
+
+DERIVED_NUMERIC = [
+    'estimated_monthly_payment', 'debt_to_income_ratio', 'loan_to_income_ratio',
+    'savings_to_loan_ratio', 'income_stability_score', 'repayment_history_score',
+    'total_monthly_income', 'affordability_ratio'
+]
+
+def assert_bits_equal(actual, expected):
+    actual = np.asarray(actual, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    mismatches = np.flatnonzero(actual.view(np.int64) != expected.view(np.int64))
+    assert mismatches.size == 0, f"{mismatches.size} values differ, first at row {mismatches[:1]}"
+
+@pytest.fixture(scope="module")
+def training_frame():
+    if not os.path.exists(TRAINING_DATA_PATH):
+        pytest.skip("Training data not generated. Run ml/generate_training_data.py first.")
+    return pd.read_csv(TRAINING_DATA_PATH).drop(columns=['credit_worthy'])
+
+@pytest.fixture(scope="module")
+def edge_frame():
+    # Boundary ages, zero denominators and tenures outside the precomputed table
+    return pd.DataFrame({
+        'age': [18, 25, 26, 45, 46, 65, 0],
+        'years_at_current_job': [0.0, 7.3, 8.0, 27.9, 0.0, 40.0, 1.0],
+        'monthly_income': [500.0, 1234.56, 50000.0, 0.0, 777.77, 1800.0, 900.0],
+        'other_income_amount': [0.0, 19999.99, 0.0, 0.0, 0.0, 5.5, 0.0],
+        'total_savings': [0.0, 3000.0, 1e6, 12.5, 99.99, 0.0, 1.0],
+        'existing_loan_monthly_payment': [0.0, 10000.0, 0.0, 50.0, 3.14, 0.0, 0.0],
+        'requested_loan_amount': [500.0, 8000.0, 500000.0, 1000.0, 0.0, 12345.67, 500.0],
+        'loan_tenure_months': [3, 60, 12, 0, 7, 61, 240],
+        'num_previous_loans': [0, 10, 3, 1, 0, 7, 0],
+        'previous_loans_repaid_on_time': [0, 7, 3, 0, 0, 6, 0]
+    })
+
+def check_frame_equivalence(df: pd.DataFrame):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = create_derived_features(df)
+    actual = create_derived_features_fast(df)
+
+    assert list(actual.columns) == list(expected.columns)
+    for col in DERIVED_NUMERIC:
+        assert_bits_equal(actual[col], expected[col])
+    assert actual['is_new_client'].tolist() == expected['is_new_client'].tolist()
+    assert actual['age_group'].tolist() == expected['age_group'].tolist()
+
+def check_record_equivalence(df: pd.DataFrame):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = create_derived_features(df)
+    for record, expected_row in zip(df.to_dict(orient='records'), expected.to_dict(orient='records')):
+        actual = derive_features_record(record)
+        assert list(actual.keys()) == list(expected_row.keys())
+        assert_bits_equal([actual[c] for c in DERIVED_NUMERIC], [expected_row[c] for c in DERIVED_NUMERIC])
+        assert actual['is_new_client'] == expected_row['is_new_client']
+        assert actual['age_group'] == expected_row['age_group']
+
+def test_fast_frame_matches_reference_on_training_data(training_frame):
+    check_frame_equivalence(training_frame)
+
+def test_fast_record_matches_reference_on_training_data(training_frame):
+    check_record_equivalence(training_frame)
+
+def test_fast_frame_matches_reference_on_edge_cases(edge_frame):
+    check_frame_equivalence(edge_frame)
+
+def test_fast_record_matches_reference_on_edge_cases(edge_frame):
+    check_record_equivalence(edge_frame)
+
+def test_fast_record_matches_single_row_frame():
+    record = {
+        'age': 30, 'years_at_current_job': 5, 'monthly_income': 5000, 'requested_loan_amount': 10000,
+        'loan_tenure_months': 12, 'existing_loan_monthly_payment': 500, 'other_income_amount': 0,
+        'total_savings': 2000, 'num_previous_loans': 1, 'previous_loans_repaid_on_time': 1
+    }
+    expected = create_derived_features(pd.DataFrame([record])).iloc[0]
+    actual = derive_features_record(record)
+    assert_bits_equal([actual[c] for c in DERIVED_NUMERIC], [expected[c] for c in DERIVED_NUMERIC])
@@ -0,0 +1,135 @@
+import pytest
+from app.config import settings
+from app.services.rule_engine import RuleEngine, RuleValidationError, compile_condition, compile_rules
+
+FEATURES = {
+    'employment_type': 'unemployed',
+    'requested_loan_amount': 20000.0,
+    'monthly_income': 800.0,
+    'debt_to_income_ratio': 0.72,
+    'savings_account_age_months': 1,
+    'num_previous_loans': 0,
+    'repayment_history_score': 0.0,
+    'total_savings': 100.0,
+    'has_guarantor': False,
+    'has_collateral': False
+}
+
+def test_compiled_conditions_match_python_semantics():
+    engine = RuleEngine(settings.RULES_CONFIG_PATH)
+    for rules in engine.config["rules"].values():
+        for rule in rules:
+            expected = bool(eval(rule["condition"], {"__builtins__": None}, dict(FEATURES)))
+            assert engine.evaluate_condition(compile_condition(rule["condition"]), FEATURES) is expected
+
+def test_check_rules_rejects_unemployed_large_loan():
+    engine = RuleEngine(settings.RULES_CONFIG_PATH)
+    results = engine.check_rules(FEATURES)
+    names = [r["name"] for r in results["auto_reject"]]
+    assert "unemployed_large_loan" in names
+    assert "high_dti" in names
+
+@pytest.mark.parametrize("condition", [
+    "__import__('os').system('true')",
+    "monthly_income.__class__",
+    "[x for x in (1, 2)]",
+    "monthly_income ** 1000",
+    "lambda: 1",
+    "unknown_feature > 1",
+    "monthly_income >",
+])
+def test_invalid_conditions_are_rejected(condition):
+    with pytest.raises(RuleValidationError):
+        compile_condition(condition)
+
+def test_compile_rules_reports_rule_name():
+    config = {"rules": {"auto_reject": [{"name": "bad", "condition": "open('x')", "message": "m"}]}}
+    with pytest.raises(RuleValidationError, match="bad"):
+        compile_rules(config)
+
+def test_missing_feature_does_not_match():
+    assert RuleEngine(settings.RULES_CONFIG_PATH).evaluate_condition(compile_condition("age > 30"), {}) is False
+
+def test_saved_rules_reach_other_workers_and_snapshots_stay_intact(tmp_path):
+    from app.utils.file_watcher import FileWatcher
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(open(settings.RULES_CONFIG_PATH).read())
+    writer = RuleEngine(str(rules_path))
+    reader = RuleEngine(str(rules_path))   # stands in for another worker process
+    watcher = FileWatcher([str(rules_path)], reader.reload, interval=60)
+    snapshot = reader.active
+
+    config = dict(writer.config, rules=dict(writer.config["rules"], auto_reject=[]))
+    saved = writer.save(config)
+    previous = watcher.poll(watcher.signature())
+    watcher.poll(previous)
+
+    assert reader.version == saved.version != snapshot.version
+    assert reader.check_rules(FEATURES)["auto_reject"] == []
+    # A request that started before the reload keeps evaluating the old rules
+    assert reader.check_rules(FEATURES, snapshot)["auto_reject"]
+
+def test_invalid_rules_are_not_saved(tmp_path):
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(open(settings.RULES_CONFIG_PATH).read())
+    engine = RuleEngine(str(rules_path))
+    before = rules_path.read_text()
+
+    with pytest.raises(RuleValidationError):
+        engine.save({"rules": {"auto_reject": [{"name": "bad", "condition": "open('x')", "message": "m"}]}})
+    assert rules_path.read_text() == before
+
+def _varied_features(n: int):
+    # Mostly high-DTI rejections, some unemployed rejections, some that pass every auto_reject rule
+    for i in range(n):
+        yield dict(FEATURES, debt_to_income_ratio=0.9 if i % 4 else 0.2,
+                   employment_type='unemployed' if i % 8 == 0 else 'formal', savings_account_age_months=12,
+                   monthly_income=5000.0)
+
+def test_profile_records_hits_and_time():
+    engine = RuleEngine(settings.RULES_CONFIG_PATH)
+    for features in _varied_features(400):
+        engine.check_rules(features)
+
+    profile = engine.profile()
+    rules = {(r["category"], r["name"]): r for r in profile["rules"]}
+    assert profile["checks"] == 400
+    assert rules[("auto_reject", "high_dti")]["evaluations"] == 400
+    assert rules[("auto_reject", "high_dti")]["hit_rate"] == 0.75
+    assert rules[("auto_reject", "unemployed_large_loan")]["hits"] == 50
+    assert rules[("auto_reject", "high_dti")]["total_ms"] > 0
+    assert abs(sum(r["time_share"] for r in profile["rules"]) - 1) < 1e-3
+
+def test_adaptive_order_keeps_decisions_and_moves_frequent_rules_first():
+    from app.services.rule_engine import REORDER_EVERY
+    reference = RuleEngine(settings.RULES_CONFIG_PATH)
+    adaptive = RuleEngine(settings.RULES_CONFIG_PATH, adaptive_order=True)
+
+    for features in _varied_features(REORDER_EVERY + 200):
+        expected = reference.check_rules(features)
+        assert adaptive.check_rules(features) == expected
+        assert adaptive.matches_any(features, "auto_reject") == bool(expected["auto_reject"])
+
+    assert adaptive.profile()["auto_reject_order"][0] == "high_dti"
+    # Every rejection reason is reported, whatever order earlier traffic produced
+    both = dict(FEATURES, debt_to_income_ratio=0.9, employment_type='unemployed', savings_account_age_months=12,
+                monthly_income=5000.0)
+    assert [r["name"] for r in adaptive.check_rules(both)["auto_reject"]] == ["unemployed_large_loan", "high_dti"]
+    never_fires = {r["name"]: r for r in adaptive.profile()["rules"]}["loan_exceeds_limit"]
+    assert never_fires["evaluations"] > 0
+
+def test_reload_keeps_profile_of_unchanged_rules(tmp_path):
+    import json
+    rules_path = tmp_path / "rules.json"
+    config = json.loads(open(settings.RULES_CONFIG_PATH).read())
+    rules_path.write_text(json.dumps(config))
+    engine = RuleEngine(str(rules_path))
+    engine.check_rules(FEATURES)
+
+    config["rules"]["auto_reject"][1]["condition"] = "debt_to_income_ratio > 0.7"
+    rules_path.write_text(json.dumps(config))
+    engine.reload()
+
+    rules = {r["name"]: r for r in engine.profile()["rules"]}
+    assert rules["unemployed_large_loan"]["evaluations"] == 1
+    assert rules["high_dti"]["evaluations"] == 0
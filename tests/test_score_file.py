@@ -0,0 +1,65 @@
+import json
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.config import settings
+from app.routers import credit
+from app.score_file import score_file
+from ml.generate_training_data import generate_chunk
+
+LOAN_FIELDS = ['requested_loan_amount', 'loan_purpose', 'loan_tenure_months', 'has_guarantor', 'has_collateral']
+VOLATILE_FIELDS = ('request_id', 'timestamp')
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("staged", [False, True])
+async def test_score_file_matches_api(tmp_path, monkeypatch, staged):
+    monkeypatch.setattr(settings, "STAGED_DECISIONS", staged)
+    # The staged run also uses adaptive rule order
+    monkeypatch.setattr(settings, "RULES_ADAPTIVE_ORDER", staged)
+    monkeypatch.setattr(credit.rule_engine, "adaptive_order", staged)
+    # Cached API responses may come from the other pipeline
+    credit.decision_cache.invalidate()
+    portfolio = generate_chunk(60, 5).drop(columns=['credit_worthy'])
+    # An invalid row must not stop the run
+    portfolio.loc[7, 'age'] = 12
+    input_path = tmp_path / "portfolio.csv"
+    output_path = tmp_path / "decisions.jsonl"
+    portfolio.to_csv(input_path, index=False)
+
+    summary = score_file(str(input_path), str(output_path), chunk_size=25)
+    lines = [json.loads(line) for line in output_path.read_text().splitlines()]
+
+    assert summary["rows"] == 60
+    assert summary["errors"] == 1
+    assert [line["index"] for line in lines] == list(range(60))
+    assert lines[7]["response"] is None and "age" in lines[7]["error"]
+    if staged:
+        # Hard rejects skipped the model, exactly as the API does
+        assert any(line["response"] and not line["response"]["scored"] for line in lines)
+
+    records = json.loads(portfolio.to_json(orient='records'))
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        for record, line in zip(records, lines):
+            if line["error"]:
+                continue
+            assert line["client_id"] == record["client_id"]
+            payload = {
+                "client": {k: v for k, v in record.items() if k not in LOAN_FIELDS and k != 'client_id'},
+                "loan": {k: record[k] for k in LOAN_FIELDS}
+            }
+            response = await ac.post("/api/v1/credit/check", json=payload, headers={"X-API-Key": settings.API_KEY})
+            expected = {k: v for k, v in response.json().items() if k not in VOLATILE_FIELDS}
+            assert {k: v for k, v in line["response"].items() if k not in VOLATILE_FIELDS} == expected
+
+def test_score_file_csv_output(tmp_path):
+    input_path = tmp_path / "portfolio.csv"
+    output_path = tmp_path / "decisions.csv"
+    generate_chunk(30, 9).to_csv(input_path, index=False)
+
+    summary = score_file(str(input_path), str(output_path), chunk_size=10)
+    lines = output_path.read_text().splitlines()
+
+    assert lines[0].startswith("index,client_id,decision,credit_score")
+    assert len(lines) == 31
+    assert summary["errors"] == 0
+    assert sum(summary["decisions"].values()) == 30
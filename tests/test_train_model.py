@@ -0,0 +1,65 @@
+import joblib
+import numpy as np
+import pandas as pd
+from ml.generate_training_data import generate_chunk
+from ml.train_model import train_incremental, read_manifest
+from app.utils.preprocessing import create_derived_features
+
+def _train(tmp_path, **kwargs):
+    return train_incremental(
+        str(tmp_path / "data.csv"), model_dir=str(tmp_path / "models"), cache_dir=str(tmp_path / "cache"),
+        block_size=400, trees_per_block=4, **kwargs
+    )
+
+def _trees(tmp_path):
+    forest = joblib.load(tmp_path / "models" / "credit_model.joblib").named_steps['classifier']
+    return [tree.tree_.threshold.copy() for tree in forest.estimators_]
+
+def test_incremental_training_only_retrains_changed_blocks(tmp_path):
+    data = generate_chunk(1200, 21)
+    data.to_csv(tmp_path / "data.csv", index=False)
+
+    first = _train(tmp_path)
+    assert first["trained_blocks"] == 3 and first["n_estimators"] == 12
+    before = _trees(tmp_path)
+
+    # Unchanged data: nothing is retrained and no features are recomputed
+    assert _train(tmp_path)["trained_blocks"] == 0
+
+    # Change one row of the middle block and append a partial block
+    data.loc[500, 'monthly_income'] += 100
+    pd.concat([data, generate_chunk(100, 22)]).to_csv(tmp_path / "data.csv", index=False)
+    second = _train(tmp_path)
+    after = _trees(tmp_path)
+
+    assert second["trained_blocks"] == 2 and second["reused_blocks"] == 2
+    # Blocks 0 and 2 keep their trees; block 1 is retrained and the partial block gets 1 tree
+    assert second["n_estimators"] == 4 + 4 + 4 + 1
+    for old, new in zip(before[:4] + before[8:], after[:8]):
+        np.testing.assert_array_equal(old, new)
+    assert [entry["trees"] for entry in read_manifest(str(tmp_path / "models"))["blocks"]] == [4, 4, 4, 1]
+
+def test_rebuild_retrains_everything(tmp_path):
+    generate_chunk(800, 3).to_csv(tmp_path / "data.csv", index=False)
+    _train(tmp_path)
+
+    rebuilt = _train(tmp_path, rebuild=True)
+    assert rebuilt["trained_blocks"] == 2 and rebuilt["reused_blocks"] == 0
+    assert 0.5 < rebuilt["metrics"]["auc_roc"] <= 1.0
+
+def test_pruning_stays_within_accuracy_budget(tmp_path):
+    from app.services.tree_engine import ForestEngine
+    from ml.train_model import prune_forest
+    generate_chunk(2000, 31).to_csv(tmp_path / "data.csv", index=False)
+    _train(tmp_path)
+    clf = joblib.load(tmp_path / "models" / "credit_model.joblib")
+    engine = ForestEngine.from_pipeline(clf)
+    node_weight = np.concatenate([e.tree_.weighted_n_node_samples for e in clf.named_steps['classifier'].estimators_])
+    holdout = create_derived_features(generate_chunk(1000, 32))
+    X_val, y_val = engine.transform(holdout), holdout['credit_worthy'].to_numpy()
+
+    pruned, report = prune_forest(engine, node_weight, X_val, y_val, max_accuracy_loss=0.01)
+
+    assert report['nodes_after'] == len(pruned.feature) < len(engine.feature)
+    assert report['accuracy_before'] - report['accuracy_after'] <= 0.01
+    assert report['accuracy_after'] == float(np.mean((pruned.predict_proba(X_val) > 0.5) == y_val))
@@ -0,0 +1,121 @@
+import glob
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.model_service import model_service
+from app.services.tree_engine import ForestEngine, float32_floor
+from app.utils.preprocessing import create_derived_features_fast, derive_features_record
+
+TRAINING_DATA_PATH = 'data/training_data.csv'
+
+RECORD = {
+    'age': 35, 'gender': 'M', 'marital_status': 'married', 'number_of_dependents': 2,
+    'education_level': 'tertiary', 'employment_type': 'formal', 'employment_sector': 'private',
+    'years_at_current_job': 10.0, 'monthly_income': 10000.0, 'has_other_income': False,
+    'other_income_amount': 0.0, 'total_savings': 50000.0, 'savings_account_age_months': 48,
+    'average_monthly_deposit': 2000.0, 'num_previous_loans': 2, 'previous_loans_repaid_on_time': 2,
+    'has_existing_loan': False, 'existing_loan_balance': 0.0, 'existing_loan_monthly_payment': 0.0,
+    'requested_loan_amount': 5000.0, 'loan_purpose': 'business', 'loan_tenure_months': 12,
+    'has_guarantor': True, 'has_collateral': False
+}
+
+@pytest.fixture(scope="module")
+def engine():
+    return ForestEngine.from_pipeline(model_service.model)
+
+def test_engine_matches_sklearn_on_training_data(engine):
+    if not os.path.exists(TRAINING_DATA_PATH):
+        pytest.skip("Training data not generated. Run ml/generate_training_data.py first.")
+    df = create_derived_features_fast(pd.read_csv(TRAINING_DATA_PATH)).drop(columns=['client_id', 'credit_worthy'])
+
+    expected = model_service.model.predict_proba(df)[:, 1]
+    assert np.array_equal(engine.predict(df), expected)
+
+def test_engine_matches_sklearn_for_single_record(engine):
+    features = derive_features_record(RECORD)
+    expected = model_service.model.predict_proba(pd.DataFrame([features]))[0, 1]
+    assert engine.predict([features])[0] == expected
+
+def test_engine_transform_matches_preprocessor(engine):
+    records = [derive_features_record(dict(RECORD, requested_loan_amount=amount, age=age))
+               for amount, age in [(500.0, 18), (25000.0, 40), (400000.0, 65)]]
+    expected = model_service.model.named_steps['preprocessor'].transform(pd.DataFrame(records))
+    assert np.array_equal(engine.transform(records), expected.astype(np.float64))
+
+def test_saved_engine_loads_memory_mapped(engine, tmp_path):
+    directory = str(tmp_path / "native")
+    os.makedirs(directory)   # an unversioned export from an older release
+    for sha in ("abc", "def", "ghi"):
+        engine.save(directory, source_sha256=sha)   # replaces the existing export
+        if sha == "abc":
+            first = ForestEngine.load(directory, mmap_mode="r")
+    loaded = ForestEngine.load(directory, mmap_mode="r")
+
+    # The export is swapped through a symlink; only the current and the previous version are kept
+    assert os.path.islink(directory)
+    assert len(glob.glob(f"{directory}.v*")) == 2
+    assert loaded.source_sha256 == "ghi"
+    assert np.array_equal(first.threshold, loaded.threshold)
+    assert isinstance(np.load(os.path.join(directory, "threshold.npy"), mmap_mode="r"), np.memmap)
+    assert type(loaded.threshold) is np.ndarray and not loaded.threshold.flags.writeable
+    records = [derive_features_record(dict(RECORD, requested_loan_amount=amount)) for amount in (1000.0, 90000.0)]
+    assert np.array_equal(loaded.predict(records), engine.predict(records))
+    # Explainer arrays are mapped from the export too, not rebuilt privately in each worker
+    assert not loaded.node_delta.flags.writeable and not loaded.node_group.flags.writeable
+    X = engine.transform(records)
+    assert np.array_equal(loaded.explain(X)[1], engine.explain(X)[1])
+
+    # Exports written before the explainer arrays were stored rebuild them
+    for name in ("node_delta", "node_group"):
+        os.remove(os.path.join(directory, f"{name}.npy"))
+    rebuilt = ForestEngine.load(directory, mmap_mode="r")
+    assert np.array_equal(rebuilt.node_delta, engine.node_delta)
+    assert np.array_equal(rebuilt.explain(X)[1], engine.explain(X)[1])
+
+def test_explain_contributions_add_up_to_probability(engine):
+    records = [derive_features_record(dict(RECORD, requested_loan_amount=amount, employment_type=employment))
+               for amount in (1000.0, 40000.0) for employment in ('formal', 'unemployed')]
+    X = engine.transform(records)
+
+    probs, contributions = engine.explain(X)
+
+    assert np.array_equal(probs, engine.predict_proba(X))
+    assert contributions.shape == (len(records), len(engine.feature_names))
+    np.testing.assert_allclose(engine.bias + contributions.sum(axis=1), probs, atol=1e-12)
+    # Applicants that differ only in employment type get different employment_type contributions
+    column = engine.feature_names.index('employment_type')
+    assert contributions[0, column] != contributions[1, column]
+
+def test_compact_export_is_smaller_and_exact(engine, tmp_path):
+    path = str(tmp_path / "model.npz")
+    engine.save_compact(path, source_sha256="abc")
+    loaded = ForestEngine.load_compact(path)
+
+    with np.load(path, allow_pickle=False) as data:
+        assert data["threshold"].dtype == np.float32
+        assert data["left"].dtype.itemsize <= 2 and data["feature"].dtype.itemsize <= 2
+        assert data["node_group"].dtype.itemsize == 1
+    assert loaded.source_sha256 == "abc"
+    assert np.array_equal(loaded.node_delta, engine.node_delta)
+    records = [derive_features_record(dict(RECORD, requested_loan_amount=amount, monthly_income=income))
+               for amount in (500.0, 5000.0, 90000.0) for income in (900.0, 4000.0, 25000.0)]
+    assert np.array_equal(loaded.predict(records), engine.predict(records))
+
+def test_float32_floor_preserves_splits():
+    rng = np.random.default_rng(0)
+    thresholds = rng.normal(size=1000) * 10.0 ** rng.integers(-3, 6, size=1000)
+    floors = float32_floor(thresholds)
+    # Probe float32 values on both sides of each rounded threshold
+    for x in (floors, np.nextafter(floors, np.float32(np.inf)), np.nextafter(floors, np.float32(-np.inf))):
+        assert np.array_equal(x <= floors, x.astype(np.float64) <= thresholds)
+
+def test_collapse_turns_nodes_into_leaves(engine):
+    X = engine.transform([derive_features_record(RECORD)])
+    first_tree_root = engine.roots[0]
+    collapsed = engine.collapse(np.array([first_tree_root]))
+
+    assert len(collapsed.feature) == len(engine.feature) - (engine.roots[1] - engine.roots[0]) + 1
+    leaves = collapsed.apply(X)[0]
+    assert leaves[0] == 0 and collapsed.value[0] == engine.value[first_tree_root]
+    np.testing.assert_array_equal(collapsed.value[leaves[1:]], engine.value[engine.apply(X)[0][1:]])